@@ -0,0 +1,329 @@
+"""
+Benchmarks repetibles por etapa sobre listings sintéticos.
+
+    python -m benchmarks.run --sizes 10k 1m --repeat 3
+    python -m benchmarks.run --sizes 10m --stages transform load.encode
+    python -m benchmarks.run --compare benchmarks/results/<anterior>.json
+
+Cada ejecución se guarda en benchmarks/results/ y se compara contra la
+anterior (o --compare): si la mediana de algún caso empeora más que
+--tolerance el proceso termina con código 1.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import src.pipeline.validate as validate
+from benchmarks.synthetic import escribir_csv, formatear_precios, generar_listings
+from src.pipeline.extract import construir_opciones_lectura, extract_listings, obtener_motor_csv
+from src.pipeline.transform import transformar_listings
+from src.utils.config_loader import get_config
+from src.utils.metrics import peak_rss_mb
+
+
+BENCH_PATH = Path(__file__).resolve().parent
+DATA_PATH = BENCH_PATH / "data"
+RESULTS_PATH = BENCH_PATH / "results"
+
+TAMANOS = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+# =====================================================
+# PREPARACIÓN DE ENTRADAS
+# =====================================================
+
+def preparar_csv(n: int, seed: int) -> Path:
+    """
+    El CSV sintético se genera una sola vez por (n, seed) y se reutiliza.
+    """
+
+    ruta = DATA_PATH / f"listings_{n}_{seed}.csv"
+
+    if not ruta.exists():
+        escribir_csv(generar_listings(n, seed), ruta)
+
+    return ruta
+
+
+def columnas_carga() -> list:
+
+    from src.pipeline.load import COLUMNAS_CARGA
+
+    return COLUMNAS_CARGA
+
+
+def preparar_contexto(n: int, seed: int, etapas: list) -> dict:
+    """
+    Entradas de cada etapa: la salida real de la etapa anterior,
+    así cada benchmark mide sólo su propia etapa.
+    """
+
+    ruta = preparar_csv(n, seed)
+    contexto = {"csv": ruta}
+
+    contexto["extraido"] = extract_listings(ruta)
+
+    if any(etapa.startswith(("transform", "load")) for etapa in etapas):
+        validado = validate.ejecutar_validaciones_listings(contexto["extraido"])
+
+        # El feed puede traer precios "$1,234.00": transform los normaliza
+        contexto["validado"] = validado.assign(price=formatear_precios(validado["price"]))
+
+    if any(etapa.startswith("load") for etapa in etapas):
+        contexto["transformado"] = transformar_listings(contexto["validado"], columnas_salida=columnas_carga())
+
+    return contexto
+
+
+# =====================================================
+# BENCHMARKS
+# =====================================================
+
+def bench_extract(contexto: dict):
+    # Tras el warmup el CSV sale de la caché columnar
+    return extract_listings(contexto["csv"])
+
+
+def bench_extract_csv(contexto: dict):
+    # Parseo del CSV sin caché
+    ruta = contexto["csv"]
+    return pd.read_csv(ruta, engine=obtener_motor_csv(), **construir_opciones_lectura(ruta, "listings"))
+
+
+def bench_validate(contexto: dict):
+    return validate.ejecutar_validaciones_listings(contexto["extraido"])
+
+
+def bench_transform(contexto: dict):
+    return transformar_listings(contexto["validado"], columnas_salida=columnas_carga())
+
+
+def bench_load_encode(contexto: dict):
+    # Conversión a filas Python por lote (lo que se envía a executemany/TVP), sin red
+    from src.pipeline.bulk_load import iterar_lotes
+
+    iterar_lotes(contexto["transformado"], get_config()["load"], lambda filas: None)
+
+
+def bench_load_bcp(contexto: dict):
+    # Codificación del archivo nativo de BULK INSERT, sin servidor
+    from src.pipeline.bulk_load import escribir_archivo_bcp
+
+    with tempfile.TemporaryDirectory() as directorio:
+        escribir_archivo_bcp(contexto["transformado"], Path(directorio) / "bench.dat", get_config()["load"])
+
+
+def bench_load_db(contexto: dict):
+    # Carga completa contra el DW configurado en .env (sólo con --db)
+    from src.pipeline.load import ejecutar_carga
+
+    ejecutar_carga(contexto["transformado"])
+
+
+def bench_load_sqlite(contexto: dict):
+    # Carga completa (dimensiones SCD2 + hechos) en un warehouse SQLite nuevo
+    from src.pipeline.load import ejecutar_carga
+
+    config = get_config()["warehouse"]
+    anterior = dict(config)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        config.update(backend="sqlite", sqlite_path=str(Path(directorio) / "dw.sqlite"))
+
+        try:
+            ejecutar_carga(contexto["transformado"])
+        finally:
+            config.clear()
+            config.update(anterior)
+
+
+BENCHMARKS = {
+    "extract": bench_extract,
+    "extract.csv": bench_extract_csv,
+    "validate": bench_validate,
+    "transform": bench_transform,
+    "load.encode": bench_load_encode,
+    "load.bcp": bench_load_bcp,
+    "load.sqlite": bench_load_sqlite,
+    "load.db": bench_load_db
+}
+
+ETAPAS_POR_DEFECTO = ["extract", "extract.csv", "validate", "transform", "load.encode", "load.bcp", "load.sqlite"]
+
+
+def medir(funcion, contexto: dict, filas: int, repeticiones: int, warmup: int) -> dict:
+
+    for _ in range(warmup):
+        funcion(contexto)
+
+    tiempos = []
+
+    for _ in range(repeticiones):
+        gc.collect()
+
+        t0 = time.perf_counter()
+        funcion(contexto)
+        tiempos.append(time.perf_counter() - t0)
+
+    mediana = statistics.median(tiempos)
+
+    return {
+        "rows": filas,
+        "repeat": repeticiones,
+        "min_s": round(min(tiempos), 4),
+        "median_s": round(mediana, 4),
+        "max_s": round(max(tiempos), 4),
+        "rows_per_s": round(filas / mediana, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+
+# =====================================================
+# RESULTADOS Y COMPARACIÓN
+# =====================================================
+
+def commit_actual() -> str:
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=BENCH_PATH
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def guardar_resultados(resultados: dict, args) -> Path:
+
+    RESULTS_PATH.mkdir(parents=True, exist_ok=True)
+
+    commit = commit_actual()
+    fecha = datetime.now()
+
+    salida = {
+        "commit": commit,
+        "started_at": fecha.isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "results": resultados
+    }
+
+    ruta = RESULTS_PATH / f"{fecha:%Y%m%d_%H%M%S}_{commit}.json"
+
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(salida, f, indent=4)
+
+    return ruta
+
+
+def ultimo_resultado(excluir: Path = None):
+
+    anteriores = sorted(p for p in RESULTS_PATH.glob("*.json") if p != excluir)
+
+    return anteriores[-1] if anteriores else None
+
+
+def comparar(actual: dict, anterior: dict, tolerancia: float) -> list:
+    """
+    Casos cuya mediana empeoró más que `tolerancia` (0.15 = 15 %).
+    """
+
+    regresiones = []
+
+    for caso, resultado in actual.items():
+        if caso not in anterior:
+            continue
+
+        base = anterior[caso]["median_s"]
+        cambio = resultado["median_s"] / base - 1 if base else 0.0
+
+        print(f"  {caso:<22} {base:>9.4f}s → {resultado['median_s']:>9.4f}s  ({cambio:+.1%})")
+
+        if cambio > tolerancia:
+            regresiones.append(caso)
+
+    return regresiones
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline Airbnb sobre datos sintéticos")
+
+    parser.add_argument("--sizes", nargs="+", default=["10k", "1m"], choices=list(TAMANOS))
+    parser.add_argument("--stages", nargs="+", default=ETAPAS_POR_DEFECTO, choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", action="store_true", help="Incluye load.db contra el DW configurado")
+    parser.add_argument("--compare", type=Path, default=None, help="Resultado previo a comparar (por defecto: el último)")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+
+    args = parse_args(argv)
+
+    etapas = list(dict.fromkeys(args.stages + (["load.db"] if args.db else [])))
+
+    # Cuarentena y reporte de calidad de los benchmarks fuera de output/
+    validate.OUTPUT_PATH = Path(tempfile.mkdtemp(prefix="bench_output_"))
+
+    resultados = {}
+
+    for etiqueta in args.sizes:
+        n = TAMANOS[etiqueta]
+        contexto = preparar_contexto(n, args.seed, etapas)
+
+        for etapa in etapas:
+            caso = f"{etapa}@{etiqueta}"
+            resultados[caso] = medir(BENCHMARKS[etapa], contexto, n, args.repeat, args.warmup)
+
+            print(f"⏱️ {caso:<22} mediana {resultados[caso]['median_s']:.4f}s — {resultados[caso]['rows_per_s']:,.0f} filas/s")
+
+        del contexto
+        gc.collect()
+
+    ruta = guardar_resultados(resultados, args)
+
+    print(f"📊 Resultados → {ruta}")
+
+    base = args.compare or ultimo_resultado(excluir=ruta)
+
+    if base is None:
+        return 0
+
+    print(f"\nComparación contra {base.name}:")
+
+    anterior = json.loads(Path(base).read_text(encoding="utf-8"))["results"]
+    regresiones = comparar(resultados, anterior, args.tolerance)
+
+    if regresiones:
+        print(f"🔥 Regresiones (> {args.tolerance:.0%}): {', '.join(regresiones)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+
+# =====================================================
+# GENERADOR SINTÉTICO DE LISTINGS
+# =====================================================
+
+BARRIOS = {
+    "Manhattan": ["Harlem", "Midtown", "Chelsea", "SoHo", "Upper West Side"],
+    "Brooklyn": ["Williamsburg", "Bushwick", "Park Slope", "Bedford-Stuyvesant"],
+    "Queens": ["Astoria", "Long Island City", "Flushing"],
+    "Bronx": ["Mott Haven", "Fordham"],
+    "Staten Island": ["St. George"]
+}
+
+TIPOS_HABITACION = ["Entire home/apt", "Private room", "Shared room", "Hotel room"]
+
+AMENITIES = ["Wifi", "Kitchen", "Heating", "Air conditioning", "Washer", "Dryer", "TV", "Pool"]
+
+
+def combinaciones_amenities(rng: np.random.Generator, n: int = 64) -> np.ndarray:
+    """
+    Un vocabulario acotado de listas de amenities con el formato del feed
+    ({"Wifi","Kitchen"}), reutilizado por todas las filas.
+    """
+
+    combinaciones = []
+
+    for _ in range(n):
+        elegidas = rng.choice(AMENITIES, rng.integers(0, len(AMENITIES) + 1), replace=False)
+        combinaciones.append("{" + ",".join(f'"{a}"' for a in elegidas) + "}")
+
+    return np.array(combinaciones, dtype=object)
+
+
+def con_nulos(valores: np.ndarray, rng: np.random.Generator, fraccion: float) -> np.ndarray:
+
+    valores = valores.astype(object) if valores.dtype.kind in "OU" else valores.astype("float64")
+    valores[rng.random(len(valores)) < fraccion] = None if valores.dtype == object else np.nan
+
+    return valores
+
+
+def generar_listings(n: int, seed: int = 42, precio_texto: bool = False) -> pd.DataFrame:
+    """
+    Listings sintéticos con el esquema de data/listings.csv (más las columnas
+    t/f y amenities del feed completo): nulos, duplicados, precios negativos
+    y coordenadas inválidas en proporciones fijas.
+    Con precio_texto=True el precio llega como "$1,234.00".
+    Determinista para un mismo (n, seed).
+    """
+
+    rng = np.random.default_rng(seed)
+
+    grupos = np.array(list(BARRIOS), dtype=object)
+    grupo = grupos[rng.integers(0, len(grupos), n)]
+    barrio = np.empty(n, dtype=object)
+
+    for nombre, barrios in BARRIOS.items():
+        mascara = grupo == nombre
+        barrio[mascara] = np.array(barrios, dtype=object)[rng.integers(0, len(barrios), mascara.sum())]
+
+    ids = np.arange(1, n + 1, dtype="int64")
+    host_id = rng.integers(1, max(n // 3, 2), n)
+
+    # Atributos de host consistentes por host_id, como en el feed real
+    nombres_host = np.array(["Ana", "Luis", "Beata", "Kim", "Omar", "Mei", "Raj", None], dtype=object)
+
+    precio = np.round(rng.lognormal(4.8, 0.7, n), 0)
+    precio[rng.random(n) < 0.01] = -5
+    precio = con_nulos(precio, rng, 0.03)
+
+    latitud = rng.uniform(40.5, 40.9, n).round(5)
+    latitud[rng.random(n) < 0.005] = 123.0
+
+    df = pd.DataFrame({
+        "id": ids,
+        "name": con_nulos(("Listing " + pd.Series(ids).astype(str)).to_numpy(dtype=object), rng, 0.01),
+        "host_id": host_id,
+        "host_name": nombres_host[host_id % len(nombres_host)],
+        "neighbourhood_group": con_nulos(grupo, rng, 0.01),
+        "neighbourhood": barrio,
+        "latitude": latitud,
+        "longitude": rng.uniform(-74.25, -73.7, n).round(5),
+        "room_type": np.array(TIPOS_HABITACION, dtype=object)[rng.integers(0, len(TIPOS_HABITACION), n)],
+        "price": precio,
+        "minimum_nights": rng.integers(1, 60, n),
+        "number_of_reviews": rng.integers(0, 500, n),
+        "last_review": con_nulos(np.array(["2024-01-15", "2024-06-30", "2025-02-01"], dtype=object)[rng.integers(0, 3, n)], rng, 0.2),
+        "reviews_per_month": con_nulos(rng.uniform(0, 6, n).round(2), rng, 0.2),
+        "calculated_host_listings_count": np.bincount(host_id)[host_id],
+        "availability_365": rng.integers(0, 366, n),
+        "number_of_reviews_ltm": rng.integers(0, 80, n),
+        "license": con_nulos(np.array(["STR-0001", "Exempt"], dtype=object)[rng.integers(0, 2, n)], rng, 0.7),
+        "host_is_superhost": con_nulos(np.array(["t", "f"], dtype=object)[rng.integers(0, 2, n)], rng, 0.01),
+        "instant_bookable": np.array(["t", "f"], dtype=object)[rng.integers(0, 2, n)],
+        "has_availability": np.array(["t", "f"], dtype=object)[rng.integers(0, 2, n)],
+        "amenities": combinaciones_amenities(rng)[rng.integers(0, 64, n)]
+    })
+
+    # ~0.1 % de ids repetidos, repartidos a lo largo del archivo
+    repetidos = rng.choice(n, max(n // 1000, 1), replace=False)
+    df.loc[repetidos, "id"] = rng.integers(1, n + 1, len(repetidos))
+
+    if precio_texto:
+        df["price"] = formatear_precios(df["price"])
+
+    return df
+
+
+def formatear_precios(precios: pd.Series) -> pd.Series:
+    """
+    123.0 → "$123.00", 1234.0 → "$1,234.00"; los nulos siguen nulos.
+    """
+
+    texto = precios.map("${:,.2f}".format, na_action="ignore")
+
+    return texto.astype(object)
+
+
+def escribir_csv(df: pd.DataFrame, ruta: Path) -> Path:
+    """
+    Escribe el frame como el feed original (t/f, precios tal cual).
+    """
+
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    df.to_csv(ruta, index=False)
+
+    return ruta
@@ -3,24 +3,46 @@ Pricing Intelligence
 Identify over/underpriced listings compared to similar properties
 ====================================================*/
 
-WITH listing_prices AS (
+WITH market AS (
 
+    -- Promedio de mercado para propiedades similares
+    -- (summary table mantenida por el loader, todos los snapshots)
+    SELECT
+        neighbourhood,
+        room_type,
+        SUM(price_sum) * 1.0 / SUM(listing_count) AS market_average
+    FROM dw.agg_price_neighbourhood_room
+    GROUP BY
+        neighbourhood,
+        room_type
+),
+
+latest AS (
+
+    SELECT MAX(snapshot_date) AS snapshot_date
+    FROM dw.agg_price_neighbourhood_room
+),
+
+listing_prices AS (
+
+    -- Sólo el último snapshot: un precio vigente por listing
     SELECT
         dp.listing_id,
         dl.neighbourhood,
         dp.room_type,
         f.price AS current_price,
-
-        -- Promedio de mercado para propiedades similares
-        AVG(f.price) OVER (
-            PARTITION BY dl.neighbourhood, dp.room_type
-        ) AS market_average
+        m.market_average
 
     FROM dw.fact_listing_snapshot f
+    JOIN latest l
+        ON f.snapshot_date = l.snapshot_date
     JOIN dw.dim_property dp
         ON f.property_key = dp.property_key
     JOIN dw.dim_location dl
         ON f.location_key = dl.location_key
+    JOIN market m
+        ON m.neighbourhood = dl.neighbourhood
+       AND m.room_type = dp.room_type
 
     WHERE f.price IS NOT NULL
 ),
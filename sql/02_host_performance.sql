@@ -5,18 +5,19 @@ Rank hosts using a composite performance score
 
 WITH host_metrics AS (
 
+    -- Summary table por snapshot y host: sumas combinables entre snapshots
     SELECT
         dh.host_id,
         dh.host_name,
 
-        SUM(f.price * f.availability_365) AS revenue_potential,
-        SUM(f.number_of_reviews) AS total_reviews,
-        AVG(ISNULL(f.reviews_per_month,0)) AS avg_reviews_per_month,
+        SUM(a.revenue_potential) AS revenue_potential,
+        SUM(a.total_reviews) AS total_reviews,
+        SUM(a.reviews_per_month_sum) * 1.0 / SUM(a.listing_count) AS avg_reviews_per_month,
         MAX(dh.calculated_host_listings_count) AS portfolio_size
 
-    FROM dw.fact_listing_snapshot f
+    FROM dw.agg_host_snapshot a
     JOIN dw.dim_host dh
-        ON f.host_key = dh.host_key
+        ON a.host_key = dh.host_key
 
     WHERE dh.is_current = 1
 
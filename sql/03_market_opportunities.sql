@@ -5,21 +5,20 @@ Identify neighborhoods with high demand and limited supply
 
 WITH neighborhood_metrics AS (
  
+    -- Summary table por snapshot y barrio: sumas combinables entre snapshots
     SELECT
-        dl.neighbourhood,
+        neighbourhood,
 
-        COUNT(*) AS total_listings,
+        SUM(listing_count) AS total_listings,
 
-        AVG(ISNULL(f.reviews_per_month,0)) AS avg_reviews_per_month,
-        SUM(f.number_of_reviews) AS total_reviews,
+        SUM(reviews_per_month_sum) * 1.0 / SUM(listing_count) AS avg_reviews_per_month,
+        SUM(total_reviews) AS total_reviews,
 
-        AVG(f.availability_365) AS avg_availability
+        SUM(availability_sum) / SUM(listing_count) AS avg_availability
 
-    FROM dw.fact_listing_snapshot f
-    JOIN dw.dim_location dl
-        ON f.location_key = dl.location_key
+    FROM dw.agg_market_neighbourhood
 
-    GROUP BY dl.neighbourhood
+    GROUP BY neighbourhood
 ),
 
 scored_neighborhoods AS (
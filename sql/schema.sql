@@ -4,6 +4,22 @@
 CREATE SCHEMA dw;
 GO
 
+-- =====================================================
+-- PARTICIONAMIENTO DE HECHOS POR SNAPSHOT
+-- Una partición por día cargado (RANGE RIGHT). El loader agrega los
+-- límites de cada día antes de cargarlo (load.fact_strategy = switch,
+-- ver src/pipeline/particiones.py), así la partición final siempre
+-- queda vacía y el SPLIT es sólo de metadatos.
+-- =====================================================
+CREATE PARTITION FUNCTION pf_snapshot_date (DATE)
+AS RANGE RIGHT FOR VALUES ();
+GO
+
+CREATE PARTITION SCHEME ps_snapshot_date
+AS PARTITION pf_snapshot_date ALL TO ([PRIMARY]);
+GO
+
+
 -- =====================================================
 -- DIMENSION: HOST (SCD Type 2)
 -- =====================================================
@@ -15,33 +31,52 @@ CREATE TABLE dw.dim_host (
     host_name NVARCHAR(255),
     calculated_host_listings_count INT,
 
+    row_hash BIGINT NULL,                   -- hash de las columnas rastreadas (config.yaml → scd)
+
     effective_date DATE NOT NULL DEFAULT CAST(GETDATE() AS DATE),
     end_date DATE NULL,
     is_current BIT NOT NULL DEFAULT 1
 );
 GO
 
+-- Una sola versión vigente por host (las cerradas pueden ser varias)
 CREATE UNIQUE NONCLUSTERED INDEX idx_dim_host_business
-ON dw.dim_host(host_id, is_current);
+ON dw.dim_host(host_id)
+WHERE is_current = 1;
+GO
+
+CREATE NONCLUSTERED INDEX idx_dim_host_hash
+ON dw.dim_host(host_id, row_hash)
+WHERE is_current = 1;
 GO
 
 
 -- =====================================================
 -- DIMENSION: LOCATION
+-- Grain: una fila por barrio y celda geohash (location.geohash_precision);
+-- latitude/longitude son el centro de la celda
 -- =====================================================
 CREATE TABLE dw.dim_location (
 
     location_key INT IDENTITY(1,1) PRIMARY KEY,
 
+    market NVARCHAR(100) NOT NULL DEFAULT 'UNKNOWN', -- ciudad / mercado del archivo de origen
     neighbourhood_group NVARCHAR(100),
     neighbourhood NVARCHAR(150),
+    geohash NVARCHAR(12) NOT NULL DEFAULT 'UNKNOWN',
     latitude DECIMAL(9,6),
-    longitude DECIMAL(9,6)
+    longitude DECIMAL(9,6),
+
+    row_hash BIGINT NULL
 );
 GO
 
 CREATE NONCLUSTERED INDEX idx_dim_location
-ON dw.dim_location(neighbourhood_group, neighbourhood);
+ON dw.dim_location(market, neighbourhood_group, neighbourhood, geohash, row_hash);
+GO
+
+CREATE NONCLUSTERED INDEX idx_dim_location_geohash
+ON dw.dim_location(geohash);
 GO
 
 
@@ -56,7 +91,9 @@ CREATE TABLE dw.dim_property (
     listing_name NVARCHAR(300),
     room_type NVARCHAR(50),
     minimum_nights INT,
-    license NVARCHAR(100)
+    license NVARCHAR(100),
+
+    row_hash BIGINT NULL
 );
 GO
 
@@ -64,6 +101,23 @@ CREATE UNIQUE NONCLUSTERED INDEX idx_dim_property_listing
 ON dw.dim_property(listing_id);
 GO
 
+CREATE NONCLUSTERED INDEX idx_dim_property_hash
+ON dw.dim_property(listing_id, row_hash);
+GO
+
+
+-- =====================================================
+-- FIRMA DE LOS row_hash (motor SCD, src/pipeline/scd.py)
+-- Columnas rastreadas con las que se calcularon los hashes guardados
+-- de cada dimensión; si config.yaml cambia se recalculan
+-- =====================================================
+CREATE TABLE dw.scd_hash_signature (
+
+    dimension NVARCHAR(50) PRIMARY KEY,
+    tracked NVARCHAR(1000) NOT NULL
+);
+GO
+
 
 -- =====================================================
 -- DIMENSION: DATE
@@ -80,9 +134,53 @@ CREATE TABLE dw.dim_date (
 GO
 
 
+-- =====================================================
+-- DIMENSION: AMENITY
+-- =====================================================
+CREATE TABLE dw.dim_amenity (
+
+    amenity_key INT IDENTITY(1,1) PRIMARY KEY,
+    amenity_name NVARCHAR(200) NOT NULL     -- forma normalizada (minúsculas)
+);
+GO
+
+CREATE UNIQUE NONCLUSTERED INDEX idx_dim_amenity_name
+ON dw.dim_amenity(amenity_name);
+GO
+
+
+-- =====================================================
+-- BRIDGE: PROPERTY <-> AMENITY
+-- Grain: One row per listing and amenity (estado vigente)
+-- =====================================================
+CREATE TABLE dw.bridge_property_amenity (
+
+    property_key INT NOT NULL,
+    amenity_key INT NOT NULL,
+
+    CONSTRAINT PK_bridge_property_amenity
+        PRIMARY KEY (property_key, amenity_key),
+
+    CONSTRAINT FK_bridge_property
+        FOREIGN KEY (property_key)
+        REFERENCES dw.dim_property(property_key),
+
+    CONSTRAINT FK_bridge_amenity
+        FOREIGN KEY (amenity_key)
+        REFERENCES dw.dim_amenity(amenity_key)
+);
+GO
+
+CREATE NONCLUSTERED INDEX idx_bridge_amenity
+ON dw.bridge_property_amenity(amenity_key);
+GO
+
+
 -- =====================================================
 -- FACT TABLE: LISTING SNAPSHOT
 -- Grain: One row per listing per snapshot date
+-- Particionada por snapshot_date; índices alineados con la partición.
+-- La staging del SWITCH se genera a partir de esta definición.
 -- =====================================================
 CREATE TABLE dw.fact_listing_snapshot (
 
@@ -115,6 +213,90 @@ CREATE TABLE dw.fact_listing_snapshot (
     CONSTRAINT FK_fact_location
         FOREIGN KEY (location_key)
         REFERENCES dw.dim_location(location_key)
+) ON ps_snapshot_date(snapshot_date);
+GO
+
+
+-- =====================================================
+-- FACT TABLE: REVIEW DAILY
+-- Grain: One row per listing per review date
+-- (agregado desde reviews.csv; se recarga desde el watermark)
+-- =====================================================
+CREATE TABLE dw.fact_review_daily (
+
+    date_key DATE NOT NULL,
+    property_key INT NOT NULL,
+
+    review_count INT NOT NULL,
+
+    CONSTRAINT PK_fact_review_daily
+        PRIMARY KEY (date_key, property_key),
+
+    CONSTRAINT FK_review_date
+        FOREIGN KEY (date_key)
+        REFERENCES dw.dim_date(date_key),
+
+    CONSTRAINT FK_review_property
+        FOREIGN KEY (property_key)
+        REFERENCES dw.dim_property(property_key)
+);
+GO
+
+CREATE NONCLUSTERED INDEX idx_fact_review_property
+ON dw.fact_review_daily(property_key);
+GO
+
+
+-- =====================================================
+-- SUMMARY TABLES (mantenidas por el loader)
+-- Grain: una fila por snapshot y grupo. Se recalculan sólo para el
+-- snapshot recién cargado. Guardan sumas y conteos (no promedios) para
+-- poder combinarse entre snapshots. Las consultas de sql/0*.sql las leen
+-- en lugar de recorrer todo el historial de hechos.
+-- =====================================================
+CREATE TABLE dw.agg_price_neighbourhood_room (
+
+    snapshot_date DATE NOT NULL,
+    neighbourhood NVARCHAR(150) NOT NULL,
+    room_type NVARCHAR(50) NOT NULL,
+
+    listing_count INT NOT NULL,
+    price_sum DECIMAL(18,2) NOT NULL,
+    price_min DECIMAL(10,2),
+    price_max DECIMAL(10,2),
+
+    CONSTRAINT PK_agg_price
+        PRIMARY KEY (snapshot_date, neighbourhood, room_type)
+);
+GO
+
+CREATE TABLE dw.agg_host_snapshot (
+
+    snapshot_date DATE NOT NULL,
+    host_key INT NOT NULL,
+
+    listing_count INT NOT NULL,
+    revenue_potential DECIMAL(18,2),
+    total_reviews BIGINT,
+    reviews_per_month_sum DECIMAL(18,2),
+
+    CONSTRAINT PK_agg_host
+        PRIMARY KEY (snapshot_date, host_key)
+);
+GO
+
+CREATE TABLE dw.agg_market_neighbourhood (
+
+    snapshot_date DATE NOT NULL,
+    neighbourhood NVARCHAR(150) NOT NULL,
+
+    listing_count INT NOT NULL,
+    reviews_per_month_sum DECIMAL(18,2),
+    total_reviews BIGINT,
+    availability_sum BIGINT,
+
+    CONSTRAINT PK_agg_market
+        PRIMARY KEY (snapshot_date, neighbourhood)
 );
 GO
 
@@ -141,3 +323,80 @@ GO
 CREATE CLUSTERED COLUMNSTORE INDEX cci_fact_listing
 ON dw.fact_listing_snapshot;
 GO
+
+
+-- =====================================================
+-- TABLE TYPES para carga masiva por TVP
+-- (load.backend = tvp en config.yaml)
+-- Deben coincidir columna a columna con las tablas #stage de load.py
+-- =====================================================
+
+CREATE TYPE dw.host_stage_type AS TABLE (
+    host_id BIGINT,
+    host_name NVARCHAR(255),
+    calculated_host_listings_count INT,
+    row_hash BIGINT
+);
+GO
+
+CREATE TYPE dw.location_stage_type AS TABLE (
+    market NVARCHAR(100),
+    neighbourhood_group NVARCHAR(100),
+    neighbourhood NVARCHAR(150),
+    geohash NVARCHAR(12),
+    latitude FLOAT,
+    longitude FLOAT,
+    row_hash BIGINT
+);
+GO
+
+CREATE TYPE dw.property_stage_type AS TABLE (
+    listing_id BIGINT,
+    listing_name NVARCHAR(300),
+    room_type NVARCHAR(50),
+    minimum_nights INT,
+    license NVARCHAR(100),
+    row_hash BIGINT
+);
+GO
+
+CREATE TYPE dw.fact_stage_type AS TABLE (
+    property_key INT,
+    host_key INT,
+    location_key INT,
+    price FLOAT,
+    availability_365 INT,
+    number_of_reviews INT,
+    number_of_reviews_ltm INT,
+    reviews_per_month FLOAT
+);
+GO
+
+CREATE TYPE dw.date_stage_type AS TABLE (
+    date_key DATE,
+    year SMALLINT,
+    quarter TINYINT,
+    month TINYINT,
+    day TINYINT,
+    weekday TINYINT
+);
+GO
+
+CREATE TYPE dw.review_stage_type AS TABLE (
+    date_key DATE,
+    property_key INT,
+    review_count INT
+);
+GO
+
+CREATE TYPE dw.amenity_stage_type AS TABLE (
+    listing_id BIGINT,
+    amenity_name NVARCHAR(200)
+);
+GO
+
+CREATE TYPE dw.scd_hash_stage_type AS TABLE (
+    clave INT,
+    row_hash BIGINT
+);
+GO
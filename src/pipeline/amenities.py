@@ -0,0 +1,155 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# =====================================================
+# TOKENIZACIÓN (UNA VEZ POR LISTA DISTINTA)
+# =====================================================
+#
+# Cada listing guarda su lista de amenities en forma canónica
+# ("heating|kitchen|wifi": tokens en minúscula, únicos y ordenados) dentro
+# de una columna categórica: por fila sólo viaja el código de la categoría
+# y cada lista distinta se tokeniza una única vez.
+#
+# A partir de las categorías se arma el vocabulario interno (cada token una
+# sola vez) y la lista dispersa de códigos de cada categoría (CSR); flags y
+# bridge trabajan sobre esa estructura, nunca sobre el texto fila a fila.
+
+SEPARADOR = "|"
+
+CARACTERES_FEED = re.compile(r'[{}\[\]"]')
+
+
+def normalizar_lista(texto: str) -> str:
+    """
+    '{"Wifi","Kitchen"}' / '["Wifi", "Kitchen"]' → "kitchen|wifi"
+    """
+
+    tokens = {
+        token.strip().lower()
+        for token in CARACTERES_FEED.sub("", texto).split(",")
+    }
+    tokens.discard("")
+
+    return SEPARADOR.join(sorted(tokens))
+
+
+def tokenizar_amenities(serie: pd.Series) -> pd.Series:
+    """
+    Columna cruda del feed → categórica con la lista canónica.
+    Los nulos siguen nulos.
+    """
+
+    codigos, distintas = pd.factorize(serie)
+
+    canonicas = np.array([normalizar_lista(str(texto)) for texto in distintas], dtype=object)
+
+    categorias = canonicas
+
+    # Listas crudas distintas pueden coincidir al normalizarse (orden, mayúsculas)
+    if len(canonicas):
+        categorias, inversa = np.unique(canonicas, return_inverse=True)
+        codigos = np.where(codigos >= 0, inversa[codigos], -1)
+
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=categorias),
+        index=serie.index,
+        name=serie.name
+    )
+
+
+def vocabulario(serie: pd.Series) -> dict:
+    """
+    Vocabulario y listas dispersas de códigos por categoría:
+
+        tokens:  nombres de amenity (únicos, ordenados)
+        indptr:  la categoría i usa indices[indptr[i]:indptr[i + 1]]
+        indices: códigos de token
+    """
+
+    listas = [cat.split(SEPARADOR) if cat else [] for cat in serie.cat.categories]
+
+    largos = np.fromiter((len(lista) for lista in listas), dtype="int64", count=len(listas))
+    planos = np.array([token for lista in listas for token in lista], dtype=object)
+
+    tokens, indices = np.unique(planos, return_inverse=True) if len(planos) else (planos, np.empty(0, "int64"))
+
+    return {
+        "tokens": tokens,
+        "indptr": np.concatenate([[0], np.cumsum(largos)]),
+        "indices": indices.astype("int32")
+    }
+
+
+# =====================================================
+# FLAGS CONFIGURABLES
+# =====================================================
+
+def cualquiera_por_categoria(mascara_tokens: np.ndarray, voc: dict) -> np.ndarray:
+    """
+    Por categoría: ¿alguno de sus tokens cumple la máscara?
+    """
+
+    por_token = mascara_tokens[voc["indices"]].astype("int64")
+
+    # Suma acumulada en lugar de reduceat: las listas vacías quedan en 0
+    acumulado = np.concatenate([[0], np.cumsum(por_token)])
+
+    return acumulado[voc["indptr"][1:]] > acumulado[voc["indptr"][:-1]]
+
+
+def flags_amenities(serie: pd.Series, flags: dict) -> dict:
+    """
+    {flag: [textos]} → {flag: array bool por fila}.
+    Un flag es True si algún token contiene alguno de sus textos.
+    Cada flag cuesta una pasada sobre el vocabulario, no sobre las filas.
+    """
+
+    voc = vocabulario(serie)
+    codigos = serie.cat.codes.to_numpy()
+    tokens = pd.Series(voc["tokens"], dtype=object)
+
+    resultado = {}
+
+    for nombre, textos in flags.items():
+        patron = "|".join(re.escape(texto.lower()) for texto in textos)
+        mascara = tokens.str.contains(patron, regex=True).to_numpy(dtype=bool)
+
+        por_categoria = np.append(cualquiera_por_categoria(mascara, voc), False)
+
+        # El código -1 (nulo) apunta al False agregado al final
+        resultado[nombre] = por_categoria[codigos]
+
+    return resultado
+
+
+# =====================================================
+# BRIDGE LISTING ↔ AMENITY
+# =====================================================
+
+def pares_amenities(ids: pd.Series, serie: pd.Series) -> pd.DataFrame:
+    """
+    Formato largo (listing_id, amenity_name) para el bridge, sin recorrer
+    el texto: se repiten los códigos de la lista de cada fila.
+    """
+
+    voc = vocabulario(serie)
+    codigos = serie.cat.codes.to_numpy()
+
+    validas = codigos >= 0
+    codigos = codigos[validas]
+    ids = ids.to_numpy(dtype="int64")[validas]
+
+    inicios = voc["indptr"][codigos]
+    largos = voc["indptr"][codigos + 1] - inicios
+
+    # Posición de cada par dentro de `indices`: inicio de su fila + desplazamiento
+    desplazamientos = np.arange(largos.sum()) - np.repeat(np.cumsum(largos) - largos, largos)
+    posiciones = np.repeat(inicios, largos) + desplazamientos
+
+    return pd.DataFrame({
+        "listing_id": np.repeat(ids, largos),
+        "amenity_name": voc["tokens"][voc["indices"][posiciones]]
+    })
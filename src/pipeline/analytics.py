@@ -0,0 +1,228 @@
+import hashlib
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.config_loader import get_config
+from src.utils.metrics import instrument
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+# =====================================================
+# REPORTES EN MEMORIA (equivalentes a sql/0*.sql)
+# =====================================================
+#
+# Se calculan sobre el frame de transformar_listings() (un snapshot) con
+# groupby/transform vectorizados. Mismas columnas y reglas que las
+# consultas SQL, así ambas versiones se pueden contrastar.
+
+def pricing_intelligence(df: pd.DataFrame, top: int = None) -> pd.DataFrame:
+    """
+    01_pricing_intelligence.sql: precio vs promedio de listings similares
+    (mismo barrio y tipo de habitación).
+    """
+
+    df = df[df["price"].notna()]
+
+    market_average = df.groupby(["neighbourhood", "room_type"], observed=True)["price"].transform("mean")
+
+    diferencia = np.where(
+        market_average == 0,
+        0.0,
+        (df["price"] - market_average) / market_average * 100
+    )
+
+    reporte = pd.DataFrame({
+        "listing_id": df["id"].to_numpy(),
+        "current_price": df["price"].to_numpy(),
+        "market_average": market_average.to_numpy(),
+        "price_difference_pct": diferencia
+    })
+
+    reporte["recommendation"] = np.select(
+        [diferencia <= -20, diferencia >= 20],
+        ["underpriced", "overpriced"],
+        default="fair"
+    )
+
+    return ordenar(reporte, "price_difference_pct", top)
+
+
+def host_performance(df: pd.DataFrame, top: int = None) -> pd.DataFrame:
+    """
+    02_host_performance.sql: score compuesto y ranking de hosts.
+    """
+
+    metricas = df.assign(
+        revenue=df["price"] * df["availability_365"],
+        rpm=df["reviews_per_month"].fillna(0)
+    ).groupby(["host_id", "host_name"], observed=True, sort=False).agg(
+        revenue_potential=("revenue", "sum"),
+        total_reviews=("number_of_reviews", "sum"),
+        avg_reviews_per_month=("rpm", "mean"),
+        portfolio_size=("calculated_host_listings_count", "max")
+    ).reset_index()
+
+    metricas["performance_score"] = (
+        metricas["revenue_potential"] * 0.4
+        + metricas["total_reviews"] * 0.3
+        + metricas["avg_reviews_per_month"] * 0.2
+        + metricas["portfolio_size"] * 0.1
+    )
+
+    # RANK() de SQL: empates comparten puesto y dejan hueco
+    metricas["ranking"] = metricas["performance_score"].rank(method="min", ascending=False).astype("int64")
+
+    reporte = metricas[[
+        "host_id",
+        "host_name",
+        "performance_score",
+        "ranking",
+        "revenue_potential",
+        "total_reviews",
+        "avg_reviews_per_month",
+        "portfolio_size"
+    ]]
+
+    return ordenar(reporte, "performance_score", top)
+
+
+def market_opportunities(df: pd.DataFrame, top: int = None) -> pd.DataFrame:
+    """
+    03_market_opportunities.sql: demanda vs oferta por barrio.
+    """
+
+    metricas = df.assign(rpm=df["reviews_per_month"].fillna(0)).groupby(
+        "neighbourhood", observed=True, sort=False
+    ).agg(
+        total_listings=("id", "size"),
+        avg_reviews_per_month=("rpm", "mean"),
+        total_reviews=("number_of_reviews", "sum"),
+        availability_sum=("availability_365", "sum")
+    ).reset_index()
+
+    # AVG sobre INT en SQL Server trunca
+    avg_availability = metricas["availability_sum"] // metricas["total_listings"]
+
+    demand = metricas["avg_reviews_per_month"] * 0.6 + metricas["total_reviews"] * 0.4
+    supply = metricas["total_listings"] * 0.5 + avg_availability * 0.5
+    oportunidad = demand - supply
+
+    reporte = pd.DataFrame({
+        "neighbourhood": metricas["neighbourhood"].astype(str),
+        "demand_score": demand,
+        "supply_score": supply,
+        "opportunity_score": oportunidad,
+        "recommended_action": np.select(
+            [oportunidad > 50, oportunidad > 0],
+            ["High-priority expansion area", "Moderate opportunity"],
+            default="Low opportunity"
+        )
+    })
+
+    return ordenar(reporte, "opportunity_score", top)
+
+
+def ordenar(reporte: pd.DataFrame, columna: str, top: int = None) -> pd.DataFrame:
+    """
+    Orden descendente; con `top` selección parcial (nlargest) en lugar
+    de ordenar todo el reporte.
+    """
+
+    if top is not None:
+        return reporte.nlargest(top, columna).reset_index(drop=True)
+
+    return reporte.sort_values(columna, ascending=False, kind="stable").reset_index(drop=True)
+
+
+REPORTES = {
+    "pricing_intelligence": pricing_intelligence,
+    "host_performance": host_performance,
+    "market_opportunities": market_opportunities
+}
+
+COLUMNAS_ANALYTICS = [
+    "id",
+    "host_id",
+    "host_name",
+    "neighbourhood",
+    "room_type",
+    "price",
+    "availability_365",
+    "number_of_reviews",
+    "reviews_per_month",
+    "calculated_host_listings_count"
+]
+
+
+# =====================================================
+# CACHÉ POR SNAPSHOT (PARQUET)
+# =====================================================
+
+def get_analytics_dir() -> Path:
+
+    return PROJECT_ROOT / get_config()["analytics"]["path"]
+
+
+def huella_snapshot(df: pd.DataFrame) -> str:
+    """
+    Hash del contenido que consumen los reportes: mismo snapshot → misma huella.
+    """
+
+    hashes = pd.util.hash_pandas_object(df[COLUMNAS_ANALYTICS], index=False).to_numpy()
+
+    return hashlib.blake2b(hashes.tobytes(), digest_size=8).hexdigest()
+
+
+def directorio_snapshot(snapshot: str, huella: str) -> Path:
+
+    return get_analytics_dir() / f"{snapshot}_{huella}"
+
+
+def cargar_reportes(directorio: Path) -> dict:
+
+    return {nombre: pd.read_parquet(directorio / f"{nombre}.parquet") for nombre in REPORTES}
+
+
+@instrument("analytics")
+def generar_reportes(df: pd.DataFrame, snapshot: str = None) -> dict:
+    """
+    Los tres reportes del snapshot. Si ya se calcularon para este mismo
+    contenido se leen del Parquet en output/analytics/<snapshot>_<huella>/.
+    """
+
+    snapshot = snapshot or date.today().isoformat()
+    directorio = directorio_snapshot(snapshot, huella_snapshot(df))
+
+    if all((directorio / f"{nombre}.parquet").exists() for nombre in REPORTES):
+        return cargar_reportes(directorio)
+
+    top = get_config()["analytics"].get("top")
+
+    reportes = {nombre: funcion(df, top) for nombre, funcion in REPORTES.items()}
+
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    for nombre, reporte in reportes.items():
+        ruta_tmp = directorio / f"{nombre}.tmp.parquet"
+        reporte.to_parquet(ruta_tmp, index=False)
+        ruta_tmp.replace(directorio / f"{nombre}.parquet")
+
+    return reportes
+
+
+def ultimo_snapshot() -> dict:
+    """
+    Reportes del snapshot más reciente ya calculado (sin recalcular nada).
+    """
+
+    directorios = sorted(p for p in get_analytics_dir().glob("*_*") if p.is_dir())
+
+    if not directorios:
+        raise FileNotFoundError(f"No hay reportes en {get_analytics_dir()}")
+
+    return cargar_reportes(directorios[-1])
@@ -0,0 +1,348 @@
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.warehouse import get_warehouse
+from src.utils.config_loader import get_config
+from src.utils.logger import get_logger
+from src.utils.metrics import instrument
+
+
+logger = get_logger()
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+# =====================================================
+# COLUMNAS → VALORES PYTHON POR LOTE
+# =====================================================
+
+def preparar_columna(serie: pd.Series):
+    """
+    Devuelve una función (inicio, fin) → lista de valores Python.
+    Sólo se convierte a objetos Python el rango del lote actual;
+    la columna completa sigue en su buffer NumPy.
+    """
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = np.append(np.asarray(serie.cat.categories, dtype=object), None)
+        codigos = serie.cat.codes.to_numpy()
+
+        # El código -1 (nulo) apunta al None agregado al final
+        return lambda inicio, fin: categorias[codigos[inicio:fin]].tolist()
+
+    if serie.dtype.kind == "f":
+        valores = serie.to_numpy()
+
+        def extraer_float(inicio, fin):
+            lote = valores[inicio:fin]
+            lista = lote.tolist()
+
+            for k in np.flatnonzero(np.isnan(lote)):
+                lista[k] = None
+
+            return lista
+
+        return extraer_float
+
+    if serie.dtype.kind in "iub":
+        valores = serie.to_numpy()
+        return lambda inicio, fin: valores[inicio:fin].tolist()
+
+    def extraer_objeto(inicio, fin):
+        lote = serie.iloc[inicio:fin]
+        return lote.astype(object).where(lote.notna(), None).tolist()
+
+    return extraer_objeto
+
+
+def iterar_lotes(df: pd.DataFrame, config: dict, ejecutar_lote):
+    """
+    Recorre el DataFrame en lotes de filas ajustando el tamaño del lote
+    para que cada round trip tarde ~target_batch_seconds.
+    """
+
+    columnas = [preparar_columna(df[col]) for col in df.columns]
+
+    tamano = config["batch_size"]
+    inicio = 0
+
+    while inicio < len(df):
+        fin = min(inicio + tamano, len(df))
+        filas = list(zip(*(extraer(inicio, fin) for extraer in columnas)))
+
+        t0 = time.perf_counter()
+        ejecutar_lote(filas)
+        duracion = max(time.perf_counter() - t0, 1e-6)
+
+        # Lote adaptativo: escala según el tiempo observado, dentro de los límites
+        tamano = int(tamano * config["target_batch_seconds"] / duracion)
+        tamano = max(config["min_batch_size"], min(config["max_batch_size"], tamano))
+
+        inicio = fin
+
+
+# =====================================================
+# BACKEND: EXECUTEMANY CON BUFFERS TIPADOS
+# =====================================================
+
+def largo_maximo_texto(serie: pd.Series) -> int:
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        valores = pd.Series(serie.cat.categories.astype(str))
+    else:
+        valores = serie.dropna().astype(str)
+
+    return max(int(valores.str.len().max()), 1) if len(valores) else 1
+
+
+# Tipos SQL de ODBC (sql.h / sqlext.h): los mismos valores que
+# pyodbc.SQL_*, sin importar pyodbc (el warehouse embebido no lo necesita)
+SQL_BIT = -7
+SQL_BIGINT = -5
+SQL_INTEGER = 4
+SQL_DOUBLE = 8
+SQL_WVARCHAR = -9
+
+
+def tipo_sql(serie: pd.Series) -> tuple:
+    """
+    Tipo ODBC para setinputsizes: el driver reserva buffers del tamaño
+    justo en lugar de inferir el tipo a partir de la primera fila.
+    """
+
+    if serie.dtype.kind == "b":
+        return (SQL_BIT, 0, 0)
+
+    if serie.dtype.kind in "iu":
+        if serie.dtype.itemsize >= 8:
+            return (SQL_BIGINT, 0, 0)
+        return (SQL_INTEGER, 0, 0)
+
+    if serie.dtype.kind == "f":
+        return (SQL_DOUBLE, 0, 0)
+
+    return (SQL_WVARCHAR, largo_maximo_texto(serie), 0)
+
+
+def insertar_executemany(cursor, df: pd.DataFrame, tabla_temp: str, config: dict):
+
+    cols = ",".join(df.columns)
+    placeholders = ",".join(["?"] * len(df.columns))
+
+    query = f"INSERT INTO {tabla_temp} ({cols}) VALUES ({placeholders})"
+
+    tipos = [tipo_sql(df[col]) for col in df.columns]
+
+    cursor.fast_executemany = True
+
+    def ejecutar_lote(filas):
+        cursor.setinputsizes(tipos)
+        cursor.executemany(query, filas)
+
+    iterar_lotes(df, config, ejecutar_lote)
+
+
+# =====================================================
+# BACKEND: TABLE-VALUED PARAMETERS
+# =====================================================
+
+def insertar_tvp(cursor, df: pd.DataFrame, tabla_temp: str, config: dict):
+    """
+    Un lote completo viaja como un único parámetro de tabla.
+    Requiere los TYPE ... AS TABLE de sql/schema.sql (dw.<tabla>_type).
+    """
+
+    esquema = get_config()["warehouse"]["schema"]
+
+    # "##host_stage__a1b2c3d4" (staging en paralelo) usa el mismo tipo que "#host_stage"
+    tipo_tabla = f"{tabla_temp.lstrip('#').split('__')[0]}_type"
+    cols = ",".join(df.columns)
+
+    query = f"INSERT INTO {tabla_temp} ({cols}) SELECT {cols} FROM ?"
+
+    def ejecutar_lote(filas):
+        cursor.execute(query, ([tipo_tabla, esquema] + filas,))
+
+    iterar_lotes(df, config, ejecutar_lote)
+
+
+# =====================================================
+# BACKEND: SQLITE (WAREHOUSE EMBEBIDO)
+# =====================================================
+
+def insertar_sqlite(cursor, df: pd.DataFrame, tabla_temp: str, config: dict):
+
+    cols = ",".join(df.columns)
+    placeholders = ",".join(["?"] * len(df.columns))
+
+    query = f"INSERT INTO {tabla_temp} ({cols}) VALUES ({placeholders})"
+
+    iterar_lotes(df, config, lambda filas: cursor.executemany(query, filas))
+
+
+# =====================================================
+# BACKEND: ARCHIVO BCP NATIVO + BULK INSERT
+# =====================================================
+
+# Tipo de dato del archivo nativo y largo fijo (None = largo variable).
+# Claves en minúsculas: "Int32" / "Float64" / "boolean" (nullables de
+# pandas) usan el mismo formato que su dtype NumPy. tinyint de SQL Server
+# no tiene signo: int8 viaja como smallint.
+FORMATO_NATIVO = {
+    "int64": ("SQLBIGINT", "<q", 8),
+    "uint32": ("SQLBIGINT", "<q", 8),
+    "int32": ("SQLINT", "<i", 4),
+    "uint16": ("SQLINT", "<i", 4),
+    "int16": ("SQLSMALLINT", "<h", 2),
+    "int8": ("SQLSMALLINT", "<h", 2),
+    "uint8": ("SQLTINYINT", "<B", 1),
+    "float64": ("SQLFLT8", "<d", 8),
+    "float32": ("SQLFLT4", "<f", 4),
+    "bool": ("SQLBIT", "<?", 1),
+    "boolean": ("SQLBIT", "<?", 1)
+}
+
+
+def formato_columna(serie: pd.Series) -> tuple:
+
+    return FORMATO_NATIVO.get(str(serie.dtype).lower(), ("SQLNCHAR", None, None))
+
+
+def codificar_columna_nativa(serie: pd.Series, inicio: int, fin: int) -> list:
+    """
+    Codifica un rango de la columna en formato nativo de bcp.
+    Largo fijo: prefijo de 1 byte con el largo, vectorizado con NumPy;
+    un NULL es sólo el prefijo 0xFF, sin bytes de valor.
+    NCHAR: prefijo de 2 bytes con el largo en bytes UTF-16LE (0xFFFF = NULL).
+    """
+
+    _, formato, largo = formato_columna(serie)
+
+    if largo is not None:
+        lote = serie.iloc[inicio:fin]
+        registros = np.empty(len(lote), dtype=[("prefijo", "u1"), ("valor", formato)])
+
+        nulos = lote.isna().to_numpy()
+        registros["prefijo"] = largo
+        registros["valor"] = lote.to_numpy(dtype=registros.dtype["valor"], na_value=0)
+
+        buffer = registros.tobytes()
+        ancho = 1 + largo
+
+        return [
+            b"\xff" if nulo else buffer[k * ancho:(k + 1) * ancho]
+            for k, nulo in enumerate(nulos)
+        ]
+
+    codificados = []
+
+    for valor in preparar_columna(serie)(inicio, fin):
+        if valor is None:
+            codificados.append(b"\xff\xff")
+        else:
+            datos = str(valor).encode("utf-16-le")
+            codificados.append(struct.pack("<H", len(datos)) + datos)
+
+    return codificados
+
+
+def escribir_formato_bcp(df: pd.DataFrame, ruta_formato: Path):
+    """
+    Archivo de formato no-XML (bcp -n) que describe el archivo de datos.
+    """
+
+    lineas = ["14.0", str(len(df.columns))]
+
+    for orden, col in enumerate(df.columns, start=1):
+        tipo, _, largo = formato_columna(df[col])
+
+        if largo is None:
+            lineas.append(f'{orden} {tipo} 2 0 "" {orden} {col} ""')
+        else:
+            lineas.append(f'{orden} {tipo} 1 {largo} "" {orden} {col} ""')
+
+    ruta_formato.write_text("\n".join(lineas) + "\n", encoding="ascii")
+
+
+def escribir_archivo_bcp(df: pd.DataFrame, ruta_datos: Path, config: dict):
+    """
+    Escribe el archivo nativo lote a lote: en memoria sólo vive el lote actual.
+    """
+
+    with open(ruta_datos, "wb") as f:
+        for inicio in range(0, len(df), config["batch_size"]):
+            fin = min(inicio + config["batch_size"], len(df))
+            columnas = [codificar_columna_nativa(df[col], inicio, fin) for col in df.columns]
+
+            f.writelines(b"".join(campos) for campos in zip(*columnas))
+
+
+def insertar_bcp(cursor, df: pd.DataFrame, tabla_temp: str, config: dict):
+    """
+    Genera archivo nativo + formato y los carga con BULK INSERT en la misma
+    sesión (las tablas #temp no son visibles para el ejecutable bcp).
+    `bcp_path` debe ser accesible también desde el servidor SQL.
+    """
+
+    directorio = PROJECT_ROOT / config["bcp_path"]
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    nombre = tabla_temp.lstrip("#")
+    ruta_datos = directorio / f"{nombre}.dat"
+    ruta_formato = directorio / f"{nombre}.fmt"
+
+    escribir_formato_bcp(df, ruta_formato)
+    escribir_archivo_bcp(df, ruta_datos, config)
+
+    cursor.execute(f"""
+    BULK INSERT {tabla_temp}
+    FROM '{ruta_datos}'
+    WITH (
+        FORMATFILE = '{ruta_formato}',
+        BATCHSIZE = {config["max_batch_size"]},
+        TABLOCK
+    );
+    """)
+
+
+# =====================================================
+# INTERFAZ PÚBLICA
+# =====================================================
+
+BACKENDS = {
+    "executemany": insertar_executemany,
+    "tvp": insertar_tvp,
+    "bcp": insertar_bcp,
+    "sqlite": insertar_sqlite
+}
+
+
+@instrument("load.cargar_masivo")
+def cargar_masivo(cursor, df: pd.DataFrame, tabla_temp: str):
+    """
+    Inserta el DataFrame en la tabla de staging con el backend configurado
+    (load.backend en config.yaml) y registra el throughput.
+    """
+
+    config = get_config()["load"]
+
+    # El warehouse embebido impone su propio backend; SQL Server usa load.backend
+    backend = get_warehouse()["carga_masiva"] or config["backend"]
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de carga desconocido: {backend}")
+
+    t0 = time.perf_counter()
+
+    BACKENDS[backend](cursor, df, tabla_temp, config)
+
+    duracion = max(time.perf_counter() - t0, 1e-6)
+
+    logger.info(
+        f"Carga {tabla_temp} [{backend}] — filas: {len(df)}, "
+        f"{duracion:.2f}s, {len(df) / duracion:,.0f} filas/s"
+    )
@@ -0,0 +1,379 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import src.pipeline.amenities as amenities
+import src.pipeline.cuarentena as cuarentena
+import src.pipeline.espacial as espacial
+import src.pipeline.extract as extract
+import src.pipeline.memoria as memoria
+import src.pipeline.transform as transform
+import src.pipeline.validate as validate
+import src.utils.columnar_cache as columnar_cache
+from src.utils.config_loader import get_config
+from src.utils.logger import get_logger
+from src.utils.metrics import measure
+
+
+logger = get_logger()
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+# =====================================================
+# CHECKPOINTS POR ETAPA (MODO BATCH)
+# =====================================================
+#
+# La salida de cada etapa (extract, validate, transform) se guarda como
+# Arrow IPC en output/checkpoints/<etapa>-<clave>/. La clave encadena:
+#
+#   clave de la etapa anterior (o huella del archivo de entrada)
+#   + hash del código de los módulos de la etapa
+#   + hash de las secciones de config.yaml que la etapa lee
+#
+# Si la carga falla, la siguiente ejecución retoma desde el último
+# checkpoint válido (normalmente el de transform) sin volver a parsear,
+# validar ni transformar. Un cambio de datos, código o configuración
+# cambia la clave de esa etapa y de todas las siguientes.
+#
+# Los archivos que una etapa deja fuera del frame (el reporte de
+# calidad y la partición de cuarentena de validate) se guardan en el
+# mismo checkpoint y se restauran al saltarla.
+
+ARCHIVO_DATOS = "datos.arrow"
+ARCHIVO_ARTEFACTOS = "artefactos.json"
+
+
+def get_checkpoints_dir() -> Path:
+
+    return PROJECT_ROOT / get_config()["checkpoints"]["path"]
+
+
+def etapa(nombre: str, funcion, modulos: list, secciones: list, extra=None, artefactos=None) -> dict:
+    """
+    `funcion`: frame de entrada → frame de salida (None en la primera etapa).
+    `modulos` / `secciones`: código y config que invalidan el checkpoint.
+    `extra`: cualquier otro valor que forme parte de la clave.
+    `artefactos`: callable → rutas de archivos o directorios que la etapa
+    escribe aparte; se llama después de correrla.
+    """
+
+    return {
+        "nombre": nombre,
+        "funcion": funcion,
+        "modulos": modulos,
+        "secciones": secciones,
+        "extra": extra,
+        "artefactos": artefactos or (lambda: [])
+    }
+
+
+def hash_etapa(etapa: dict) -> str:
+    """
+    Hash del código fuente de los módulos y de la config de la etapa.
+    """
+
+    config = get_config()
+    resultado = hashlib.blake2b(digest_size=16)
+
+    for modulo in etapa["modulos"]:
+        resultado.update(Path(modulo.__file__).read_bytes())
+
+    secciones = {seccion: config.get(seccion) for seccion in etapa["secciones"]}
+
+    resultado.update(json.dumps(secciones, sort_keys=True, default=str).encode("utf-8"))
+    resultado.update(repr(etapa["extra"]).encode("utf-8"))
+
+    return resultado.hexdigest()
+
+
+def claves_etapas(etapas: list, huella_entrada: str) -> list:
+
+    claves = []
+    anterior = huella_entrada
+
+    for e in etapas:
+        anterior = hashlib.blake2b(
+            f"{anterior}:{e['nombre']}:{hash_etapa(e)}".encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        claves.append(anterior)
+
+    return claves
+
+
+def directorio_checkpoint(nombre: str, clave: str) -> Path:
+
+    return get_checkpoints_dir() / f"{nombre}-{clave}"
+
+
+def es_valido(directorio: Path) -> bool:
+    """
+    datos.arrow se escribe último: si existe, el checkpoint está completo.
+    """
+
+    return (directorio / ARCHIVO_DATOS).exists()
+
+
+def ultimo_uso(directorio: Path) -> float:
+    """
+    mtime de datos.arrow: se escribe al guardar y se toca al restaurar.
+    Un checkpoint incompleto cuenta desde la creación del directorio.
+    """
+
+    datos = directorio / ARCHIVO_DATOS
+
+    return (datos if datos.exists() else directorio).stat().st_mtime
+
+
+# =====================================================
+# LECTURA / ESCRITURA
+# =====================================================
+
+def copiar(origen: Path, destino: Path):
+
+    if origen.is_dir():
+        shutil.copytree(origen, destino, dirs_exist_ok=True)
+    else:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(origen, destino)
+
+
+def artefactos_guardados(directorio: Path) -> list:
+    """
+    Rutas originales de los artefactos de un checkpoint.
+    """
+
+    manifiesto = directorio / ARCHIVO_ARTEFACTOS
+
+    if not manifiesto.exists():
+        return []
+
+    return [Path(ruta) for ruta in json.loads(manifiesto.read_text(encoding="utf-8"))]
+
+
+def guardar_checkpoint(directorio: Path, df: pd.DataFrame, artefactos: list):
+    """
+    Artefactos primero (copia + manifiesto con la ruta original), datos al
+    final (escritura atómica de columnar_cache).
+    """
+
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    guardados = [ruta for ruta in artefactos if ruta.exists()]
+
+    for ruta in guardados:
+        copiar(ruta, directorio / ruta.name)
+
+    (directorio / ARCHIVO_ARTEFACTOS).write_text(
+        json.dumps([str(ruta) for ruta in guardados]), encoding="utf-8"
+    )
+
+    # Con el índice: la etapa siguiente recibe exactamente el mismo frame
+    columnar_cache.write_cache(df, directorio / ARCHIVO_DATOS, preserve_index=None)
+
+
+def restaurar_checkpoint(directorio: Path) -> pd.DataFrame:
+
+    for ruta in artefactos_guardados(directorio):
+        copiar(directorio / ruta.name, ruta)
+
+    # Uso reciente (LRU): el GC borra primero los que hace más que no se usan
+    os.utime(directorio / ARCHIVO_DATOS)
+
+    return columnar_cache.read_cache(directorio / ARCHIVO_DATOS)
+
+
+def tamano_directorio(directorio: Path) -> int:
+
+    return sum(p.stat().st_size for p in directorio.rglob("*") if p.is_file())
+
+
+def podar_checkpoints(max_age_hours: float = None, max_size_mb: float = None, protegidos=()):
+    """
+    Borra los checkpoints sin usar hace más de max_age_hours y después los
+    usados menos recientemente hasta que el total quede bajo max_size_mb.
+    Los `protegidos` (los de la ejecución en curso) nunca se borran, aunque
+    solos superen max_size_mb.
+    """
+
+    config = get_config()["checkpoints"]
+
+    if max_age_hours is None:
+        max_age_hours = config["max_age_hours"]
+
+    if max_size_mb is None:
+        max_size_mb = config["max_size_mb"]
+
+    raiz = get_checkpoints_dir()
+
+    if not raiz.exists():
+        return
+
+    ahora = time.time()
+    protegidos = {Path(p) for p in protegidos}
+
+    # Usados más recientemente primero
+    directorios = sorted(
+        (p for p in raiz.iterdir() if p.is_dir() and p not in protegidos),
+        key=ultimo_uso,
+        reverse=True
+    )
+
+    conservados = []
+
+    for directorio in directorios:
+        if ahora - ultimo_uso(directorio) > max_age_hours * 3600:
+            shutil.rmtree(directorio, ignore_errors=True)
+        else:
+            conservados.append(directorio)
+
+    # Los protegidos ocupan lugar en el límite pero no se borran
+    total = sum(tamano_directorio(p) for p in protegidos if p.exists())
+    limite = max_size_mb * 1024 * 1024
+
+    for directorio in conservados:
+        total += tamano_directorio(directorio)
+
+        if total > limite:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+# =====================================================
+# EJECUCIÓN
+# =====================================================
+
+def ejecutar_etapas(etapas: list, huella_entrada: str, forzar: bool = False) -> pd.DataFrame:
+    """
+    Corre las etapas en orden retomando desde el último checkpoint válido.
+    Con `forzar` se recalcula todo (y se reemplazan los checkpoints).
+    """
+
+    config = get_config()["checkpoints"]
+
+    if not config["enabled"]:
+        df = None
+
+        for e in etapas:
+            df = e["funcion"](df)
+
+        return df
+
+    claves = claves_etapas(etapas, huella_entrada)
+
+    inicio = 0
+
+    if not forzar:
+        inicio = next(
+            (i + 1 for i in reversed(range(len(etapas)))
+             if es_valido(directorio_checkpoint(etapas[i]["nombre"], claves[i]))),
+            0
+        )
+
+    df = None
+
+    # Artefactos acumulados: el checkpoint de una etapa lleva también los
+    # de las anteriores, así retomar desde él los restaura todos
+    artefactos = []
+
+    if inicio:
+        ultima = etapas[inicio - 1]["nombre"]
+        directorio = directorio_checkpoint(ultima, claves[inicio - 1])
+
+        with measure(f"checkpoint.{ultima}") as m:
+            df = restaurar_checkpoint(directorio)
+            m["rows_out"] = len(df)
+
+        artefactos = artefactos_guardados(directorio)
+
+        logger.info(f"Checkpoint {ultima} reutilizado ({len(df)} filas) — etapas omitidas: {inicio}")
+
+    for i, e in enumerate(etapas[inicio:], start=inicio):
+        df = e["funcion"](df)
+        artefactos = artefactos + e["artefactos"]()
+
+        # Se guarda al terminar cada etapa: un fallo en la siguiente no la repite
+        with measure(f"checkpoint.guardar.{e['nombre']}", rows_in=len(df)):
+            guardar_checkpoint(directorio_checkpoint(e["nombre"], claves[i]), df, artefactos)
+
+    # Los checkpoints de esta ejecución (escritos, restaurados u omitidos
+    # por estar ya vigentes) quedan fuera de la poda
+    podar_checkpoints(protegidos=[
+        directorio_checkpoint(e["nombre"], clave) for e, clave in zip(etapas, claves)
+    ])
+
+    return df
+
+
+# =====================================================
+# ETAPAS DEL MODO BATCH (UN ARCHIVO)
+# =====================================================
+
+def artefactos_validacion() -> list:
+    """
+    Reporte de calidad y la partición de cuarentena que ese reporte cita.
+    """
+
+    reporte = validate.OUTPUT_PATH / "data_quality_report.json"
+
+    if not reporte.exists():
+        return []
+
+    cuarentena_validacion = json.loads(reporte.read_text(encoding="utf-8")).get("cuarentena")
+
+    if cuarentena_validacion is None:
+        return [reporte]
+
+    return [reporte, Path(cuarentena_validacion["ruta"])]
+
+
+def etapas_listings(path: Path, columnas_salida: list = None, compacta: bool = False) -> list:
+    """
+    extract → validate → transform de un archivo de listings. Con
+    `compacta` cada etapa termina con el frame compactado (memoria.py).
+    """
+
+    etapas = [
+        etapa(
+            "extract",
+            lambda _: extract.extract_listings(path),
+            [extract, columnar_cache],
+            ["schema"]
+        ),
+        etapa(
+            "validate",
+            validate.ejecutar_validaciones_listings,
+            [validate, cuarentena],
+            ["validation"],
+            artefactos=artefactos_validacion
+        ),
+        etapa(
+            "transform",
+            lambda df: transform.transformar_listings(df, columnas_salida=columnas_salida),
+            [transform, amenities, espacial],
+            ["location", "amenities"],
+            extra=columnas_salida
+        )
+    ]
+
+    if compacta:
+        for e in etapas:
+            e["funcion"] = memoria.compactar_etapa(e["nombre"], e["funcion"])
+            e["modulos"] = e["modulos"] + [memoria]
+            e["secciones"] = e["secciones"] + ["memory"]
+            e["extra"] = (e["extra"], "compacta")
+
+    return etapas
+
+
+def huella_archivo(path: Path) -> str:
+    """
+    Tamaño + mtime + hash del contenido (la misma huella de la caché columnar).
+    """
+
+    return columnar_cache.fingerprint(Path(path), {})
@@ -0,0 +1,150 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import src.pipeline.validate as validate
+from src.pipeline.extract import extract_listings
+from src.pipeline.load import COLUMNAS_CARGA
+from src.pipeline.transform import es_categorica, transformar_listings
+from src.utils.logger import get_logger
+from src.utils.metrics import export_steps, merge_steps, start_run
+
+
+logger = get_logger()
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+# =====================================================
+# ARCHIVOS DE ENTRADA
+# =====================================================
+
+def resolver_archivos(origen: str) -> list:
+    """
+    Directorio (todos sus .csv / .csv.gz) o patrón glob → archivos ordenados.
+    Rutas relativas respecto de la raíz del proyecto.
+    """
+
+    ruta = Path(origen)
+
+    if not ruta.is_absolute():
+        ruta = PROJECT_ROOT / ruta
+
+    if ruta.is_dir():
+        archivos = list(ruta.glob("*.csv")) + list(ruta.glob("*.csv.gz"))
+    else:
+        archivos = [Path(p) for p in glob.glob(str(ruta))]
+
+    if not archivos:
+        raise FileNotFoundError(f"No hay archivos de listings en {origen}")
+
+    return sorted(archivos)
+
+
+def nombre_ciudad(ruta: Path) -> str:
+    """
+    data/ciudades/madrid.csv → madrid; data/madrid/listings.csv.gz → madrid.
+    """
+
+    nombre = ruta.name.split(".")[0]
+
+    if nombre == "listings":
+        return ruta.parent.name
+
+    return nombre
+
+
+# =====================================================
+# WORKER: EXTRACT → VALIDATE → TRANSFORM DE UNA CIUDAD
+# =====================================================
+
+def procesar_ciudad(ruta: Path, ciudad: str, directorio: Path):
+    """
+    Corre en un proceso del pool. Devuelve (frame listo para la carga,
+    métricas de calidad, métricas por etapa del worker).
+    """
+
+    # Métricas propias del worker (con fork heredaría las del proceso padre)
+    start_run()
+
+    df = extract_listings(ruta)
+    df["market"] = pd.Categorical.from_codes(np.zeros(len(df), dtype="int8"), categories=[ciudad])
+
+    df, calidad = validate.validar_listings(df, directorio)
+    df = transformar_listings(df, columnas_salida=COLUMNAS_CARGA)
+
+    return df, calidad, export_steps()
+
+
+def combinar_ciudades(frames: list) -> pd.DataFrame:
+    """
+    Concatena los frames de cada ciudad. Las categóricas se unifican
+    antes: con categorías distintas pd.concat las convertiría a object.
+    """
+
+    frames = list(frames)
+
+    for col in frames[0].columns:
+        if not all(es_categorica(f[col]) for f in frames):
+            continue
+
+        categorias = frames[0][col].cat.categories
+
+        for f in frames[1:]:
+            categorias = categorias.union(f[col].cat.categories)
+
+        frames = [f.assign(**{col: f[col].cat.set_categories(categorias)}) for f in frames]
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def procesar_ciudades(origen: str, workers: int = None) -> pd.DataFrame:
+    """
+    Un archivo por ciudad, cada uno en un proceso del pool. El resultado
+    es un único frame para una única carga transaccional. Cuarentena y
+    reporte de calidad quedan en output/ciudades/<ciudad>/; el reporte
+    general (output/data_quality_report.json) suma todas las ciudades.
+    """
+
+    archivos = resolver_archivos(origen)
+    ciudades = [nombre_ciudad(ruta) for ruta in archivos]
+
+    if len(set(ciudades)) != len(ciudades):
+        raise ValueError(f"Nombres de ciudad repetidos en {origen}: {ciudades}")
+
+    workers = min(workers or os.cpu_count() or 1, len(archivos))
+
+    logger.info(f"Multi-ciudad — {len(archivos)} archivos, {workers} procesos")
+
+    directorio = validate.OUTPUT_PATH / "ciudades"
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [
+            executor.submit(procesar_ciudad, ruta, ciudad, directorio / ciudad)
+            for ruta, ciudad in zip(archivos, ciudades)
+        ]
+
+        # result() relanza la excepción del worker: sin ciudades a medias
+        resultados = [futuro.result() for futuro in futuros]
+
+    frames = []
+    calidad = {}
+
+    for ciudad, (df, metricas, pasos) in zip(ciudades, resultados):
+        frames.append(df)
+        calidad[ciudad] = metricas
+
+        merge_steps(pasos, prefix=f"ciudades.{ciudad}.")
+
+        logger.info(
+            f"Ciudad {ciudad} — filas: {len(df)}, "
+            f"cuarentena: {metricas['registros_en_cuarentena']}"
+        )
+
+    validate.generar_reporte_calidad(validate.combinar_metricas(calidad))
+
+    return combinar_ciudades(frames)
@@ -0,0 +1,226 @@
+import queue
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils.config_loader import get_config
+from src.utils.metrics import measure
+
+
+# =====================================================
+# CUARENTENA ASÍNCRONA (PARQUET COMPRIMIDO)
+# =====================================================
+#
+# La validación entrega los registros rechazados a una cola y sigue; un
+# hilo escribe cada entrega como Parquet comprimido, particionado por
+# ejecución y por regla:
+#
+#   <directorio>/cuarentena/run=<id>/regla=<nombre>/part-00000.parquet
+#
+# La regla de la partición es la primera que falló (bit más bajo de
+# `motivos`); la columna `motivos` conserva todas. Con
+# validation.quarantine.max_rows_per_rule sólo se guardan las primeras N
+# filas completas de cada regla; el resto se cuenta pero no se escribe.
+
+DIRECTORIO_CUARENTENA = "cuarentena"
+
+FIN = object()
+
+
+def id_ejecucion() -> str:
+
+    return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+
+def regla_principal(motivos: np.ndarray, bits: dict) -> np.ndarray:
+    """
+    Nombre de la primera regla fallida de cada fila (bit más bajo).
+    """
+
+    nombres = np.empty(len(motivos), dtype=object)
+    pendientes = np.ones(len(motivos), dtype=bool)
+
+    for nombre, bit in sorted(bits.items(), key=lambda item: item[1]):
+        coincide = pendientes & ((motivos & bit) > 0)
+        nombres[coincide] = nombre
+        pendientes &= ~coincide
+
+    return nombres
+
+
+def a_tabla(df: pd.DataFrame) -> pa.Table:
+    """
+    Categóricas como valores: el diccionario de cada lote es distinto y
+    los archivos de una misma partición deben poder leerse juntos.
+    """
+
+    categoricas = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+
+    if categoricas:
+        df = df.astype({col: df[col].cat.categories.dtype for col in categoricas})
+
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def podar_ejecuciones(raiz: Path, conservar: int):
+    """
+    Borra las ejecuciones más antiguas; quedan las `conservar` más recientes.
+    """
+
+    ejecuciones = sorted(p for p in raiz.glob("run=*") if p.is_dir())
+
+    for antigua in ejecuciones[:max(len(ejecuciones) - conservar, 0)]:
+        shutil.rmtree(antigua, ignore_errors=True)
+
+
+# =====================================================
+# HILO ESCRITOR
+# =====================================================
+
+def escribir_entrega(escritor: dict, df_malos: pd.DataFrame):
+
+    config = escritor["config"]
+    tope = config.get("max_rows_per_rule")
+
+    reglas = regla_principal(df_malos["motivos"].to_numpy(), escritor["bits"])
+
+    for regla in pd.unique(reglas):
+        filas = df_malos[reglas == regla]
+
+        guardadas = escritor["filas_escritas"].get(regla, 0)
+
+        if tope is not None:
+            cupo = max(tope - guardadas, 0)
+            escritor["filas_omitidas"][regla] = escritor["filas_omitidas"].get(regla, 0) + max(len(filas) - cupo, 0)
+            filas = filas.iloc[:cupo]
+
+        if filas.empty:
+            continue
+
+        particion = escritor["ruta"] / f"regla={regla}"
+        particion.mkdir(parents=True, exist_ok=True)
+
+        numero = escritor["partes"].get(regla, 0)
+        escritor["partes"][regla] = numero + 1
+
+        pq.write_table(
+            a_tabla(filas),
+            particion / f"part-{numero:05d}.parquet",
+            compression=config["compression"]
+        )
+
+        escritor["filas_escritas"][regla] = guardadas + len(filas)
+
+
+def bucle_escritor(escritor: dict):
+
+    while True:
+        df_malos = escritor["cola"].get()
+
+        if df_malos is FIN:
+            return
+
+        # Tras un error se sigue vaciando la cola para no bloquear a la validación
+        if escritor["error"] is not None:
+            continue
+
+        try:
+            with measure("validate.cuarentena.escritura", rows_in=len(df_malos)):
+                escribir_entrega(escritor, df_malos)
+        except Exception as e:
+            escritor["error"] = e
+
+
+# =====================================================
+# INTERFAZ
+# =====================================================
+
+def abrir_cuarentena(directorio: Path, bits: dict) -> dict:
+    """
+    Inicia el hilo escritor de una ejecución. `bits`: nombre de regla → bit
+    de `motivos` (metricas["bits_motivos"]).
+    """
+
+    config = get_config()["validation"]["quarantine"]
+
+    raiz = directorio / DIRECTORIO_CUARENTENA
+    raiz.mkdir(parents=True, exist_ok=True)
+
+    podar_ejecuciones(raiz, max(config["keep_runs"] - 1, 0))
+
+    escritor = {
+        "config": config,
+        "bits": bits,
+        "ruta": raiz / f"run={id_ejecucion()}",
+        # Cola acotada: si el disco no da abasto la validación espera
+        # en lugar de acumular lotes rechazados en memoria
+        "cola": queue.Queue(maxsize=config["queue_size"]),
+        "filas_escritas": {},
+        "filas_omitidas": {},
+        "partes": {},
+        "error": None
+    }
+
+    escritor["hilo"] = threading.Thread(
+        target=bucle_escritor,
+        args=(escritor,),
+        name="escritor-cuarentena",
+        daemon=True
+    )
+    escritor["hilo"].start()
+
+    return escritor
+
+
+def enviar_cuarentena(escritor: dict, df_malos: pd.DataFrame):
+    """
+    Entrega los registros rechazados al hilo escritor (no espera la escritura).
+    """
+
+    if escritor["error"] is not None:
+        raise escritor["error"]
+
+    escritor["cola"].put(df_malos)
+
+
+def cerrar_cuarentena(escritor: dict) -> dict:
+    """
+    Espera a que se escriba todo lo entregado. Llamar antes de cerrar el
+    reporte de calidad; relanza el error del hilo escritor si lo hubo.
+    """
+
+    escritor["cola"].put(FIN)
+    escritor["hilo"].join()
+
+    if escritor["error"] is not None:
+        raise escritor["error"]
+
+    return {
+        "ruta": str(escritor["ruta"]),
+        "filas_escritas": escritor["filas_escritas"],
+        "filas_omitidas": escritor["filas_omitidas"]
+    }
+
+
+def leer_cuarentena(ruta) -> pd.DataFrame:
+    """
+    Todas las particiones de una ejecución (con la columna `regla`).
+    """
+
+    ruta = Path(ruta)
+
+    partes = [
+        pd.read_parquet(archivo).assign(regla=archivo.parent.name.split("=", 1)[1])
+        for archivo in sorted(ruta.glob("regla=*/part-*.parquet"))
+    ]
+
+    if not partes:
+        return pd.DataFrame()
+
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+
+# =====================================================
+# ÍNDICE ESPACIAL: CELDAS GEOHASH
+# =====================================================
+#
+# Cada coordenada se asigna a su celda geohash (precisión configurable en
+# location.geohash_precision). dim_location guarda una fila por celda y
+# barrio con el centro de la celda, en lugar de una por coordenada exacta.
+# Todo vectorizado: el texto de cada celda se arma una vez por celda
+# distinta, no una vez por fila.
+
+BASE32 = np.array(list("0123456789bcdefghjkmnpqrstuvwxyz"))
+VALOR_BASE32 = {caracter: valor for valor, caracter in enumerate(BASE32)}
+
+CELDA_DESCONOCIDA = "UNKNOWN"
+
+
+def bits_por_eje(precision: int) -> tuple:
+    """
+    5 bits por carácter, alternando longitud / latitud (empieza longitud).
+    """
+
+    if not 1 <= precision <= 12:
+        raise ValueError(f"Precisión geohash fuera de rango (1-12): {precision}")
+
+    bits = 5 * precision
+
+    return (bits + 1) // 2, bits // 2
+
+
+def cuantizar(valores: np.ndarray, minimo: float, maximo: float, bits: int) -> np.ndarray:
+
+    celdas = np.floor((valores - minimo) / (maximo - minimo) * (1 << bits))
+
+    return np.clip(celdas, 0, (1 << bits) - 1).astype("uint64")
+
+
+def codigos_geohash(lat: np.ndarray, lon: np.ndarray, precision: int) -> np.ndarray:
+    """
+    Geohash como entero de 5·precision bits (bits de lon y lat intercalados).
+    """
+
+    bits_lon, bits_lat = bits_por_eje(precision)
+
+    q_lon = cuantizar(lon, -180.0, 180.0, bits_lon)
+    q_lat = cuantizar(lat, -90.0, 90.0, bits_lat)
+
+    codigo = np.zeros(len(lat), dtype="uint64")
+
+    for k in range(bits_lon + bits_lat):
+        eje, restantes = (q_lon, bits_lon) if k % 2 == 0 else (q_lat, bits_lat)
+        bit = (eje >> np.uint64(restantes - 1 - k // 2)) & np.uint64(1)
+        codigo = (codigo << np.uint64(1)) | bit
+
+    return codigo
+
+
+def texto_geohash(codigos: np.ndarray, precision: int) -> np.ndarray:
+
+    caracteres = [
+        BASE32[((codigos >> np.uint64(5 * (precision - 1 - k))) & np.uint64(31)).astype("int64")]
+        for k in range(precision)
+    ]
+
+    return np.array(["".join(c) for c in zip(*caracteres)], dtype=object)
+
+
+def celdas_geohash(lat: pd.Series, lon: pd.Series, precision: int) -> pd.Categorical:
+    """
+    Celda de cada fila como categórica; coordenadas nulas → UNKNOWN.
+    """
+
+    lat = lat.to_numpy(dtype="float64", na_value=np.nan)
+    lon = lon.to_numpy(dtype="float64", na_value=np.nan)
+
+    nulas = np.isnan(lat) | np.isnan(lon)
+
+    codigos = codigos_geohash(np.nan_to_num(lat), np.nan_to_num(lon), precision)
+    unicos, inversa = np.unique(codigos[~nulas], return_inverse=True)
+
+    categorias = np.append(texto_geohash(unicos, precision), CELDA_DESCONOCIDA)
+
+    posiciones = np.full(len(lat), len(unicos), dtype="int64")
+    posiciones[~nulas] = inversa
+
+    return pd.Categorical.from_codes(posiciones, categories=categorias)
+
+
+def centro_geohash(celdas) -> tuple:
+    """
+    (lat, lon) del centro de cada celda; NaN para UNKNOWN.
+    """
+
+    celdas = np.asarray(list(celdas), dtype=object)
+
+    lat = np.full(len(celdas), np.nan)
+    lon = np.full(len(celdas), np.nan)
+
+    largos = np.array([len(c) if c != CELDA_DESCONOCIDA else 0 for c in celdas], dtype="int64")
+
+    # Vectorizado por precisión (en una ejecución normalmente hay una sola)
+    for precision in np.unique(largos[largos > 0]):
+        filas = np.flatnonzero(largos == precision)
+        bits_lon, bits_lat = bits_por_eje(int(precision))
+
+        codigo = np.zeros(len(filas), dtype="uint64")
+
+        for k in range(precision):
+            valores = np.array([VALOR_BASE32[c[k]] for c in celdas[filas]], dtype="uint64")
+            codigo = (codigo << np.uint64(5)) | valores
+
+        q_lon = np.zeros(len(filas), dtype="uint64")
+        q_lat = np.zeros(len(filas), dtype="uint64")
+
+        for k in range(bits_lon + bits_lat):
+            bit = (codigo >> np.uint64(bits_lon + bits_lat - 1 - k)) & np.uint64(1)
+
+            if k % 2 == 0:
+                q_lon = (q_lon << np.uint64(1)) | bit
+            else:
+                q_lat = (q_lat << np.uint64(1)) | bit
+
+        lon[filas] = -180.0 + (q_lon + 0.5) * 360.0 / (1 << bits_lon)
+        lat[filas] = -90.0 + (q_lat + 0.5) * 180.0 / (1 << bits_lat)
+
+    return lat, lon
@@ -1,6 +1,12 @@
+import importlib.util
+
 import pandas as pd
 from pathlib import Path
 
+from src.utils.columnar_cache import read_csv_cached
+from src.utils.config_loader import get_config
+from src.utils.metrics import instrument, measure_iterator
+
 
 def get_data_path(filename: str) -> Path:
     """
@@ -14,33 +20,118 @@ def get_data_path(filename: str) -> Path:
     return data_path
 
 
-def extract_listings():
+# =====================================================
+# ESQUEMA TIPADO (config.yaml → schema)
+# =====================================================
+
+def obtener_motor_csv() -> str:
     """
-    Extrae listings dataset.
+    Usa el parser multihilo de pyarrow cuando está instalado.
     """
 
-    path = get_data_path("listings.csv")
+    if importlib.util.find_spec("pyarrow") is not None:
+        return "pyarrow"
+
+    return "c"
+
+
+def construir_opciones_lectura(path: Path, dataset: str) -> dict:
+    """
+    Traduce el esquema declarado en config.yaml a opciones de pd.read_csv.
+    Sólo se leen las columnas declaradas que existen en el archivo.
+    """
+
+    esquema = get_config()["schema"][dataset]
+
+    tipos = dict(esquema["dtypes"])
+    tipos.update({col: "category" for col in esquema["categorical"]})
+    tipos.update({col: "boolean" for col in esquema["boolean"]})
+
+    encabezado = pd.read_csv(path, encoding="utf-8", nrows=0).columns
+    columnas = [col for col in encabezado if col in tipos]
+
+    return {
+        "encoding": "utf-8",
+        "usecols": columnas,
+        "dtype": {col: tipos[col] for col in columnas},
+        "true_values": esquema["true_values"],
+        "false_values": esquema["false_values"]
+    }
+
+
+# =====================================================
+# EXTRACT
+# =====================================================
+
+@instrument("extract")
+def extract_listings(path: Path = None):
+    """
+    Extrae listings dataset (por defecto data/listings.csv).
+    Si el archivo no cambió desde la última ejecución se lee de la caché columnar.
+    """
+
+    path = path or get_data_path("listings.csv")
 
-    df = pd.read_csv(
+    df = read_csv_cached(
         path,
-        encoding="utf-8",
-        low_memory=False
+        engine=obtener_motor_csv(),
+        **construir_opciones_lectura(path, "listings")
     )
 
     return df
 
 
+def extract_listings_por_lotes(chunk_size: int):
+    """
+    Extrae listings dataset en lotes de tamaño fijo.
+    Nunca se materializa el archivo completo en memoria.
+    """
+
+    path = get_data_path("listings.csv")
+
+    # El motor pyarrow no soporta chunksize
+    lector = pd.read_csv(
+        path,
+        chunksize=chunk_size,
+        **construir_opciones_lectura(path, "listings")
+    )
+
+    with lector:
+        yield from measure_iterator("extract", lector)
+
+
+def extract_reviews_por_lotes(chunk_size: int, path: Path = None, columnas: list = None):
+    """
+    Extrae reviews dataset en lotes (el archivo es mucho más grande que listings).
+    `columnas` limita la lectura a las columnas necesarias.
+    """
+
+    path = path or get_data_path("reviews.csv")
+
+    opciones = construir_opciones_lectura(path, "reviews")
+
+    if columnas:
+        opciones["usecols"] = [col for col in opciones["usecols"] if col in columnas]
+        opciones["dtype"] = {col: opciones["dtype"][col] for col in opciones["usecols"]}
+
+    lector = pd.read_csv(path, chunksize=chunk_size, **opciones)
+
+    with lector:
+        yield from measure_iterator("extract.reviews", lector)
+
+
+@instrument("extract.reviews")
 def extract_reviews():
     """
-    Extrae reviews dataset.
+    Extrae reviews dataset (con caché columnar).
     """
 
     path = get_data_path("reviews.csv")
 
-    df = pd.read_csv(
+    df = read_csv_cached(
         path,
-        encoding="utf-8",
-        low_memory=False
+        engine=obtener_motor_csv(),
+        **construir_opciones_lectura(path, "reviews")
     )
 
     return df
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from src.pipeline.key_cache import buscar_ordenado
+from src.utils.config_loader import get_config
+from src.utils.metrics import instrument
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Atributos que alimentan dim_host, dim_property y el bridge de amenities:
+# si no cambian, el listing no necesita volver a pasar por esos stagings.
+# Precio y disponibilidad sólo afectan a la tabla de hechos.
+COLUMNAS_DIMENSION = [
+    "id",
+    "host_id",
+    "host_name",
+    "calculated_host_listings_count",
+    "name",
+    "room_type",
+    "minimum_nights",
+    "license",
+    "amenities"
+]
+
+COLUMNA_CAMBIO = "requiere_carga_dimension"
+
+
+def get_state_path() -> Path:
+
+    return PROJECT_ROOT / get_config()["incremental"]["state_path"]
+
+
+# =====================================================
+# HASHES Y ESTADO
+# =====================================================
+
+def calcular_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash de 64 bits por fila sobre los atributos de dimensión (vectorizado).
+    """
+
+    columnas = [col for col in COLUMNAS_DIMENSION if col in df.columns]
+
+    return pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()
+
+
+def cargar_estado():
+    """
+    Devuelve (ids ordenados, hashes) de la última ejecución exitosa,
+    o None si no existe estado previo.
+    """
+
+    ruta = get_state_path()
+
+    if not ruta.exists():
+        return None
+
+    with np.load(ruta) as estado:
+        return estado["ids"], estado["hashes"]
+
+
+def guardar_estado(ids: np.ndarray, hashes: np.ndarray):
+    """
+    Guarda el estado del snapshot recién cargado (escritura atómica).
+    """
+
+    ruta = get_state_path()
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    orden = np.argsort(ids, kind="stable")
+    ruta_tmp = ruta.with_name(ruta.stem + ".tmp.npz")
+
+    np.savez_compressed(ruta_tmp, ids=ids[orden], hashes=hashes[orden])
+    ruta_tmp.replace(ruta)
+
+
+# =====================================================
+# DIFF CONTRA EL SNAPSHOT ANTERIOR
+# =====================================================
+
+def detectar_cambios(ids: np.ndarray, hashes: np.ndarray, estado) -> np.ndarray:
+    """
+    True para listings nuevos o cuyo hash cambió.
+    Búsqueda binaria sobre los ids ordenados del estado anterior.
+    """
+
+    if estado is None:
+        return np.ones(len(ids), dtype=bool)
+
+    ids_previos, hashes_previos = estado
+
+    if len(ids_previos) == 0:
+        return np.ones(len(ids), dtype=bool)
+
+    posiciones = np.searchsorted(ids_previos, ids)
+    posiciones = np.minimum(posiciones, len(ids_previos) - 1)
+
+    encontrados = ids_previos[posiciones] == ids
+
+    return ~encontrados | (hashes_previos[posiciones] != hashes)
+
+
+@instrument("incremental")
+def marcar_cambios(df: pd.DataFrame, estado, acumulado: dict) -> pd.DataFrame:
+    """
+    Agrega la columna COLUMNA_CAMBIO y acumula ids/hashes del snapshot
+    para guardarlos cuando la carga termine con éxito.
+    """
+
+    ids = df["id"].to_numpy(dtype="int64")
+    hashes = calcular_hashes(df)
+
+    acumulado.setdefault("ids", []).append(ids)
+    acumulado.setdefault("hashes", []).append(hashes)
+
+    df = df.assign(**{COLUMNA_CAMBIO: detectar_cambios(ids, hashes, estado)})
+
+    return df
+
+
+def marcar_cambios_por_lotes(lotes, estado, acumulado: dict):
+
+    for lote in lotes:
+        yield marcar_cambios(lote, estado, acumulado)
+
+
+def confirmar_estado(acumulado: dict):
+    """
+    Persiste el estado acumulado. Llamar sólo después del commit del DW.
+    """
+
+    if not acumulado:
+        return
+
+    guardar_estado(
+        np.concatenate(acumulado["ids"]),
+        np.concatenate(acumulado["hashes"])
+    )
+
+
+def completar_cambios(df: pd.DataFrame, cache: dict) -> pd.DataFrame:
+    """
+    El estado no está atado al DW: tras un reset, una reconstrucción o un
+    cambio de backend un listing sin cambios puede no tener fila en
+    dim_property / dim_host. Esos también pasan por el staging.
+    """
+
+    if COLUMNA_CAMBIO not in df.columns:
+        return df
+
+    faltantes = (
+        (buscar_ordenado(cache["property"], df["id"].to_numpy(dtype="int64")) < 0)
+        | (buscar_ordenado(cache["host"], df["host_id"].to_numpy(dtype="int64")) < 0)
+    )
+
+    if not faltantes.any():
+        return df
+
+    return df.assign(**{COLUMNA_CAMBIO: df[COLUMNA_CAMBIO].to_numpy() | faltantes})
+
+
+def filas_para_dimension(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sub-frame que debe pasar por el staging de dim_host / dim_property.
+    Sin la columna de cambios (modo completo) se cargan todas las filas.
+    """
+
+    if COLUMNA_CAMBIO not in df.columns:
+        return df
+
+    return df[df[COLUMNA_CAMBIO]]
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+from src.pipeline.warehouse import get_warehouse
+
+
+# =====================================================
+# CACHÉ DE SURROGATE KEYS (business key → surrogate key)
+# =====================================================
+#
+# Se llena una vez por ejecución desde el DW y se refresca después de
+# cada carga de dimensión, así los hechos llegan con las claves resueltas
+# y se insertan sin joins del lado del servidor.
+#
+#   "property" / "host": (business keys ordenadas, surrogate keys) en NumPy
+#   "location": Series indexada por (market, neighbourhood_group, neighbourhood, geohash)
+#   "fact_hoy": property_keys que ya tienen fila en el snapshot de hoy
+#   "fact_tabla": destino de los hechos (la staging en load.fact_strategy = switch)
+
+CLAVES_LOCATION = ["market", "neighbourhood_group", "neighbourhood", "geohash"]
+
+
+def a_arrays(filas) -> tuple:
+
+    ids = np.fromiter((fila[0] for fila in filas), dtype="int64", count=len(filas))
+    claves = np.fromiter((fila[1] for fila in filas), dtype="int64", count=len(filas))
+
+    return ids, claves
+
+
+def fusionar_ordenado(actual: tuple, nuevo: tuple) -> tuple:
+    """
+    Une dos mapas ordenados; ante el mismo business key gana el nuevo.
+    """
+
+    ids = np.concatenate([nuevo[0], actual[0]])
+    claves = np.concatenate([nuevo[1], actual[1]])
+
+    # np.unique devuelve la primera aparición: la del mapa nuevo
+    ids, posiciones = np.unique(ids, return_index=True)
+
+    return ids, claves[posiciones]
+
+
+def a_serie_location(filas) -> pd.Series:
+
+    if not filas:
+        return pd.Series(
+            [],
+            index=pd.MultiIndex.from_arrays([[]] * len(CLAVES_LOCATION), names=CLAVES_LOCATION),
+            dtype="int64"
+        )
+
+    indice = pd.MultiIndex.from_tuples(
+        [tuple(fila[:-1]) for fila in filas],
+        names=CLAVES_LOCATION
+    )
+    serie = pd.Series([fila[-1] for fila in filas], index=indice, dtype="int64")
+
+    # Filas repetidas (dim_location anterior a las celdas): gana la menor location_key
+    return serie.groupby(level=list(range(len(CLAVES_LOCATION)))).min()
+
+
+def cargar_cache_claves(cursor) -> dict:
+    """
+    Lee una única vez los mapas de claves del DW para toda la ejecución.
+    """
+
+    cursor.execute("SELECT listing_id, property_key FROM dw.dim_property")
+    propiedades = a_arrays(cursor.fetchall())
+
+    cursor.execute("SELECT host_id, host_key FROM dw.dim_host WHERE is_current = 1")
+    hosts = a_arrays(cursor.fetchall())
+
+    cursor.execute("""
+    SELECT market, neighbourhood_group, neighbourhood, geohash, location_key
+    FROM dw.dim_location
+    """)
+    locations = a_serie_location(cursor.fetchall())
+
+    # Fecha del snapshot según el motor, igual que el antiguo GETDATE()
+    cursor.execute(get_warehouse()["consulta_hoy"])
+    snapshot_date = cursor.fetchone()[0]
+
+    cursor.execute("""
+    SELECT property_key
+    FROM dw.fact_listing_snapshot
+    WHERE snapshot_date = ?
+    """, (snapshot_date,))
+    hechos_hoy = cursor.fetchall()
+
+    return {
+        "property": fusionar_ordenado((np.empty(0, "int64"),) * 2, propiedades),
+        "host": fusionar_ordenado((np.empty(0, "int64"),) * 2, hosts),
+        "location": locations,
+        "fact_hoy": {fila[0] for fila in hechos_hoy},
+        "fact_tabla": "dw.fact_listing_snapshot",
+        "snapshot_date": snapshot_date
+    }
+
+
+def refrescar_cache(cache: dict, dimension: str, filas):
+    """
+    Incorpora las claves que una carga de dimensión acaba de insertar.
+    """
+
+    if dimension == "location":
+        nuevas = a_serie_location(filas)
+        combinada = pd.concat([nuevas, cache["location"]])
+        cache["location"] = combinada[~combinada.index.duplicated(keep="first")]
+    else:
+        cache[dimension] = fusionar_ordenado(cache[dimension], a_arrays(filas))
+
+
+# =====================================================
+# RESOLUCIÓN VECTORIZADA
+# =====================================================
+
+def buscar_ordenado(mapa: tuple, ids: np.ndarray) -> np.ndarray:
+    """
+    Búsqueda binaria vectorizada; -1 si el business key no existe.
+    """
+
+    ids_mapa, claves_mapa = mapa
+
+    if len(ids_mapa) == 0:
+        return np.full(len(ids), -1, dtype="int64")
+
+    posiciones = np.minimum(np.searchsorted(ids_mapa, ids), len(ids_mapa) - 1)
+    encontrados = ids_mapa[posiciones] == ids
+
+    return np.where(encontrados, claves_mapa[posiciones], -1)
+
+
+def resolver_claves(cache: dict, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega property_key, host_key y location_key al frame de hechos.
+    """
+
+    indice = pd.MultiIndex.from_arrays(
+        [df[col].astype(str) for col in CLAVES_LOCATION]
+    )
+    posiciones = cache["location"].index.get_indexer(indice)
+    claves_location = np.where(
+        posiciones >= 0,
+        cache["location"].to_numpy()[posiciones],
+        -1
+    )
+
+    return df.assign(
+        property_key=buscar_ordenado(cache["property"], df["id"].to_numpy(dtype="int64")),
+        host_key=buscar_ordenado(cache["host"], df["host_id"].to_numpy(dtype="int64")),
+        location_key=claves_location
+    )
@@ -1,5 +1,44 @@
-from src.utils.db_connector import get_connection
+from src.pipeline.amenities import pares_amenities
+from src.pipeline.bulk_load import cargar_masivo
+from src.pipeline.espacial import centro_geohash
+from src.pipeline.incremental import completar_cambios, filas_para_dimension
+from src.pipeline.key_cache import CLAVES_LOCATION, buscar_ordenado, cargar_cache_claves, resolver_claves
+from src.pipeline.particiones import FACT_SWITCH, ORDEN_COLUMNSTORE, preparar_switch, publicar_switch
+from src.pipeline.resumenes import actualizar_resumenes
+from src.pipeline.reviews import guardar_huerfanas, nuevo_watermark
+from src.pipeline.scd import aplicar_scd, preparar_stage
+from src.pipeline.warehouse import crear_stage, get_warehouse
+from src.utils.config_loader import get_config
+from src.utils.logger import get_logger
+from src.utils.metrics import instrument
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import uuid
+
+
+logger = get_logger()
+
+# Columnas del frame transformado que consume la carga
+COLUMNAS_CARGA = [
+    "id",
+    "market",
+    "name",
+    "host_id",
+    "host_name",
+    "neighbourhood_group",
+    "neighbourhood",
+    "geohash",
+    "room_type",
+    "price",
+    "minimum_nights",
+    "license",
+    "calculated_host_listings_count",
+    "availability_365",
+    "number_of_reviews",
+    "number_of_reviews_ltm",
+    "reviews_per_month",
+    "amenities"
+]
 
 
 # =====================================================
@@ -8,154 +47,144 @@ import pandas as pd
 
 def insertar_dataframe(cursor, df, tabla_temp):
     """
-    Inserta dataframe en tabla temporal usando fast_executemany.
+    Inserta dataframe en tabla temporal con el backend de carga masiva
+    configurado (executemany por lotes, TVP o archivo bcp nativo).
     """
 
-    cols = ",".join(df.columns)
-    placeholders = ",".join(["?"] * len(df.columns))
+    cargar_masivo(cursor, df, tabla_temp)
+
 
-    query = f"INSERT INTO {tabla_temp} ({cols}) VALUES ({placeholders})"
+def tabla_stage(nombre: str) -> str:
+    """
+    Tabla temporal de sesión en el warehouse configurado
+    ("#host_stage" en SQL Server, "temp.host_stage" en SQLite).
+    """
 
-    cursor.fast_executemany = True
-    cursor.executemany(query, df.values.tolist())
+    return get_warehouse()["stage"](nombre)
 
 
 # =====================================================
-# DIM HOST — SCD TYPE 2
+# DIM HOST — SCD (tipo 2 por defecto, ver config.yaml → scd)
 # =====================================================
 
-def cargar_dim_host(cursor, df):
+@instrument("load.stage_dim_host")
+def stage_dim_host(cursor, df, stage: str = None):
+    """
+    Crea la tabla de staging y sube los hosts (sin tocar el DW).
+    """
 
-    cursor.execute("""
-    IF OBJECT_ID('tempdb..#host_stage') IS NOT NULL
-        DROP TABLE #host_stage;
+    stage = stage or tabla_stage("host_stage")
 
-    CREATE TABLE #host_stage(
+    crear_stage(cursor, stage, """
         host_id BIGINT,
         host_name NVARCHAR(255),
-        calculated_host_listings_count INT
-    );
-    """)
+        calculated_host_listings_count INT,
+        row_hash BIGINT
+    """, clave=["host_id"])
 
-    host_df = df[[
+    # En modo incremental sólo listings nuevos o cambiados
+    host_df = filas_para_dimension(df)[[
         "host_id",
         "host_name",
         "calculated_host_listings_count"
-    ]].drop_duplicates()
-
-    insertar_dataframe(cursor, host_df, "#host_stage")
-
-    cursor.execute("""
-
-    UPDATE d
-    SET end_date = GETDATE(),
-        is_current = 0
-    FROM dw.dim_host d
-    JOIN #host_stage s
-        ON d.host_id = s.host_id
-    WHERE d.is_current = 1
-      AND (
-            d.host_name <> s.host_name
-            OR d.calculated_host_listings_count <> s.calculated_host_listings_count
-          );
+    ]]
+
+    insertar_dataframe(cursor, preparar_stage("host", host_df), stage)
 
-    INSERT INTO dw.dim_host(
-        host_id,
-        host_name,
-        calculated_host_listings_count,
-        effective_date,
-        is_current
-    )
-    SELECT
-        s.host_id,
-        s.host_name,
-        s.calculated_host_listings_count,
-        GETDATE(),
-        1
-    FROM #host_stage s
-    LEFT JOIN dw.dim_host d
-        ON s.host_id = d.host_id
-        AND d.is_current = 1
-    WHERE d.host_id IS NULL
-       OR (
-            d.host_name <> s.host_name
-            OR d.calculated_host_listings_count <> s.calculated_host_listings_count
-          );
-    """)
+
+@instrument("load.merge_dim_host")
+def merge_dim_host(cursor, cache, stage: str = None):
+    """
+    Staging → dw.dim_host por el motor SCD + refresco de la caché de claves.
+    Las fechas de vigencia son la fecha del snapshot (igual en todo el run).
+    """
+
+    aplicar_scd(cursor, cache, "host", stage or tabla_stage("host_stage"))
+
+
+@instrument("load.cargar_dim_host")
+def cargar_dim_host(cursor, df, cache):
+
+    stage_dim_host(cursor, df)
+    merge_dim_host(cursor, cache)
 
 
 # =====================================================
 # DIM LOCATION (JOIN SEGURO)
 # =====================================================
 
-def cargar_dim_location(cursor, df):
+@instrument("load.stage_dim_location")
+def stage_dim_location(cursor, df, stage: str = None):
+    """
+    Crea la tabla de staging y sube las ubicaciones (sin tocar el DW):
+    una fila por celda geohash y barrio, con el centro de la celda.
+    """
 
-    cursor.execute("""
-    IF OBJECT_ID('tempdb..#location_stage') IS NOT NULL
-        DROP TABLE #location_stage;
+    stage = stage or tabla_stage("location_stage")
 
-    CREATE TABLE #location_stage(
+    crear_stage(cursor, stage, """
+        market NVARCHAR(100),
         neighbourhood_group NVARCHAR(100),
         neighbourhood NVARCHAR(150),
+        geohash NVARCHAR(12),
         latitude FLOAT,
-        longitude FLOAT
-    );
-    """)
+        longitude FLOAT,
+        row_hash BIGINT
+    """, clave=CLAVES_LOCATION)
 
-    loc_df = df[[
-        "neighbourhood_group",
-        "neighbourhood",
-        "latitude",
-        "longitude"
-    ]].drop_duplicates()
+    loc_df = df[CLAVES_LOCATION].drop_duplicates()
 
-    insertar_dataframe(cursor, loc_df, "#location_stage")
+    latitud, longitud = centro_geohash(loc_df["geohash"].astype(str))
 
-    cursor.execute("""
+    loc_df = loc_df.assign(latitude=latitud, longitude=longitud)
 
-    INSERT INTO dw.dim_location(
-        neighbourhood_group,
-        neighbourhood,
-        latitude,
-        longitude
-    )
-    SELECT DISTINCT
-        s.*
-    FROM #location_stage s
-    LEFT JOIN dw.dim_location d
-        ON s.neighbourhood = d.neighbourhood
-       AND s.neighbourhood_group = d.neighbourhood_group
-    WHERE d.location_key IS NULL;
+    insertar_dataframe(cursor, preparar_stage("location", loc_df), stage)
 
-    """)
+
+@instrument("load.merge_dim_location")
+def merge_dim_location(cursor, cache, stage: str = None):
+    """
+    Staging → dw.dim_location por el motor SCD + refresco de la caché de claves.
+    """
+
+    aplicar_scd(cursor, cache, "location", stage or tabla_stage("location_stage"))
+
+
+@instrument("load.cargar_dim_location")
+def cargar_dim_location(cursor, df, cache):
+
+    stage_dim_location(cursor, df)
+    merge_dim_location(cursor, cache)
 
 
 # =====================================================
 # DIM PROPERTY
 # =====================================================
 
-def cargar_dim_property(cursor, df):
+@instrument("load.stage_dim_property")
+def stage_dim_property(cursor, df, stage: str = None):
+    """
+    Crea la tabla de staging y sube las propiedades (sin tocar el DW).
+    """
 
-    cursor.execute("""
-    IF OBJECT_ID('tempdb..#property_stage') IS NOT NULL
-        DROP TABLE #property_stage;
+    stage = stage or tabla_stage("property_stage")
 
-    CREATE TABLE #property_stage(
+    crear_stage(cursor, stage, """
         listing_id BIGINT,
         listing_name NVARCHAR(300),
         room_type NVARCHAR(50),
         minimum_nights INT,
-        license NVARCHAR(100)
-    );
-    """)
+        license NVARCHAR(100),
+        row_hash BIGINT
+    """, clave=["listing_id"])
 
-    prop_df = df[[
+    prop_df = filas_para_dimension(df)[[
         "id",
         "name",
         "room_type",
         "minimum_nights",
         "license"
-    ]].drop_duplicates()
+    ]]
 
     prop_df.columns = [
         "listing_id",
@@ -165,92 +194,177 @@ def cargar_dim_property(cursor, df):
         "license"
     ]
 
-    insertar_dataframe(cursor, prop_df, "#property_stage")
+    insertar_dataframe(cursor, preparar_stage("property", prop_df), stage)
 
-    cursor.execute("""
 
-    MERGE dw.dim_property AS target
-    USING #property_stage AS source
-    ON target.listing_id = source.listing_id
+@instrument("load.merge_dim_property")
+def merge_dim_property(cursor, cache, stage: str = None):
+    """
+    Staging → dw.dim_property por el motor SCD (tipo 1 por defecto: un
+    listing cambiado se actualiza) + refresco de la caché de claves.
+    """
 
-    WHEN NOT MATCHED THEN
-    INSERT (
-        listing_id,
-        listing_name,
-        room_type,
-        minimum_nights,
-        license
-    )
-    VALUES (
-        source.listing_id,
-        source.listing_name,
-        source.room_type,
-        source.minimum_nights,
-        source.license
-    );
+    aplicar_scd(cursor, cache, "property", stage or tabla_stage("property_stage"))
 
-    """)
+
+@instrument("load.cargar_dim_property")
+def cargar_dim_property(cursor, df, cache):
+
+    stage_dim_property(cursor, df)
+    merge_dim_property(cursor, cache)
 
 
 # =====================================================
-# FACT TABLE (JOIN SEGURO)
+# DIM AMENITY + BRIDGE PROPERTY ↔ AMENITY
 # =====================================================
 
-def cargar_fact(cursor, df):
-
-    cursor.execute("""
-    IF OBJECT_ID('tempdb..#fact_stage') IS NOT NULL
-        DROP TABLE #fact_stage;
-
-CREATE TABLE #fact_stage(
-    listing_id BIGINT,
-    host_id BIGINT,
-    neighbourhood NVARCHAR(150),
-    latitude FLOAT,
-    longitude FLOAT,
-    price FLOAT,
-    availability_365 INT,
-    number_of_reviews INT,
-    number_of_reviews_ltm INT,
-    reviews_per_month FLOAT
-);
+@instrument("load.stage_dim_amenity")
+def stage_dim_amenity(cursor, df, stage: str = None):
+    """
+    Sube los pares (listing, amenity) en formato largo, generados desde la
+    lista dispersa de cada listing (sin volver a parsear texto).
+    Un listing con lista vacía viaja con amenity_name nulo para que
+    se borren sus amenities anteriores.
+    """
+
+    stage = stage or tabla_stage("amenity_stage")
+
+    crear_stage(cursor, stage, """
+        listing_id BIGINT,
+        amenity_name NVARCHAR(200)
+    """, clave=["listing_id"])
+
+    filas = filas_para_dimension(df)
+    filas = filas[filas["amenities"].notna()]
+
+    pares = pares_amenities(filas["id"], filas["amenities"])
+
+    vacias = filas.loc[~filas["id"].isin(pares["listing_id"]), "id"]
+    pares = pd.concat([pares, pd.DataFrame({"listing_id": vacias.to_numpy(), "amenity_name": None})])
+
+    insertar_dataframe(cursor, pares.drop_duplicates(), stage)
+
+
+@instrument("load.merge_dim_amenity")
+def merge_dim_amenity(cursor, cache, stage: str = None):
+    """
+    Amenities nuevas en dw.dim_amenity y reemplazo del bridge
+    de los listings del staging. Requiere dim_property ya cargada.
+    """
+
+    stage = stage or tabla_stage("amenity_stage")
+
+    cursor.execute(f"""
+
+    INSERT INTO dw.dim_amenity(amenity_name)
+    SELECT DISTINCT s.amenity_name
+    FROM {stage} s
+    WHERE s.amenity_name IS NOT NULL
+      AND NOT EXISTS (
+            SELECT 1
+            FROM dw.dim_amenity a
+            WHERE a.amenity_name = s.amenity_name
+          );
 
     """)
 
-    fact_df = df.rename(columns={
-    "id": "listing_id"
-})[[
-    "listing_id",
-    "host_id",
-    "neighbourhood",
-    "latitude",
-    "longitude",
+    cursor.execute(f"""
+
+    DELETE FROM dw.bridge_property_amenity
+    WHERE property_key IN (
+        SELECT p.property_key
+        FROM dw.dim_property p
+        JOIN {stage} s
+            ON p.listing_id = s.listing_id
+    );
+
+    """)
+
+    cursor.execute(f"""
+
+    INSERT INTO dw.bridge_property_amenity(property_key, amenity_key)
+    SELECT DISTINCT
+        p.property_key,
+        a.amenity_key
+    FROM {stage} s
+    JOIN dw.dim_property p
+        ON p.listing_id = s.listing_id
+    JOIN dw.dim_amenity a
+        ON a.amenity_name = s.amenity_name;
+
+    """)
+
+
+@instrument("load.cargar_dim_amenity")
+def cargar_dim_amenity(cursor, df, cache):
+
+    if "amenities" not in df.columns:
+        return
+
+    stage_dim_amenity(cursor, df)
+    merge_dim_amenity(cursor, cache)
+
+
+# =====================================================
+# FACT TABLE (CLAVES RESUELTAS EN LA CACHÉ)
+# =====================================================
+
+COLUMNAS_FACT = [
+    "property_key",
+    "host_key",
+    "location_key",
     "price",
     "availability_365",
     "number_of_reviews",
     "number_of_reviews_ltm",
     "reviews_per_month"
-]]
+]
 
 
-    fact_df.columns = [
-        "listing_id",
-        "host_id",
-        "neighbourhood",
-        "latitude",
-        "longitude",
-        "price",
-        "availability_365",
-        "number_of_reviews",
-        "number_of_reviews_ltm",
-        "reviews_per_month"
-    ]
+@instrument("load.cargar_fact")
+def cargar_fact(cursor, df, cache):
+    """
+    Las surrogate keys se resuelven en memoria (caché de claves): los hechos
+    se insertan tal cual, sin joins contra las dimensiones ni NOT EXISTS.
+    Destino: la tabla de hechos o la staging del partition switch
+    (cache["fact_tabla"]), ya en el orden de los rowgroups del columnstore.
+    """
+
+    stage = tabla_stage("fact_stage")
+
+    crear_stage(cursor, stage, """
+        property_key INT,
+        host_key INT,
+        location_key INT,
+        price FLOAT,
+        availability_365 INT,
+        number_of_reviews INT,
+        number_of_reviews_ltm INT,
+        reviews_per_month FLOAT
+    """)
+
+    fact_df = resolver_claves(cache, df)[COLUMNAS_FACT]
 
-    insertar_dataframe(cursor, fact_df, "#fact_stage")
+    # Equivalente al antiguo INNER JOIN: sin clave no hay hecho
+    sin_clave = (fact_df[["property_key", "host_key", "location_key"]] < 0).any(axis=1)
 
-    cursor.execute("""
+    if sin_clave.any():
+        descartados = int(sin_clave.sum())
+        cache["hechos_descartados"] = cache.get("hechos_descartados", 0) + descartados
 
-    INSERT INTO dw.fact_listing_snapshot(
+        logger.warning(f"{descartados} hechos sin surrogate key descartados")
+
+    # Equivalente al antiguo NOT EXISTS / DISTINCT: una fila por propiedad y día
+    ya_cargados = fact_df["property_key"].isin(cache["fact_hoy"])
+
+    fact_df = fact_df[~sin_clave & ~ya_cargados].drop_duplicates("property_key")
+    fact_df = fact_df.sort_values(ORDEN_COLUMNSTORE, kind="stable")
+
+    insertar_dataframe(cursor, fact_df, stage)
+
+    cursor.execute(f"""
+
+    INSERT INTO {cache["fact_tabla"]}(
         snapshot_date,
         property_key,
         host_key,
@@ -261,65 +375,374 @@ CREATE TABLE #fact_stage(
         number_of_reviews_ltm,
         reviews_per_month
     )
-    SELECT DISTINCT 
-        CAST(GETDATE() AS DATE),
-        p.property_key,
-        h.host_key,
-        l.location_key,
-        s.price,
-        s.availability_365,
-        s.number_of_reviews,
-        s.number_of_reviews_ltm,
-        s.reviews_per_month
-    FROM #fact_stage s
+    SELECT
+        ?,
+        property_key,
+        host_key,
+        location_key,
+        price,
+        availability_365,
+        number_of_reviews,
+        number_of_reviews_ltm,
+        reviews_per_month
+    FROM {stage}
+    ORDER BY {", ".join(ORDEN_COLUMNSTORE)};
 
-    INNER JOIN dw.dim_property p
-        ON s.listing_id = p.listing_id
+    """, (cache["snapshot_date"],))
 
-    INNER JOIN dw.dim_host h
-        ON s.host_id = h.host_id
-        AND h.is_current = 1
+    cache["fact_hoy"].update(fact_df["property_key"].tolist())
 
-    INNER JOIN dw.dim_location l
-        ON s.latitude = l.latitude
-        AND s.longitude = l.longitude
+    return len(fact_df)
+
+
+# =====================================================
+# DIM DATE + FACT REVIEW DAILY
+# =====================================================
+
+def filas_dim_date(fechas: pd.Series) -> pd.DataFrame:
+    """
+    Atributos de calendario; weekday ISO (1 = lunes), independiente de DATEFIRST.
+    """
 
+    fechas = pd.Series(pd.to_datetime(fechas).unique())
 
+    return pd.DataFrame({
+        "date_key": fechas.dt.strftime("%Y-%m-%d"),
+        "year": fechas.dt.year.astype("int32"),
+        "quarter": fechas.dt.quarter.astype("int32"),
+        "month": fechas.dt.month.astype("int32"),
+        "day": fechas.dt.day.astype("int32"),
+        "weekday": (fechas.dt.weekday + 1).astype("int32")
+    })
+
+
+@instrument("load.cargar_dim_date")
+def cargar_dim_date(cursor, fechas: pd.Series):
+    """
+    Inserta en dw.dim_date las fechas que todavía no existen.
+    """
+
+    stage = tabla_stage("date_stage")
+
+    crear_stage(cursor, stage, """
+        date_key DATE,
+        year SMALLINT,
+        quarter TINYINT,
+        month TINYINT,
+        day TINYINT,
+        weekday TINYINT
+    """, clave=["date_key"])
+
+    insertar_dataframe(cursor, filas_dim_date(fechas), stage)
+
+    cursor.execute(f"""
+
+    INSERT INTO dw.dim_date(date_key, year, quarter, month, day, weekday)
+    SELECT s.date_key, s.year, s.quarter, s.month, s.day, s.weekday
+    FROM {stage} s
     WHERE NOT EXISTS (
         SELECT 1
-        FROM dw.fact_listing_snapshot f
-        WHERE f.property_key = p.property_key
-         AND f.snapshot_date = CAST(GETDATE() AS DATE)
+        FROM dw.dim_date d
+        WHERE d.date_key = s.date_key
     );
 
     """)
 
 
+@instrument("load.cargar_fact_reviews")
+def cargar_fact_reviews(cursor, agregado: pd.DataFrame, cache):
+    """
+    Reemplaza en dw.fact_review_daily los días desde la fecha mínima del
+    agregado (el watermark) con los conteos recién calculados.
+    property_key se resuelve en la caché de claves.
+
+    Devuelve (filas, máscara de los conteos sin listing en dim_property):
+    esos no se insertan; ejecutar_carga_reviews decide si se retienen.
+    """
+
+    stage = tabla_stage("review_stage")
+
+    crear_stage(cursor, stage, """
+        date_key DATE,
+        property_key INT,
+        review_count INT
+    """)
+
+    claves = buscar_ordenado(cache["property"], agregado["listing_id"].to_numpy(dtype="int64"))
+    sin_clave = pd.Series(claves < 0, index=agregado.index)
+
+    review_df = pd.DataFrame({
+        "date_key": agregado["review_date"].dt.strftime("%Y-%m-%d"),
+        "property_key": claves.astype("int32"),
+        "review_count": agregado["review_count"].astype("int32")
+    })[~sin_clave]
+
+    insertar_dataframe(cursor, review_df, stage)
+
+    cursor.execute(
+        "DELETE FROM dw.fact_review_daily WHERE date_key >= ?;",
+        (agregado["review_date"].min().strftime("%Y-%m-%d"),)
+    )
+
+    cursor.execute(f"""
+
+    INSERT INTO dw.fact_review_daily(date_key, property_key, review_count)
+    SELECT date_key, property_key, review_count
+    FROM {stage};
+
+    """)
+
+    return len(review_df), sin_clave
+
+
+def ejecutar_carga_reviews(agregado: pd.DataFrame) -> tuple:
+    """
+    Carga dim_date + fact_review_daily en una transacción propia.
+    Requiere dim_property cargada (corre después de la carga de listings).
+
+    Devuelve (filas, nuevo watermark). Las reviews de listings que aún no
+    están en dim_property frenan el watermark (ver nuevo_watermark): la
+    próxima ejecución las vuelve a leer y las carga cuando el listing llegue.
+    Las que quedan detrás del watermark se guardan con guardar_huerfanas.
+    """
+
+    if agregado.empty:
+        return 0, None
+
+    conn = get_warehouse()["conectar"]()
+    cursor = conn.cursor()
+
+    try:
+
+        cache = cargar_cache_claves(cursor)
+
+        cargar_dim_date(cursor, agregado["review_date"])
+        filas, sin_clave = cargar_fact_reviews(cursor, agregado, cache)
+
+        conn.commit()
+
+        watermark = nuevo_watermark(agregado, sin_clave)
+
+        retenidas = sin_clave & (agregado["review_date"] >= watermark)
+        huerfanas = sin_clave & ~retenidas
+
+        if retenidas.any():
+            logger.warning(
+                f"{int(retenidas.sum())} conteos de reviews de listings fuera de dim_property "
+                f"retenidos — el watermark no pasa de {watermark.date()}"
+            )
+
+        if huerfanas.any():
+            ruta = guardar_huerfanas(agregado[huerfanas])
+
+            logger.warning(
+                f"{int(huerfanas.sum())} conteos de reviews sin listing tras "
+                f"{get_config()['reviews']['max_pending_days']} días — guardados en {ruta}"
+            )
+
+        return filas, watermark
+
+    except Exception:
+
+        conn.rollback()
+        raise
+
+    finally:
+
+        conn.close()
+
+
 # =====================================================
 # MASTER LOAD — TRANSACCIONAL REAL
 # =====================================================
 
-def ejecutar_carga(df):
+STAGES_DIMENSION = [
+    ("host", stage_dim_host, merge_dim_host),
+    ("location", stage_dim_location, merge_dim_location),
+    ("property", stage_dim_property, merge_dim_property)
+]
+
+
+def stage_en_conexion(conn, funcion_stage, df, stage):
+    """
+    Sube el staging de una dimensión por su propia conexión del pool.
+    Sólo toca tempdb: el commit aquí no publica nada en el DW.
+    """
 
-    conn = get_connection()
     cursor = conn.cursor()
 
     try:
+        funcion_stage(cursor, df, stage)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def cargar_dimensiones_en_paralelo(pool, cursor, df, cache, sufijo):
+    """
+    Fase 1: las tres dimensiones se suben en paralelo a tablas ##globales
+    (visibles desde la conexión principal), una conexión del pool por dimensión.
+    Fase 2: los MERGE/SCD2 corren en la conexión principal, dentro de su
+    transacción: el DW sigue siendo todo-o-nada.
+    """
+
+    stages = {dim: f"##{dim}_stage__{sufijo}" for dim, _, _ in STAGES_DIMENSION}
+
+    with ThreadPoolExecutor(max_workers=len(STAGES_DIMENSION)) as executor:
+        futuros = [
+            executor.submit(stage_en_conexion, conn, funcion_stage, df, stages[dim])
+            for conn, (dim, funcion_stage, _) in zip(pool, STAGES_DIMENSION)
+        ]
+
+        # result() relanza la primera excepción de cualquier hilo
+        for futuro in futuros:
+            futuro.result()
+
+    for dim, _, funcion_merge in STAGES_DIMENSION:
+        funcion_merge(cursor, cache, stages[dim])
+
+
+@instrument("load")
+def cargar_lote(cursor, df, cache, pool=None, sufijo=None):
+    """
+    Carga dimensiones y hechos de un DataFrame (completo o lote)
+    dentro de la transacción abierta en `cursor`. Devuelve los hechos insertados.
+    """
+
+    df = completar_cambios(df, cache)
+
+    if pool:
+        cargar_dimensiones_en_paralelo(pool, cursor, df, cache, sufijo)
+    else:
+        cargar_dim_host(cursor, df, cache)
+        cargar_dim_location(cursor, df, cache)
+        cargar_dim_property(cursor, df, cache)
+
+    # Después de dim_property: el bridge resuelve property_key contra ella
+    cargar_dim_amenity(cursor, df, cache)
+
+    return cargar_fact(cursor, df, cache)
+
+
+def abrir_pool_staging(warehouse: dict) -> list:
+    """
+    Conexiones auxiliares del pool para el staging en paralelo
+    (load.parallel_dimensions). Sólo en motores con tablas ##globales.
+    """
+
+    config = get_config()["load"]
+
+    if not config["parallel_dimensions"] or not warehouse["staging_paralelo"]:
+        return []
+
+    pool = []
+
+    try:
+        for _ in STAGES_DIMENSION:
+            pool.append(warehouse["conectar"]())
+    except Exception:
+        # Las ya abiertas vuelven al pool antes de propagar el error
+        liberar_pool_staging(pool, None)
+        raise
+
+    return pool
+
+
+def liberar_pool_staging(pool: list, sufijo):
+    """
+    Elimina las tablas ##globales de staging y devuelve las conexiones al
+    pool. Cada paso es independiente: una conexión rota se registra en el
+    log sin tapar el error original ni retener las demás.
+    """
+
+    # Las conexiones vuelven al pool sin cerrar la sesión:
+    # las tablas ##globales de staging se eliminan explícitamente
+    for (dim, _, _), conn_staging in zip(STAGES_DIMENSION, pool):
+        try:
+            if sufijo is not None:
+                conn_staging.cursor().execute(f"DROP TABLE IF EXISTS ##{dim}_stage__{sufijo};")
+                conn_staging.commit()
+        except Exception:
+            logger.exception(f"No se pudo eliminar ##{dim}_stage__{sufijo}")
+        finally:
+            try:
+                conn_staging.close()
+            except Exception:
+                logger.exception(f"No se pudo liberar la conexión de staging de {dim}")
+
+
+def ejecutar_carga(df):
+
+    return ejecutar_carga_por_lotes([df])
+
+
+def ejecutar_carga_por_lotes(lotes):
+    """
+    Carga cada lote en cuanto llega, sobre una única conexión principal.
+    El commit es único al final: si falla cualquier lote, no se carga nada.
+    """
+
+    warehouse = get_warehouse()
+
+    conn = warehouse["conectar"]()
+
+    pool = []
+
+    # Las tablas ##globales son visibles para todas las sesiones: sufijo por ejecución
+    sufijo = uuid.uuid4().hex[:8]
+
+    try:
+
+        cursor = conn.cursor()
+
+        pool = abrir_pool_staging(warehouse)
 
         print("\n🚀 Iniciando carga al Data Warehouse...")
 
-        cargar_dim_host(cursor, df)
-        cargar_dim_location(cursor, df)
-        cargar_dim_property(cursor, df)
-        cargar_fact(cursor, df)
+        filas = 0
+
+        # Mapas business key → surrogate key: una lectura por ejecución
+        cache = cargar_cache_claves(cursor)
+
+        # switch: los lotes llenan la staging alineada y al final reemplaza
+        # la partición del día entera (lo ya cargado hoy no cuenta)
+        switch = get_config()["load"]["fact_strategy"] == "switch"
+
+        if switch:
+            preparar_switch(cursor, cache["snapshot_date"])
+            cache["fact_tabla"] = FACT_SWITCH
+            cache["fact_hoy"] = set()
+
+        for lote in lotes:
+            filas += cargar_lote(cursor, lote, cache, pool, sufijo)
+
+        if switch:
+            publicar_switch(cursor, cache["snapshot_date"])
+
+        # Una vez por snapshot (no por lote), antes del commit único
+        actualizar_resumenes(cursor, cache["snapshot_date"])
 
         conn.commit()
 
-        print("✅ Carga completada exitosamente")
+        descartados = cache.get("hechos_descartados", 0)
+
+        if descartados:
+            logger.warning(f"Carga completada — filas: {filas}, hechos sin surrogate key descartados: {descartados}")
+
+        print(f"{'⚠️' if descartados else '✅'} Carga completada — filas: {filas}")
+
+        return filas
 
     except Exception as e:
 
-        conn.rollback()
+        # Con la conexión rota el rollback también falla: se relanza el original
+        try:
+            conn.rollback()
+        except Exception:
+            logger.exception("Rollback de la carga fallido")
 
         print("\n🔥 ERROR REAL DEL LOAD:")
         print(e)
@@ -328,4 +751,10 @@ def ejecutar_carga(df):
 
     finally:
 
-        conn.close()
\ No newline at end of file
+        try:
+            liberar_pool_staging(pool, sufijo)
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                logger.exception("No se pudo liberar la conexión principal de la carga")
@@ -0,0 +1,103 @@
+import pandas as pd
+
+from src.utils.config_loader import get_config
+from src.utils.logger import get_logger
+from src.utils.metrics import record_memory
+
+
+logger = get_logger()
+
+
+# =====================================================
+# MODO DE MEMORIA COMPACTA
+# =====================================================
+#
+# Con memory.compact (o --compact) cada etapa del modo batch termina con
+# el frame compactado:
+#
+#   texto con pocos valores distintos → categórica (diccionario + códigos)
+#   enteros → el entero más chico que admite el rango (int8 / int16 / ...)
+#   booleanos sin nulos → arreglo bool de NumPy (1 byte, sin máscara)
+#
+# Los float no se reducen: float32 cambia los bits del valor y con ellos
+# los hashes del estado incremental y lo que llega al DW.
+
+def memoria_mb(df: pd.DataFrame) -> float:
+    """
+    Memoria del frame incluyendo el contenido de los textos.
+    """
+
+    return df.memory_usage(deep=True, index=True).sum() / 1024 ** 2
+
+
+def es_texto(serie: pd.Series) -> bool:
+
+    return pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)
+
+
+def compactar_columna(serie: pd.Series, max_ratio: float) -> pd.Series:
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie
+
+    if es_texto(serie):
+        # Sólo si el diccionario es bastante más chico que la columna
+        if len(serie) and serie.nunique(dropna=True) <= max_ratio * len(serie):
+            return serie.astype("category")
+
+        return serie
+
+    if pd.api.types.is_bool_dtype(serie):
+        if serie.dtype != bool and not serie.isna().any():
+            return serie.astype(bool)
+
+        return serie
+
+    # Enteros con signo (también Int64 con nulos → Int16, ...); los sin
+    # signo (hashes uint64) se dejan como están
+    if serie.dtype.kind == "i":
+        compacta = pd.to_numeric(serie, downcast="integer")
+
+        if compacta.dtype.itemsize < serie.dtype.itemsize:
+            return compacta
+
+    return serie
+
+
+def compactar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mismo contenido, dtypes más chicos (ver encabezado del módulo).
+    """
+
+    max_ratio = get_config()["memory"]["max_categorical_ratio"]
+
+    return df.assign(**{
+        col: compactar_columna(df[col], max_ratio)
+        for col in df.columns
+    })
+
+
+def compactar_etapa(nombre: str, funcion):
+    """
+    Envuelve una etapa: compacta su salida y registra la memoria del
+    frame antes y después (pipeline_metrics.json → memory.<etapa>).
+    """
+
+    def correr(df):
+
+        antes = memoria_mb(df) if df is not None else 0.0
+        salida = funcion(df)
+        sin_compactar = memoria_mb(salida)
+        salida = compactar(salida)
+        despues = memoria_mb(salida)
+
+        record_memory(f"memory.{nombre}", antes, sin_compactar, despues)
+
+        logger.info(
+            f"Memoria {nombre}: entrada {antes:.1f} MB → salida {sin_compactar:.1f} MB "
+            f"→ compactada {despues:.1f} MB"
+        )
+
+        return salida
+
+    return correr
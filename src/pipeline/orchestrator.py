@@ -1,34 +1,223 @@
-from src.pipeline.extract import extract_listings
-from src.pipeline.validate import ejecutar_validaciones_listings
-from src.pipeline.transform import transformar_listings
-from src.pipeline.load import ejecutar_carga
+import argparse
+from contextlib import nullcontext
+
+from src.pipeline.extract import (
+    extract_listings_por_lotes,
+    extract_reviews_por_lotes,
+    get_data_path
+)
+from src.pipeline.validate import ejecutar_validaciones_por_lotes
+from src.pipeline.transform import transformar_listings_por_lotes
+from src.pipeline.load import (
+    COLUMNAS_CARGA,
+    ejecutar_carga,
+    ejecutar_carga_por_lotes,
+    ejecutar_carga_reviews
+)
+from src.pipeline.incremental import (
+    cargar_estado,
+    confirmar_estado,
+    marcar_cambios,
+    marcar_cambios_por_lotes
+)
+from src.pipeline.analytics import generar_reportes
+from src.pipeline.checkpoints import ejecutar_etapas, etapas_listings, huella_archivo
+from src.pipeline.ciudades import procesar_ciudades
+from src.pipeline.solapado import ejecucion_solapada, en_hilo
+from src.pipeline.reviews import (
+    COLUMNAS_REVIEWS,
+    agregar_reviews,
+    cargar_watermark,
+    guardar_watermark
+)
+from src.utils.config_loader import get_config
 from src.utils.logger import get_logger
+from src.utils.metrics import start_run, write_metrics
 
 
 logger = get_logger()
 
 
-def run_pipeline():
+def run_pipeline_streaming(chunk_size: int, estado, acumulado: dict, pipelined: bool = False):
+    """
+    Extract → Validate → Transform → Load lote a lote.
+    Cada etapa es un generador: en memoria sólo vive el lote actual.
+    Con `pipelined` extract y validate/transform corren en hilos propios,
+    solapados con la carga (ver src/pipeline/solapado.py).
+    """
+
+    queue_size = get_config()["pipeline"]["queue_size"]
+
+    logger.info(
+        f"Modo streaming — chunk_size: {chunk_size}"
+        + (f", solapado (colas de {queue_size} lotes)" if pipelined else "")
+    )
+
+    with ejecucion_solapada(queue_size) if pipelined else nullcontext() as ejecucion:
+
+        lotes = extract_listings_por_lotes(chunk_size)
+
+        if pipelined:
+            lotes = en_hilo(ejecucion, "extract", lotes)
+
+        lotes = ejecutar_validaciones_por_lotes(lotes)
+        lotes = transformar_listings_por_lotes(lotes, COLUMNAS_CARGA)
+
+        lotes = marcar_cambios_por_lotes(lotes, estado, acumulado)
+
+        if pipelined:
+            lotes = en_hilo(ejecucion, "transform", lotes)
+
+        # La carga queda en el hilo principal: una conexión, un commit
+        filas = ejecutar_carga_por_lotes(lotes)
+
+    logger.info(f"Carga al DW completada — filas: {filas}")
+
+
+def run_reviews():
+    """
+    reviews.csv → conteos diarios por listing → fact_review_daily.
+    Se lee por lotes y sólo desde el watermark de la última carga.
+    """
+
+    config = get_config()["reviews"]
+
+    if not get_data_path("reviews.csv").exists():
+        logger.info("reviews.csv no encontrado — se omite fact_review_daily")
+        return
+
+    watermark = cargar_watermark()
+
+    logger.info(f"Reviews — watermark: {watermark.date() if watermark is not None else 'ninguno'}")
+
+    lotes = extract_reviews_por_lotes(config["chunk_size"], columnas=COLUMNAS_REVIEWS)
+    agregado = agregar_reviews(lotes, watermark)
+
+    filas, nuevo_watermark = ejecutar_carga_reviews(agregado)
+
+    # Igual que el estado incremental: sólo tras el commit
+    if nuevo_watermark is not None:
+        guardar_watermark(nuevo_watermark)
+
+    logger.info(f"fact_review_daily cargada — filas: {filas}")
+
+
+def run_pipeline(
+    streaming: bool = None,
+    chunk_size: int = None,
+    incremental: bool = None,
+    profile: str = None,
+    reviews: bool = None,
+    ciudades: str = None,
+    workers: int = None,
+    forzar: bool = False,
+    compacta: bool = None,
+    pipelined: bool = None
+):
+
+    config = get_config()
+
+    if streaming is None:
+        streaming = config["pipeline"]["streaming"]
+
+    if chunk_size is None:
+        chunk_size = config["pipeline"]["chunk_size"]
+
+    if incremental is None:
+        incremental = config["incremental"]["enabled"]
+
+    if profile is None:
+        profile = config["pipeline"].get("profile")
+
+    if reviews is None:
+        reviews = config["reviews"]["enabled"]
+
+    if ciudades is None:
+        ciudades = config["data_source"].get("cities")
+
+    if workers is None:
+        workers = config["pipeline"].get("workers")
+
+    if compacta is None:
+        compacta = config["memory"]["compact"]
+
+    if pipelined is None:
+        pipelined = config["pipeline"]["pipelined"]
+
+    # El solapado es por lotes: implica streaming
+    streaming = streaming or pipelined
+
+    if ciudades and streaming:
+        raise ValueError("El modo multi-ciudad no admite streaming")
+
+    # Sin estado (modo completo o primera ejecución) todo listing cuenta como nuevo;
+    # el estado se guarda igual para que el próximo run sea incremental
+    estado = cargar_estado() if incremental else None
+    acumulado = {}
+    estado_run = "error"
+
+    start_run(profile)
 
     try:
 
         logger.info("🚀 Iniciando pipeline Airbnb")
 
-        df = extract_listings()
+        if streaming:
+
+            run_pipeline_streaming(chunk_size, estado, acumulado, pipelined)
+
+        else:
+
+            if ciudades:
+
+                # Extract → Validate → Transform de cada ciudad en paralelo
+                df = procesar_ciudades(ciudades, workers)
+
+                logger.info(f"Ciudades procesadas — filas: {len(df)}")
 
-        logger.info(f"Extract completado — filas: {len(df)}")
+            else:
 
-        df = ejecutar_validaciones_listings(df)
+                # Extract → Validate → Transform con checkpoint por etapa:
+                # sólo se recalcula desde la primera etapa que cambió
+                path = get_data_path("listings.csv")
 
-        logger.info("Validación completada")
+                df = ejecutar_etapas(
+                    etapas_listings(path, COLUMNAS_CARGA, compacta),
+                    huella_archivo(path),
+                    forzar
+                )
 
-        df = transformar_listings(df)
+                logger.info(f"Extract → Validate → Transform completados — filas: {len(df)}")
 
-        logger.info("Transformación completada")
+            # Los reportes salen del frame en memoria, sin esperar al DW
+            if config["analytics"]["enabled"]:
+                reportes = generar_reportes(df)
 
-        ejecutar_carga(df)
+                logger.info(
+                    "Reportes analíticos generados — "
+                    + ", ".join(f"{nombre}: {len(r)}" for nombre, r in reportes.items())
+                )
 
-        logger.info("Carga al DW completada")
+            df = marcar_cambios(df, estado, acumulado)
+
+            logger.info(
+                f"Listings nuevos o cambiados: "
+                f"{int(df['requiere_carga_dimension'].sum())}/{len(df)}"
+            )
+
+            filas = ejecutar_carga(df)
+
+            logger.info(f"Carga al DW completada — filas: {filas}")
+
+        # Sólo tras el commit del DW: si la carga falla, el próximo run
+        # vuelve a comparar contra el último snapshot cargado con éxito
+        confirmar_estado(acumulado)
+
+        # Después de listings: los conteos se resuelven contra dim_property
+        if reviews:
+            run_reviews()
+
+        estado_run = "ok"
 
         logger.info("✅ PIPELINE FINALIZADO CON ÉXITO")
 
@@ -37,6 +226,95 @@ def run_pipeline():
         logger.exception("🔥 ERROR EN PIPELINE")
         raise
 
+    finally:
+
+        # También en caso de error: muestra hasta dónde llegó y cuánto tardó
+        ruta = write_metrics(estado_run)
+
+        logger.info(f"Métricas del pipeline → {ruta}")
+
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Pipeline Airbnb → SQL Server DW")
+
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        default=None,
+        help="Procesa listings.csv por lotes con memoria acotada"
+    )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        default=None,
+        help="Streaming con extract, transform y load solapados en hilos (colas acotadas)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Filas por lote en modo streaming (por defecto: config.yaml)"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_false",
+        dest="incremental",
+        default=None,
+        help="Ignora el estado incremental y recarga todas las dimensiones"
+    )
+    parser.add_argument(
+        "--no-reviews",
+        action="store_false",
+        dest="reviews",
+        default=None,
+        help="Omite la carga de fact_review_daily desde reviews.csv"
+    )
+    parser.add_argument(
+        "--cities",
+        default=None,
+        help="Directorio o glob con un archivo de listings por ciudad"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Procesos para el modo multi-ciudad (por defecto: núcleos disponibles)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        dest="forzar",
+        help="Recalcula extract / validate / transform aunque haya checkpoints"
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        dest="compacta",
+        default=None,
+        help="Frame compacto (categóricas, enteros reducidos, bool) y memoria por etapa"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["cprofile", "tracemalloc"],
+        default=None,
+        help="Captura cProfile o tracemalloc además de las métricas por etapa"
+    )
+
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    run_pipeline()
+    args = parse_args()
+    run_pipeline(
+        streaming=args.streaming,
+        chunk_size=args.chunk_size,
+        incremental=args.incremental,
+        profile=args.profile,
+        reviews=args.reviews,
+        ciudades=args.cities,
+        workers=args.workers,
+        forzar=args.forzar,
+        compacta=args.compacta,
+        pipelined=args.pipelined
+    )
@@ -0,0 +1,196 @@
+import re
+from datetime import timedelta
+
+import pandas as pd
+
+from src.pipeline.warehouse import get_warehouse, leer_sql, partir_sentencias
+from src.utils.metrics import instrument
+
+
+# =====================================================
+# CARGA DE HECHOS POR PARTITION SWITCH
+# =====================================================
+#
+# dw.fact_listing_snapshot está particionada por snapshot_date (una
+# partición por día, ver sql/schema.sql). El snapshot del día se carga en
+# una staging alineada (misma definición, mismo esquema de partición),
+# se le construye el columnstore ordenado y se cambia por la partición
+# del día con TRUNCATE + SWITCH: recargar un día reemplaza su partición
+# entera, dentro de la transacción de la carga.
+#
+# SQLite (warehouse embebido) no tiene particiones: la misma staging se
+# publica con DELETE + INSERT ordenado del día, con el mismo resultado.
+
+FACT = "dw.fact_listing_snapshot"
+FACT_SWITCH = "dw.fact_listing_snapshot_switch"
+
+FUNCION_PARTICION = "pf_snapshot_date"
+ESQUEMA_PARTICION = "ps_snapshot_date"
+
+# Orden de las filas dentro de los rowgroups: los reportes agrupan por
+# barrio y cruzan por propiedad, así cada segmento cubre un rango estrecho
+ORDEN_COLUMNSTORE = ["location_key", "property_key"]
+
+
+def a_fecha(snapshot_date):
+    """
+    La fecha del snapshot llega como date (pyodbc) o texto (SQLite).
+    """
+
+    return pd.Timestamp(snapshot_date).date()
+
+
+# =====================================================
+# DDL (GENERADO DESDE sql/schema.sql)
+# =====================================================
+
+def sentencias_fact() -> dict:
+    """
+    Definición de la tabla de hechos tal como está en schema.sql:
+    CREATE TABLE, índices no agrupados y columnstore.
+    """
+
+    sentencias = [
+        codigo for codigo in partir_sentencias(leer_sql("schema.sql"))
+        if re.search(rf"\b(TABLE|ON)\s+{re.escape(FACT)}\b", codigo)
+    ]
+
+    return {
+        "tabla": next(s for s in sentencias if s.startswith("CREATE TABLE")),
+        "indices": [s for s in sentencias if re.match(r"CREATE\s+NONCLUSTERED\s+INDEX", s)],
+        "columnstore": next(s for s in sentencias if "COLUMNSTORE" in s)
+    }
+
+
+def renombrar_switch(sentencia: str) -> str:
+    """
+    Misma sentencia sobre la staging: tabla, constraints e índices con
+    sufijo _switch (los nombres de constraint son únicos por esquema).
+    """
+
+    sentencia = re.sub(rf"{re.escape(FACT)}\b", FACT_SWITCH, sentencia)
+
+    return re.sub(r"\b(CONSTRAINT|INDEX)\s+(\w+)", r"\1 \2_switch", sentencia)
+
+
+def ddl_tabla_switch(snapshot_date) -> str:
+    """
+    CREATE TABLE de la staging: columnas, PK, FKs y esquema de partición
+    idénticos a los de la tabla de hechos, más un CHECK con el día.
+    """
+
+    fecha = a_fecha(snapshot_date).isoformat()
+    tabla = renombrar_switch(sentencias_fact()["tabla"])
+
+    check = f",\n\n    CONSTRAINT CK_fact_listing_switch_date\n        CHECK (snapshot_date = '{fecha}')\n)"
+
+    # El CHECK va antes del paréntesis que cierra las columnas
+    return re.sub(
+        r"\n\)(\s*ON\s+\w+\s*\(\s*\w+\s*\))?\s*$",
+        lambda m: check + (m.group(1) or ""),
+        tabla,
+        count=1
+    )
+
+
+def ddl_limites(snapshot_date) -> list:
+    """
+    Límites del día y del siguiente: el día queda en su propia partición
+    y la última partición (a la derecha) sigue vacía, así cada SPLIT es
+    sólo de metadatos (un columnstore no admite SPLIT con datos).
+    """
+
+    fecha = a_fecha(snapshot_date)
+
+    return [
+        f"""
+    IF NOT EXISTS (
+        SELECT 1
+        FROM sys.partition_range_values v
+        JOIN sys.partition_functions f
+            ON f.function_id = v.function_id
+        WHERE f.name = '{FUNCION_PARTICION}'
+          AND CAST(v.value AS DATE) = '{limite.isoformat()}'
+    )
+    BEGIN
+        ALTER PARTITION SCHEME {ESQUEMA_PARTICION} NEXT USED [PRIMARY];
+        ALTER PARTITION FUNCTION {FUNCION_PARTICION}() SPLIT RANGE ('{limite.isoformat()}');
+    END;
+    """
+        for limite in (fecha, fecha + timedelta(days=1))
+    ]
+
+
+def ddl_indices_switch() -> list:
+    """
+    Índices de la staging una vez cargada. El columnstore se construye
+    desde un índice agrupado ordenado (DROP_EXISTING, MAXDOP 1) para que
+    los rowgroups respeten ORDEN_COLUMNSTORE; después los no agrupados
+    de schema.sql, necesarios para que el SWITCH acepte la staging.
+    """
+
+    columnstore = renombrar_switch(sentencias_fact()["columnstore"])
+    nombre = re.search(r"INDEX\s+(\w+)", columnstore).group(1)
+
+    return [
+        f"CREATE CLUSTERED INDEX {nombre} ON {FACT_SWITCH}({', '.join(ORDEN_COLUMNSTORE)});",
+        f"{columnstore}\nWITH (DROP_EXISTING = ON, MAXDOP = 1);"
+    ] + [renombrar_switch(indice) + ";" for indice in sentencias_fact()["indices"]]
+
+
+def sql_switch(particion: int) -> list:
+    """
+    Reemplazo atómico (dentro de la transacción) de la partición del día.
+    """
+
+    return [
+        f"TRUNCATE TABLE {FACT} WITH (PARTITIONS ({particion}));",
+        f"ALTER TABLE {FACT_SWITCH} SWITCH PARTITION {particion} TO {FACT} PARTITION {particion};",
+        f"DROP TABLE {FACT_SWITCH};"
+    ]
+
+
+# =====================================================
+# CARGA
+# =====================================================
+
+@instrument("load.preparar_switch")
+def preparar_switch(cursor, snapshot_date):
+    """
+    Límites de partición del día y staging alineada vacía, antes del
+    primer lote de hechos.
+    """
+
+    warehouse = get_warehouse()
+
+    if warehouse["particiones"]:
+        for sentencia in ddl_limites(snapshot_date):
+            cursor.execute(sentencia)
+
+    cursor.execute(f"DROP TABLE IF EXISTS {FACT_SWITCH};")
+    cursor.execute(warehouse["traducir"](ddl_tabla_switch(snapshot_date)))
+
+
+@instrument("load.publicar_switch")
+def publicar_switch(cursor, snapshot_date):
+    """
+    Cambia la staging ya completa por la partición del día.
+    """
+
+    orden = ", ".join(ORDEN_COLUMNSTORE)
+
+    if get_warehouse()["particiones"]:
+        for sentencia in ddl_indices_switch():
+            cursor.execute(sentencia)
+
+        cursor.execute(f"SELECT $PARTITION.{FUNCION_PARTICION}(?)", (snapshot_date,))
+        particion = int(cursor.fetchone()[0])
+
+        for sentencia in sql_switch(particion):
+            cursor.execute(sentencia)
+
+        return
+
+    cursor.execute(f"DELETE FROM {FACT} WHERE snapshot_date = ?;", (snapshot_date,))
+    cursor.execute(f"INSERT INTO {FACT} SELECT * FROM {FACT_SWITCH} ORDER BY {orden};")
+    cursor.execute(f"DROP TABLE {FACT_SWITCH};")
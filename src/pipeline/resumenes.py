@@ -0,0 +1,111 @@
+from src.utils.metrics import instrument
+
+
+# =====================================================
+# SUMMARY TABLES POR SNAPSHOT
+# =====================================================
+#
+# Una vez cargados los hechos de un snapshot se recalculan sus filas en
+# dw.agg_* (DELETE + INSERT ... GROUP BY sobre ese snapshot únicamente).
+# Guardan sumas y conteos, así los reportes combinan snapshots con
+# SUM(...) / SUM(listing_count) sin volver a leer fact_listing_snapshot.
+# SQL común a SQL Server y SQLite.
+
+RESUMENES = {
+    "dw.agg_price_neighbourhood_room": """
+
+    INSERT INTO dw.agg_price_neighbourhood_room(
+        snapshot_date,
+        neighbourhood,
+        room_type,
+        listing_count,
+        price_sum,
+        price_min,
+        price_max
+    )
+    SELECT
+        f.snapshot_date,
+        COALESCE(dl.neighbourhood, 'UNKNOWN'),
+        COALESCE(dp.room_type, 'UNKNOWN'),
+        COUNT(*),
+        SUM(f.price),
+        MIN(f.price),
+        MAX(f.price)
+    FROM dw.fact_listing_snapshot f
+    JOIN dw.dim_property dp
+        ON f.property_key = dp.property_key
+    JOIN dw.dim_location dl
+        ON f.location_key = dl.location_key
+    WHERE f.snapshot_date = ?
+      AND f.price IS NOT NULL
+    GROUP BY
+        f.snapshot_date,
+        COALESCE(dl.neighbourhood, 'UNKNOWN'),
+        COALESCE(dp.room_type, 'UNKNOWN');
+
+    """,
+
+    "dw.agg_host_snapshot": """
+
+    INSERT INTO dw.agg_host_snapshot(
+        snapshot_date,
+        host_key,
+        listing_count,
+        revenue_potential,
+        total_reviews,
+        reviews_per_month_sum
+    )
+    SELECT
+        f.snapshot_date,
+        f.host_key,
+        COUNT(*),
+        SUM(f.price * f.availability_365),
+        SUM(f.number_of_reviews),
+        SUM(COALESCE(f.reviews_per_month, 0))
+    FROM dw.fact_listing_snapshot f
+    WHERE f.snapshot_date = ?
+    GROUP BY
+        f.snapshot_date,
+        f.host_key;
+
+    """,
+
+    "dw.agg_market_neighbourhood": """
+
+    INSERT INTO dw.agg_market_neighbourhood(
+        snapshot_date,
+        neighbourhood,
+        listing_count,
+        reviews_per_month_sum,
+        total_reviews,
+        availability_sum
+    )
+    SELECT
+        f.snapshot_date,
+        COALESCE(dl.neighbourhood, 'UNKNOWN'),
+        COUNT(*),
+        SUM(COALESCE(f.reviews_per_month, 0)),
+        SUM(f.number_of_reviews),
+        SUM(f.availability_365)
+    FROM dw.fact_listing_snapshot f
+    JOIN dw.dim_location dl
+        ON f.location_key = dl.location_key
+    WHERE f.snapshot_date = ?
+    GROUP BY
+        f.snapshot_date,
+        COALESCE(dl.neighbourhood, 'UNKNOWN');
+
+    """
+}
+
+
+@instrument("load.actualizar_resumenes")
+def actualizar_resumenes(cursor, snapshot_date):
+    """
+    Recalcula las filas de `snapshot_date` en cada summary table,
+    dentro de la transacción de la carga.
+    """
+
+    for tabla, insert in RESUMENES.items():
+        cursor.execute(f"DELETE FROM {tabla} WHERE snapshot_date = ?;", (snapshot_date,))
+        cursor.execute(insert, (snapshot_date,))
@@ -0,0 +1,155 @@
+import json
+
+import pandas as pd
+from pathlib import Path
+
+from src.pipeline.cuarentena import id_ejecucion
+from src.utils.config_loader import get_config
+from src.utils.metrics import instrument
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+COLUMNAS_REVIEWS = ["listing_id", "date"]
+
+
+# =====================================================
+# WATERMARK (ÚLTIMA FECHA CARGADA)
+# =====================================================
+
+def get_watermark_path() -> Path:
+
+    return PROJECT_ROOT / get_config()["reviews"]["watermark_path"]
+
+
+def cargar_watermark():
+    """
+    Última fecha de review cargada con éxito, o None (primera ejecución).
+    """
+
+    ruta = get_watermark_path()
+
+    if not ruta.exists():
+        return None
+
+    with open(ruta, encoding="utf-8") as f:
+        return pd.Timestamp(json.load(f)["max_date"])
+
+
+def guardar_watermark(fecha: pd.Timestamp):
+    """
+    Llamar sólo después del commit del DW (escritura atómica).
+    """
+
+    ruta = get_watermark_path()
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    ruta_tmp = ruta.with_name(ruta.stem + ".tmp.json")
+
+    with open(ruta_tmp, "w", encoding="utf-8") as f:
+        json.dump({"max_date": fecha.strftime("%Y-%m-%d")}, f)
+
+    ruta_tmp.replace(ruta)
+
+
+def nuevo_watermark(agregado: pd.DataFrame, sin_listing: pd.Series):
+    """
+    Fecha máxima del agregado, salvo que haya conteos de listings fuera de
+    dim_property (`sin_listing`): entonces la del primero de ellos, pero
+    nunca más de reviews.max_pending_days antes de la máxima. Así un listing
+    que no llega nunca (p. ej. en cuarentena) no congela el watermark.
+    """
+
+    maximo = agregado["review_date"].max()
+
+    if not sin_listing.any():
+        return maximo
+
+    limite = maximo - pd.Timedelta(days=get_config()["reviews"]["max_pending_days"])
+
+    return max(agregado.loc[sin_listing, "review_date"].min(), limite)
+
+
+def guardar_huerfanas(huerfanas: pd.DataFrame) -> Path:
+    """
+    Conteos que quedan detrás del watermark sin haberse cargado: un Parquet
+    por ejecución en reviews.orphans_dir, para revisarlos o recargarlos.
+    """
+
+    directorio = PROJECT_ROOT / get_config()["reviews"]["orphans_dir"]
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    ruta = directorio / f"run={id_ejecucion()}.parquet"
+    huerfanas.to_parquet(ruta, index=False)
+
+    return ruta
+
+
+# =====================================================
+# AGREGADOS PARCIALES (MERGEABLES)
+# =====================================================
+#
+# Cada lote se reduce a conteos por (listing_id, review_date). Dos parciales
+# se combinan sumando por clave, así que el orden de los lotes no importa y
+# en memoria sólo viven conteos, nunca las reviews.
+#
+# El día del watermark se vuelve a procesar entero (>=): la carga reemplaza
+# los días >= watermark, así una review tardía de ese día no se pierde.
+
+def agregar_lote(lote: pd.DataFrame, watermark=None) -> pd.Series:
+    """
+    Reviews crudas → conteo por (listing_id, review_date).
+    """
+
+    fechas = pd.to_datetime(lote["date"], errors="coerce", format="%Y-%m-%d")
+    validas = fechas.notna() & lote["listing_id"].notna()
+
+    if watermark is not None:
+        validas &= fechas >= watermark
+
+    claves = pd.DataFrame({
+        "listing_id": lote.loc[validas, "listing_id"].astype("int64"),
+        "review_date": fechas[validas]
+    })
+
+    return claves.value_counts(sort=False).rename("review_count")
+
+
+def combinar_parciales(parciales: list) -> pd.Series:
+
+    if len(parciales) == 1:
+        return parciales[0]
+
+    return pd.concat(parciales).groupby(level=["listing_id", "review_date"], sort=False).sum()
+
+
+@instrument("reviews.agregar")
+def agregar_reviews(lotes, watermark=None) -> pd.DataFrame:
+    """
+    Agrega todos los lotes en conteos diarios por listing.
+    Los parciales se compactan al superar reviews.max_partial_rows filas.
+    """
+
+    limite = get_config()["reviews"]["max_partial_rows"]
+
+    parciales = []
+    filas = 0
+
+    for lote in lotes:
+        parcial = agregar_lote(lote, watermark)
+
+        parciales.append(parcial)
+        filas += len(parcial)
+
+        if filas > limite:
+            parciales = [combinar_parciales(parciales)]
+            filas = len(parciales[0])
+
+    if not parciales:
+        return pd.DataFrame({
+            "listing_id": pd.Series(dtype="int64"),
+            "review_date": pd.Series(dtype="datetime64[ns]"),
+            "review_count": pd.Series(dtype="int64")
+        })
+
+    return combinar_parciales(parciales).reset_index()
@@ -0,0 +1,333 @@
+import pandas as pd
+
+from src.pipeline.bulk_load import cargar_masivo
+from src.pipeline.key_cache import CLAVES_LOCATION, refrescar_cache
+from src.pipeline.warehouse import crear_stage, get_warehouse
+from src.utils.config_loader import get_config
+from src.utils.metrics import instrument
+
+
+# =====================================================
+# MOTOR SCD POR HASH DE FILA
+# =====================================================
+#
+# Cada dimensión guarda row_hash: hash de 64 bits (vectorizado, en Python)
+# de sus columnas rastreadas. El staging lleva el mismo hash, así detectar
+# un cambio es una única comparación indexada (s.row_hash <> d.row_hash)
+# sin importar cuántas columnas se rastreen.
+#
+# Tipo y columnas rastreadas por dimensión en config.yaml (scd):
+#
+#   type 1: la fila se actualiza en el lugar
+#   type 2: se cierra la versión vigente (end_date, is_current = 0)
+#           y se inserta una nueva (requiere columnas de vigencia)
+#
+# dw.scd_hash_signature guarda con qué columnas se calcularon los hashes
+# guardados. Si la lista cambia, se recalculan desde el DW antes del
+# merge: agregar un atributo no genera versiones nuevas de todo.
+
+# Definición física (fija): tabla, surrogate key, business key y
+# columnas de atributo (con los nombres de la tabla de staging); las
+# numéricas se hashean como número y el resto como texto
+DIMENSIONES = {
+    "host": {
+        "tabla": "dw.dim_host",
+        "clave": "host_key",
+        "negocio": ["host_id"],
+        "atributos": ["host_name", "calculated_host_listings_count"],
+        "numericas": ["calculated_host_listings_count"],
+        "versionada": True
+    },
+    "location": {
+        "tabla": "dw.dim_location",
+        "clave": "location_key",
+        "negocio": CLAVES_LOCATION,
+        "atributos": ["latitude", "longitude"],
+        "numericas": ["latitude", "longitude"],
+        "versionada": False
+    },
+    "property": {
+        "tabla": "dw.dim_property",
+        "clave": "property_key",
+        "negocio": ["listing_id"],
+        "atributos": ["listing_name", "room_type", "minimum_nights", "license"],
+        "numericas": ["minimum_nights"],
+        "versionada": False
+    }
+}
+
+# Los decimales del DW (DECIMAL(9,6)) y los float del staging hashean igual
+DECIMALES_HASH = 6
+
+
+def get_politica(nombre: str) -> dict:
+    """
+    Política de config.yaml validada contra la definición física.
+    """
+
+    dimension = DIMENSIONES[nombre]
+    politica = get_config()["scd"][nombre]
+
+    if politica["type"] not in (1, 2):
+        raise ValueError(f"scd.{nombre}.type debe ser 1 o 2: {politica['type']}")
+
+    if politica["type"] == 2 and not dimension["versionada"]:
+        raise ValueError(f"{dimension['tabla']} no tiene columnas de vigencia para SCD tipo 2")
+
+    desconocidas = [col for col in politica["tracked"] if col not in dimension["atributos"]]
+
+    if desconocidas or not politica["tracked"]:
+        raise ValueError(
+            f"scd.{nombre}.tracked debe ser un subconjunto no vacío de "
+            f"{dimension['atributos']}: {politica['tracked']}"
+        )
+
+    return politica
+
+
+# =====================================================
+# HASH DE FILA (VECTORIZADO)
+# =====================================================
+
+def columna_canonica(serie: pd.Series, numerica: bool) -> pd.Series:
+    """
+    Misma representación venga del frame transformado (int16, categórica,
+    str) o del DW (int, Decimal, str): el hash no depende del dtype.
+    """
+
+    if numerica:
+        return pd.to_numeric(serie, errors="coerce").astype("float64").round(DECIMALES_HASH)
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Se hashea una vez por categoría (igual que los mismos valores como texto)
+        return serie.cat.rename_categories(serie.cat.categories.astype(object))
+
+    return serie.astype(object).where(serie.notna(), None)
+
+
+def hash_filas(df: pd.DataFrame, columnas: list, numericas: list = ()) -> pd.Series:
+    """
+    row_hash de cada fila (BIGINT: uint64 reinterpretado como int64).
+    """
+
+    canonico = pd.DataFrame(
+        {col: columna_canonica(df[col], col in numericas) for col in columnas},
+        index=df.index
+    )
+
+    hashes = pd.util.hash_pandas_object(canonico, index=False).to_numpy()
+
+    return pd.Series(hashes.view("int64"), index=df.index)
+
+
+def preparar_stage(nombre: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frame de staging de la dimensión: una fila por business key
+    (gana la última) más su row_hash.
+    """
+
+    dimension = DIMENSIONES[nombre]
+    politica = get_politica(nombre)
+
+    df = df.drop_duplicates(dimension["negocio"], keep="last")
+
+    return df.assign(row_hash=hash_filas(df, politica["tracked"], dimension["numericas"]))
+
+
+# =====================================================
+# FIRMA DE LOS HASHES GUARDADOS
+# =====================================================
+
+def firma(politica: dict) -> str:
+
+    return ",".join(politica["tracked"])
+
+
+@instrument("load.scd.rehash")
+def recalcular_hashes(cursor, nombre: str, politica: dict):
+    """
+    row_hash de todas las filas de la dimensión con las columnas rastreadas
+    actuales (también las que nunca lo tuvieron, p. ej. tras agregar la columna).
+    """
+
+    dimension = DIMENSIONES[nombre]
+
+    cursor.execute(f"""
+    SELECT {dimension["clave"]}, {", ".join(politica["tracked"])}
+    FROM {dimension["tabla"]}
+    """)
+
+    filas = pd.DataFrame.from_records(
+        cursor.fetchall(),
+        columns=[dimension["clave"]] + politica["tracked"]
+    )
+
+    if filas.empty:
+        return
+
+    hashes = pd.DataFrame({
+        "clave": filas[dimension["clave"]].astype("int64"),
+        "row_hash": hash_filas(filas, politica["tracked"], dimension["numericas"])
+    })
+
+    stage = get_warehouse()["stage"]("scd_hash_stage")
+
+    crear_stage(cursor, stage, "clave INT, row_hash BIGINT", clave=["clave"])
+
+    cargar_masivo(cursor, hashes, stage)
+
+    cursor.execute(f"""
+
+    UPDATE {dimension["tabla"]}
+    SET row_hash = h.row_hash
+    FROM {stage} h
+    WHERE h.clave = {dimension["tabla"].split(".")[1]}.{dimension["clave"]};
+
+    """)
+
+
+def sincronizar_firma(cursor, nombre: str, politica: dict):
+    """
+    Si los hashes guardados se calcularon con otras columnas (o no hay
+    firma), se recalculan antes de comparar contra el staging.
+    """
+
+    cursor.execute("SELECT tracked FROM dw.scd_hash_signature WHERE dimension = ?", (nombre,))
+    fila = cursor.fetchone()
+
+    if fila is not None and fila[0] == firma(politica):
+        return
+
+    recalcular_hashes(cursor, nombre, politica)
+
+    cursor.execute("DELETE FROM dw.scd_hash_signature WHERE dimension = ?", (nombre,))
+    cursor.execute(
+        "INSERT INTO dw.scd_hash_signature(dimension, tracked) VALUES (?, ?)",
+        (nombre, firma(politica))
+    )
+
+
+# =====================================================
+# MERGE (SQL COMÚN A SQL SERVER Y SQLITE)
+# =====================================================
+#
+# Los UPDATE son UPDATE ... FROM (SQL Server, SQLite >= 3.33): un join
+# staging → dimensión por el índice de business key, no una subconsulta
+# correlacionada por fila de la dimensión y por columna.
+
+def condicion_negocio(dimension: dict, stage: str = "s", destino: str = None) -> str:
+
+    destino = destino or dimension["tabla"].split(".")[1]
+
+    return " AND ".join(f"{stage}.{col} = {destino}.{col}" for col in dimension["negocio"])
+
+
+def sql_tipo_1(dimension: dict, stage: str) -> str:
+    """
+    UPDATE en el lugar de las filas cuyo hash cambió.
+    En una tabla versionada sólo se toca la versión vigente.
+    """
+
+    destino = dimension["tabla"].split(".")[1]
+    filtro_vigente = f"\n      AND {destino}.is_current = 1" if dimension["versionada"] else ""
+
+    asignaciones = ",\n        ".join(
+        f"{col} = s.{col}"
+        for col in dimension["atributos"] + ["row_hash"]
+    )
+
+    return f"""
+
+    UPDATE {dimension["tabla"]}
+    SET {asignaciones}
+    FROM {stage} s
+    WHERE {condicion_negocio(dimension)}{filtro_vigente}
+      AND s.row_hash <> {destino}.row_hash;
+
+    """
+
+
+def sql_cerrar_versiones(dimension: dict, stage: str) -> str:
+
+    destino = dimension["tabla"].split(".")[1]
+
+    return f"""
+
+    UPDATE {dimension["tabla"]}
+    SET end_date = ?,
+        is_current = 0
+    FROM {stage} s
+    WHERE {condicion_negocio(dimension)}
+      AND {destino}.is_current = 1
+      AND s.row_hash <> {destino}.row_hash;
+
+    """
+
+
+def sql_insertar(dimension: dict, stage: str, versionada: bool) -> str:
+    """
+    Business keys sin fila (vigente, en tipo 2): nuevas o recién cerradas.
+    """
+
+    columnas = dimension["negocio"] + dimension["atributos"] + ["row_hash"]
+    vigencia = ["effective_date", "is_current"] if versionada else []
+
+    valores = [f"s.{col}" for col in columnas] + (["?", "1"] if versionada else [])
+    filtro_vigente = "\n          AND d.is_current = 1" if versionada else ""
+
+    return f"""
+
+    INSERT INTO {dimension["tabla"]}(
+        {", ".join(columnas + vigencia)}
+    )
+    SELECT
+        {", ".join(valores)}
+    FROM {stage} s
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM {dimension["tabla"]} d
+        WHERE {condicion_negocio(dimension, destino="d")}{filtro_vigente}
+    );
+
+    """
+
+
+def sql_claves(dimension: dict, stage: str, versionada: bool) -> str:
+
+    filtro_vigente = "\n    WHERE d.is_current = 1" if versionada else ""
+
+    return f"""
+    SELECT {", ".join(f"d.{col}" for col in dimension["negocio"])}, d.{dimension["clave"]}
+    FROM {dimension["tabla"]} d
+    JOIN {stage} s
+        ON {condicion_negocio(dimension, destino="d")}{filtro_vigente};
+    """
+
+
+def aplicar_scd(cursor, cache: dict, nombre: str, stage: str):
+    """
+    Staging (con row_hash) → dimensión según su política + refresco de la
+    caché de claves. Las fechas de vigencia son la fecha del snapshot.
+    """
+
+    dimension = DIMENSIONES[nombre]
+    politica = get_politica(nombre)
+    versionada = dimension["versionada"]
+
+    sincronizar_firma(cursor, nombre, politica)
+
+    if politica["type"] == 2:
+        cursor.execute(sql_cerrar_versiones(dimension, stage), (cache["snapshot_date"],))
+    else:
+        cursor.execute(sql_tipo_1(dimension, stage))
+
+    insercion = sql_insertar(dimension, stage, versionada)
+
+    if versionada:
+        cursor.execute(insercion, (cache["snapshot_date"],))
+    else:
+        cursor.execute(insercion)
+
+    cursor.execute(sql_claves(dimension, stage, versionada))
+
+    refrescar_cache(cache, nombre, cursor.fetchall())
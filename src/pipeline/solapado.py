@@ -0,0 +1,182 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+from src.utils.metrics import measure
+
+
+# =====================================================
+# EJECUCIÓN SOLAPADA (PRODUCTOR / CONSUMIDOR)
+# =====================================================
+#
+# En modo streaming cada etapa es un generador. Con pipeline.pipelined
+# (o --pipelined) extract y validate/transform corren en hilos propios,
+# unidos por colas acotadas, y la carga consume desde el hilo principal:
+#
+#   [extract] → cola → [validate → transform → incremental] → cola → [load]
+#
+# Mientras se carga el lote N-1 se transforma el N y se parsea el N+1
+# (el parser, NumPy y las esperas de red liberan el GIL).
+#
+#   contrapresión: con la cola llena el productor espera (memoria acotada
+#                  a queue_size lotes por cola)
+#   errores:       el primero se guarda, todas las etapas se cancelan y el
+#                  consumidor lo relanza: la carga hace rollback
+#   commit:        único, al final de ejecutar_carga_por_lotes
+
+FIN = object()
+
+# Cada cuánto una espera en cola revisa si la ejecución se canceló (segundos)
+INTERVALO_CANCELACION = 0.1
+
+
+@contextmanager
+def ejecucion_solapada(queue_size: int):
+    """
+    with ejecucion_solapada(2) as ejecucion:
+        lotes = en_hilo(ejecucion, "extract", lotes)
+        ...
+
+    Al salir (con o sin error) cancela las etapas que sigan vivas y
+    espera a que terminen sus hilos.
+    """
+
+    ejecucion = {
+        "queue_size": queue_size,
+        "cancelada": threading.Event(),
+        "error": None,
+        "lock": threading.Lock(),
+        "hilos": []
+    }
+
+    try:
+        yield ejecucion
+    except BaseException as e:
+        registrar_error(ejecucion, e)
+        raise
+    finally:
+        ejecucion["cancelada"].set()
+
+        for hilo in ejecucion["hilos"]:
+            hilo.join()
+
+    # Error de una etapa que ningún consumidor llegó a leer
+    if ejecucion["error"] is not None:
+        raise ejecucion["error"]
+
+
+def registrar_error(ejecucion: dict, error: BaseException):
+    """
+    Guarda el primer error y cancela todas las etapas.
+    """
+
+    with ejecucion["lock"]:
+        if ejecucion["error"] is None:
+            ejecucion["error"] = error
+
+    ejecucion["cancelada"].set()
+
+
+def verificar(ejecucion: dict):
+    """
+    Relanza el error de otra etapa (o corta si la ejecución se canceló).
+    """
+
+    if ejecucion["error"] is not None:
+        raise ejecucion["error"]
+
+    if ejecucion["cancelada"].is_set():
+        raise RuntimeError("Ejecución solapada cancelada")
+
+
+# =====================================================
+# COLAS ACOTADAS
+# =====================================================
+
+def poner(ejecucion: dict, cola: queue.Queue, item) -> bool:
+    """
+    put bloqueante (contrapresión) que se rinde si la ejecución se cancela.
+    """
+
+    while not ejecucion["cancelada"].is_set():
+        try:
+            cola.put(item, timeout=INTERVALO_CANCELACION)
+            return True
+        except queue.Full:
+            continue
+
+    return False
+
+
+def productor(ejecucion: dict, nombre: str, lotes, cola: queue.Queue):
+    """
+    Hilo de la etapa: recorre su generador y entrega cada lote a la cola.
+    """
+
+    try:
+        iterador = iter(lotes)
+
+        while not ejecucion["cancelada"].is_set():
+            try:
+                lote = next(iterador)
+            except StopIteration:
+                poner(ejecucion, cola, FIN)
+                return
+
+            with measure(f"pipelined.{nombre}.espera_consumidor"):
+                if not poner(ejecucion, cola, lote):
+                    return
+
+    except BaseException as e:
+        registrar_error(ejecucion, e)
+
+    finally:
+        # Cierra la cadena de generadores de la etapa (sus finally:
+        # cuarentena, lector del CSV) en el mismo hilo que la recorría
+        if hasattr(lotes, "close"):
+            try:
+                lotes.close()
+            except Exception as e:
+                registrar_error(ejecucion, e)
+
+
+def en_hilo(ejecucion: dict, nombre: str, lotes):
+    """
+    Corre el generador `lotes` en un hilo propio y devuelve un generador
+    que consume su salida desde una cola de queue_size lotes.
+    """
+
+    cola = queue.Queue(maxsize=ejecucion["queue_size"])
+
+    hilo = threading.Thread(
+        target=productor,
+        args=(ejecucion, nombre, lotes, cola),
+        name=f"pipelined-{nombre}",
+        daemon=True
+    )
+    ejecucion["hilos"].append(hilo)
+    hilo.start()
+
+    return consumir(ejecucion, nombre, cola)
+
+
+def consumir(ejecucion: dict, nombre: str, cola: queue.Queue):
+
+    while True:
+        with measure(f"pipelined.{nombre}.espera_productor"):
+            while True:
+                verificar(ejecucion)
+
+                try:
+                    lote = cola.get(timeout=INTERVALO_CANCELACION)
+                    break
+                except queue.Empty:
+                    continue
+
+        if lote is FIN:
+            return
+
+        # Otra etapa pudo fallar mientras este lote esperaba en la cola
+        verificar(ejecucion)
+
+        yield lote
@@ -1,76 +1,209 @@
+import contextlib
+
+import numpy as np
 import pandas as pd
 
+from src.pipeline.amenities import flags_amenities, tokenizar_amenities
+from src.pipeline.espacial import celdas_geohash
+from src.utils.config_loader import get_config
+from src.utils.metrics import instrument, measure
+
 
 # =====================================================
-# LIMPIEZA CRÍTICA DE CLAVES DIMENSIONALES
-# (ESTO ES LO MÁS IMPORTANTE DEL PIPELINE)
+# HELPERS DE TIPOS
 # =====================================================
 
-def limpiar_claves_dimensionales(df: pd.DataFrame):
+def es_categorica(serie: pd.Series) -> bool:
+
+    return isinstance(serie.dtype, pd.CategoricalDtype)
+
+
+def es_texto(serie: pd.Series) -> bool:
+
+    return pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)
+
+
+def transformar_categorias(serie: pd.Series, funcion) -> pd.Series:
     """
-    Nunca permitimos NULL en claves de dimensión.
-    Regla básica de Data Warehousing.
+    Aplica `funcion` (operaciones .str) una vez por categoría
+    en lugar de una vez por fila.
     """
 
-    columnas_location = ["neighbourhood_group", "neighbourhood"]
+    categorias = funcion(pd.Series(serie.cat.categories.astype(str)))
+    codigos_nuevos, unicas = pd.factorize(categorias)
 
-    for col in columnas_location:
-        df[col] = (
-            df[col]
-            .fillna("UNKNOWN")
-            .astype(str)
-            .str.strip()
-            .str.upper()
-        )
+    # El código -1 (nulo) se mantiene como nulo
+    codigos = np.append(codigos_nuevos, -1)[serie.cat.codes.to_numpy()]
+
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=unicas),
+        index=serie.index,
+        name=serie.name
+    )
+
+
+def rellenar_nulos(serie: pd.Series, valor) -> pd.Series:
+
+    if es_categorica(serie) and valor not in serie.cat.categories:
+        serie = serie.cat.add_categories([valor])
+
+    return serie.fillna(valor)
+
+
+def asegurar_tipo(serie: pd.Series, dtype: str) -> pd.Series:
+    """
+    Evita un astype (y su copia) cuando la columna ya viene tipada del extract.
+    """
+
+    if serie.dtype == dtype:
+        return serie
+
+    return serie.astype(dtype)
 
-    return df
 
 
 # =====================================================
-# LIMPIEZA Y NORMALIZACIÓN
+# LIMPIEZA CRÍTICA DE CLAVES DIMENSIONALES + TEXTOS
+# (ESTO ES LO MÁS IMPORTANTE DEL PIPELINE)
 # =====================================================
 
-def normalizar_precio(df: pd.DataFrame):
+# Operaciones de texto fusionadas por columna: se aplican en una sola
+# pasada (relleno → strip → upper) en lugar de encadenar
+# fillna / astype(str) / .str.strip / .str.upper sobre la columna completa.
+# Nunca permitimos NULL en claves de dimensión.
+OPERACIONES_TEXTO = {
+    "market": {"relleno": "UNKNOWN", "strip": True, "upper": True},
+    "neighbourhood_group": {"relleno": "UNKNOWN", "strip": True, "upper": True},
+    "neighbourhood": {"relleno": "UNKNOWN", "strip": True, "upper": True},
+    "name": {"relleno": "UNKNOWN", "strip": True, "upper": False},
+    "room_type": {"relleno": "UNKNOWN", "strip": True, "upper": False},
+    "host_name": {"relleno": "UNKNOWN", "strip": False, "upper": False},
+    "license": {"relleno": "UNKNOWN", "strip": False, "upper": False}
+}
 
-    df["price"] = (
-        df["price"]
-        .astype(str)
-        .str.replace("$", "", regex=False)
-        .str.replace(",", "", regex=False)
-    )
 
-    df["price"] = pd.to_numeric(df["price"], errors="coerce")
+def es_nulo(valor) -> bool:
+
+    return valor is None or valor is pd.NA or (isinstance(valor, float) and valor != valor)
+
+
+def componer_operaciones_texto(operaciones: dict):
+    """
+    Devuelve una función valor → valor con todas las operaciones de la columna.
+    """
+
+    relleno = operaciones["relleno"]
+    strip = operaciones["strip"]
+    upper = operaciones["upper"]
+
+    def aplicar(valor):
+
+        if es_nulo(valor):
+            return relleno
+
+        valor = str(valor)
+
+        if strip:
+            valor = valor.strip()
+        if upper:
+            valor = valor.upper()
+
+        return valor
+
+    return aplicar
+
+
+def normalizar_por_valor(serie: pd.Series, aplicar) -> pd.Series:
+    """
+    Columna de texto sin categorías: `aplicar` una vez por valor distinto
+    (factorize) y no una vez por fila. El nulo (código -1) usa el último.
+    """
+
+    codigos, unicos = pd.factorize(serie)
+    valores = np.array([aplicar(v) for v in unicos] + [aplicar(None)], dtype=object)
+
+    return pd.Series(valores[codigos], index=serie.index, name=serie.name)
+
+
+def normalizar_textos(df: pd.DataFrame):
+    """
+    Una sola asignación por columna de texto. Cada valor distinto
+    (categoría o no) se normaliza una sola vez, no una vez por fila.
+    """
+
+    for col, operaciones in OPERACIONES_TEXTO.items():
+        if col not in df.columns:
+            continue
+
+        aplicar = componer_operaciones_texto(operaciones)
+
+        if es_categorica(df[col]):
+            serie = rellenar_nulos(df[col], operaciones["relleno"])
+            df[col] = transformar_categorias(serie, lambda s: s.map(aplicar))
+        else:
+            df[col] = normalizar_por_valor(df[col], aplicar)
 
     return df
 
 
-def sanitizar_precio(df: pd.DataFrame):
+def asignar_mercado(df: pd.DataFrame):
     """
-    Evita outliers absurdos.
+    Un único archivo (data/listings.csv) no trae ciudad: mercado UNKNOWN.
+    En modo multi-ciudad la columna ya viene del extract.
     """
 
-    df = df[df["price"] < 10000]
+    if "market" not in df.columns:
+        df["market"] = pd.Categorical.from_codes(np.zeros(len(df), dtype="int8"), categories=["UNKNOWN"])
 
     return df
 
 
-def estandarizar_textos(df: pd.DataFrame):
+# =====================================================
+# LIMPIEZA Y NORMALIZACIÓN
+# =====================================================
 
-    columnas_texto = ["name", "room_type"]
+def normalizar_precio(df: pd.DataFrame):
 
-    for col in columnas_texto:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
+    # Con el esquema tipado el precio ya llega numérico
+    if pd.api.types.is_numeric_dtype(df["price"]):
+        return df
+
+    df["price"] = pd.to_numeric(
+        df["price"].astype(str).str.replace(r"[$,]", "", regex=True),
+        errors="coerce"
+    )
+
+    return df
+
+
+def sanitizar_precio(df: pd.DataFrame):
+    """
+    Evita outliers absurdos (mismo límite que validation.max_price).
+    """
+
+    max_price = get_config()["validation"]["max_price"]
+
+    df = df[df["price"] < max_price]
 
     return df
 
 
 def convertir_booleanos(df: pd.DataFrame):
+    """
+    Las columnas declaradas en el esquema ya se parsean como booleanas;
+    sólo se inspeccionan columnas de texto sin tipo declarado.
+    """
 
     boolean_map = {"t": True, "f": False}
 
+    esquema = get_config()["schema"]["listings"]
+    declaradas = set(esquema["dtypes"]) | set(esquema["categorical"]) | set(esquema["boolean"])
+
     for col in df.columns:
-        if df[col].dtype == "object":
+        if col in declaradas or es_categorica(df[col]):
+            continue
+
+        if es_texto(df[col]):
             valores_unicos = set(df[col].dropna().unique())
 
             if valores_unicos.issubset({"t", "f"}):
@@ -79,70 +212,48 @@ def convertir_booleanos(df: pd.DataFrame):
     return df
 
 
-def forzar_columnas_texto(df: pd.DataFrame):
-
-    columnas_texto = [
-        "host_name",
-        "room_type",
-        "license",
-        "name"
-    ]
-
-    for col in columnas_texto:
-        if col in df.columns:
-            df[col] = df[col].fillna("UNKNOWN").astype(str)
-
-    return df
-
-
 # =====================================================
 # TIPOS SQL
 # =====================================================
 
-def forzar_tipos_sql(df: pd.DataFrame):
-
-    df["host_id"] = df["host_id"].astype("int64")
-    df["id"] = df["id"].astype("int64")
+TIPOS_SQL = {
+    "host_id": {"dtype": "int64"},
+    "id": {"dtype": "int64"},
+    "calculated_host_listings_count": {"relleno": 0, "rango": (0, 10000), "dtype": "int32"},
+    "minimum_nights": {"relleno": 1, "rango": (1, 365), "dtype": "int32"},
+    "availability_365": {"rango": (0, 365), "dtype": "int32"},
+    "number_of_reviews": {"relleno": 0, "dtype": "int32"},
+    "number_of_reviews_ltm": {"relleno": 0, "rango": (0, 10000), "dtype": "int32"},  # regla de negocio razonable
+    "reviews_per_month": {"relleno": 0, "rango": (0, 50), "dtype": "float64"}  # nadie recibe 200 reviews/mes
+}
 
-    df["calculated_host_listings_count"] = (
-        df["calculated_host_listings_count"]
-        .fillna(0)
-        .clip(0, 10000)
-        .astype("int32")
-    )
 
-    df["minimum_nights"] = (
-        df["minimum_nights"]
-        .fillna(1)
-        .clip(1, 365)
-        .astype("int32")
-    )
+def forzar_tipos_sql(df: pd.DataFrame):
+    """
+    fillna + clip + astype fusionados: el relleno se aplica al pasar a
+    NumPy y el clip se hace in-place sobre ese mismo buffer.
+    """
 
-    df["availability_365"] = (
-        df["availability_365"]
-        .clip(0, 365)
-        .astype("int32")
-    )
+    for col, regla in TIPOS_SQL.items():
+        if col not in df.columns:
+            continue
 
-    df["number_of_reviews_ltm"] = (
-        df["number_of_reviews_ltm"]
-        .fillna(0)
-        .clip(0, 10000)   # regla de negocio razonable
-        .astype("int32")
-    )
-    df["reviews_per_month"] = (
-        df["reviews_per_month"]
-        .fillna(0)
-        .clip(0, 50)   # nadie recibe 200 reviews/mes
-    )
+        # Sin relleno un nulo debe fallar en el astype, como siempre
+        if "relleno" not in regla:
+            serie = df[col].clip(*regla["rango"]) if "rango" in regla else df[col]
+            df[col] = asegurar_tipo(serie, regla["dtype"])
+            continue
 
-    return df
+        valores = df[col].to_numpy(dtype="float64", na_value=regla["relleno"])
 
+        # Con Copy-on-Write la vista puede ser de sólo lectura
+        if not valores.flags.writeable:
+            valores = valores.copy()
 
-def convertir_numpy_a_python(df: pd.DataFrame):
+        if "rango" in regla:
+            np.clip(valores, *regla["rango"], out=valores)
 
-    for col in df.select_dtypes(include=["int64", "int32"]).columns:
-        df[col] = df[col].astype(object)
+        df[col] = valores.astype(regla["dtype"], copy=False)
 
     return df
 
@@ -152,29 +263,52 @@ def convertir_numpy_a_python(df: pd.DataFrame):
 # =====================================================
 
 def parsear_amenities(df: pd.DataFrame):
+    """
+    Tokeniza cada lista distinta una sola vez → categórica canónica
+    ("kitchen|wifi"). Ver src/pipeline/amenities.py.
+    """
 
     if "amenities" not in df.columns:
         return df
 
-    df["amenities"] = (
-        df["amenities"]
-        .str.replace("{", "", regex=False)
-        .str.replace("}", "", regex=False)
-        .str.replace('"', "", regex=False)
-        .str.lower()
-    )
+    df["amenities"] = tokenizar_amenities(df["amenities"])
 
     return df
 
 
+def nombres_flags_amenities() -> list:
+
+    return list(get_config()["amenities"]["flags"])
+
+
 def crear_flags_amenities(df: pd.DataFrame):
+    """
+    Flags declarados en config.yaml (amenities.flags), evaluados
+    sobre el vocabulario y no fila a fila.
+    """
 
     if "amenities" not in df.columns:
         return df
 
-    df["tiene_wifi"] = df["amenities"].str.contains("wifi", na=False)
-    df["tiene_cocina"] = df["amenities"].str.contains("kitchen", na=False)
-    df["tiene_estacionamiento"] = df["amenities"].str.contains("parking", na=False)
+    for nombre, valores in flags_amenities(df["amenities"], get_config()["amenities"]["flags"]).items():
+        df[nombre] = valores
+
+    return df
+
+
+# =====================================================
+# UBICACIÓN (CELDA GEOHASH)
+# =====================================================
+
+def asignar_celda(df: pd.DataFrame):
+    """
+    Celda geohash de cada listing (location.geohash_precision): clave
+    espacial de dim_location en lugar de las coordenadas exactas.
+    """
+
+    precision = get_config()["location"]["geohash_precision"]
+
+    df["geohash"] = celdas_geohash(df["latitude"], df["longitude"], precision)
 
     return df
 
@@ -212,44 +346,168 @@ def clasificar_precio(df: pd.DataFrame):
 # SURROGATE KEYS
 # =====================================================
 
-def generar_surrogate_keys(df: pd.DataFrame):
+def generar_surrogate_keys(df: pd.DataFrame, inicio: int = 0):
+    """
+    `inicio` desplaza las claves para que sigan siendo únicas entre lotes.
+    """
 
     df = df.reset_index(drop=True)
-    df["listing_sk_temp"] = df.index + 1
+    df["listing_sk_temp"] = df.index + 1 + inicio
 
     return df
 
 
+# =====================================================
+# PLAN DE TRANSFORMACIÓN
+# =====================================================
+
+# Cada paso declara qué columnas lee y cuáles escribe (una función si
+# dependen de config.yaml). Los pasos con `siempre` filtran filas o fijan
+# tipos de todo el frame y no se omiten; las salidas de los pasos con
+# `conservar` (flags para analistas) se agregan a cualquier salida pedida.
+PASOS = [
+    {"nombre": "normalizar_precio", "funcion": normalizar_precio,
+     "entradas": ["price"], "salidas": ["price"], "siempre": True},
+    {"nombre": "sanitizar_precio", "funcion": sanitizar_precio,
+     "entradas": ["price"], "salidas": [], "siempre": True},
+    {"nombre": "asignar_mercado", "funcion": asignar_mercado,
+     "entradas": [], "salidas": ["market"]},
+    {"nombre": "normalizar_textos", "funcion": normalizar_textos,
+     "entradas": list(OPERACIONES_TEXTO), "salidas": list(OPERACIONES_TEXTO)},
+    {"nombre": "convertir_booleanos", "funcion": convertir_booleanos,
+     "entradas": [], "salidas": [], "siempre": True},
+    {"nombre": "parsear_amenities", "funcion": parsear_amenities,
+     "entradas": ["amenities"], "salidas": ["amenities"]},
+    {"nombre": "crear_flags_amenities", "funcion": crear_flags_amenities,
+     "entradas": ["amenities"], "salidas": nombres_flags_amenities, "conservar": True},
+    {"nombre": "asignar_celda", "funcion": asignar_celda,
+     "entradas": ["latitude", "longitude"], "salidas": ["geohash"]},
+    {"nombre": "calcular_ingreso_estimado", "funcion": calcular_ingreso_estimado,
+     "entradas": ["price", "availability_365"], "salidas": ["ingreso_estimado"]},
+    {"nombre": "calcular_tasa_ocupacion", "funcion": calcular_tasa_ocupacion,
+     "entradas": ["availability_365"], "salidas": ["tasa_ocupacion"]},
+    {"nombre": "clasificar_precio", "funcion": clasificar_precio,
+     "entradas": ["price"], "salidas": ["categoria_precio"]},
+    {"nombre": "forzar_tipos_sql", "funcion": forzar_tipos_sql,
+     "entradas": list(TIPOS_SQL), "salidas": list(TIPOS_SQL)},
+    {"nombre": "generar_surrogate_keys", "funcion": generar_surrogate_keys,
+     "entradas": [], "salidas": ["listing_sk_temp"]}
+]
+
+
+def salidas_paso(paso: dict) -> list:
+
+    salidas = paso["salidas"]
+
+    return salidas() if callable(salidas) else salidas
+
+
+def planificar_transformacion(df: pd.DataFrame, columnas_salida: list = None) -> dict:
+    """
+    Recorre los pasos de atrás hacia adelante y conserva sólo los que
+    producen alguna columna necesaria. Las columnas de entrada que ningún
+    paso ni la salida necesitan se descartan antes de empezar.
+    """
+
+    if columnas_salida is None:
+        columnas_salida = list(df.columns) + [col for paso in PASOS for col in salidas_paso(paso)]
+
+    conservadas = [col for paso in PASOS if paso.get("conservar") for col in salidas_paso(paso)]
+    columnas_salida = list(dict.fromkeys(list(columnas_salida) + conservadas))
+
+    necesarias = set(columnas_salida)
+    pasos = []
+
+    for paso in reversed(PASOS):
+        if paso.get("siempre") or necesarias & set(salidas_paso(paso)):
+            pasos.insert(0, paso)
+            necesarias |= set(paso["entradas"])
+
+    columnas = [col for col in df.columns if col in necesarias]
+    descartadas = [col for col in df.columns if col not in necesarias]
+
+    # Asignaciones evitadas, medidas: los bytes de las columnas descartadas,
+    # que ya no se copian en cada paso que reescribe el frame completo.
+    # La memoria de cada paso se mide con --profile tracemalloc.
+    descartada = sum(int(df[col].memory_usage(deep=True, index=False)) for col in descartadas)
+
+    return {
+        "pasos": pasos,
+        "columnas": columnas,
+        "columnas_salida": columnas_salida,
+        "reporte": {
+            "columnas_entrada": len(df.columns),
+            "columnas_procesadas": len(columnas),
+            "columnas_descartadas": descartadas,
+            "pasos_omitidos": [p["nombre"] for p in PASOS if p not in pasos],
+            "memoria_descartada_mb": round(descartada / 1024 ** 2, 2)
+        }
+    }
+
+
+def copy_on_write():
+    """
+    Copy-on-Write es el comportamiento por defecto desde pandas 3.0.
+    """
+
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return contextlib.nullcontext()
+
+    return pd.option_context("mode.copy_on_write", True)
+
+
 # =====================================================
 # MASTER TRANSFORM
 # =====================================================
 
-def transformar_listings(df: pd.DataFrame):
+@instrument("transform")
+def transformar_listings(df: pd.DataFrame, inicio_sk: int = 0, columnas_salida: list = None):
+    """
+    `columnas_salida` limita el trabajo a lo que realmente se consume
+    (p. ej. las columnas que carga el DW). None conserva todas.
+    """
 
     print("\n🔄 Iniciando transformaciones...")
 
-    # 🔥 PRIMERO — limpieza crítica de claves
-    df = limpiar_claves_dimensionales(df)
+    plan = planificar_transformacion(df, columnas_salida)
+
+    with copy_on_write():
 
-    df = normalizar_precio(df)
-    df = sanitizar_precio(df)
+        df = df[plan["columnas"]]
 
-    df = estandarizar_textos(df)
-    df = forzar_columnas_texto(df)
-    df = convertir_booleanos(df)
+        for paso in plan["pasos"]:
+            with measure(f"transform.{paso['nombre']}", rows_in=len(df)) as m:
+                if paso["funcion"] is generar_surrogate_keys:
+                    df = generar_surrogate_keys(df, inicio_sk)
+                else:
+                    df = paso["funcion"](df)
 
-    df = parsear_amenities(df)
-    df = crear_flags_amenities(df)
+                m["rows_out"] = len(df)
 
-    df = calcular_ingreso_estimado(df)
-    df = calcular_tasa_ocupacion(df)
-    df = clasificar_precio(df)
+        df = df[[col for col in plan["columnas_salida"] if col in df.columns]]
 
-    df = forzar_tipos_sql(df)
-    df = convertir_numpy_a_python(df)
+    df.attrs["plan_transformacion"] = plan["reporte"]
+
+    print(
+        f"✅ Transformaciones completadas — "
+        f"{len(plan['pasos'])}/{len(PASOS)} pasos, "
+        f"{plan['reporte']['columnas_procesadas']}/{plan['reporte']['columnas_entrada']} columnas, "
+        f"{plan['reporte']['memoria_descartada_mb']} MB sin copiar"
+    )
+
+    return df
+
+
+def transformar_listings_por_lotes(lotes, columnas_salida: list = None):
+    """
+    Versión streaming: transforma lote a lote manteniendo
+    las surrogate keys consecutivas entre lotes.
+    """
 
-    df = generar_surrogate_keys(df)
+    inicio_sk = 0
 
-    print("✅ Transformaciones completadas")
+    for lote in lotes:
+        lote = transformar_listings(lote, inicio_sk, columnas_salida)
+        inicio_sk += len(lote)
 
-    return df
\ No newline at end of file
+        yield lote
@@ -1,41 +1,50 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import json
 
+from src.pipeline.cuarentena import abrir_cuarentena, cerrar_cuarentena, enviar_cuarentena
+from src.utils.config_loader import get_config
+from src.utils.metrics import instrument, measure
+
 
 # =====================================================
 # CONFIGURACIÓN DE OUTPUT
 # =====================================================
 
+# Se crea al escribir (cuarentena / reporte), no al importar el módulo
 OUTPUT_PATH = Path("output")
-OUTPUT_PATH.mkdir(exist_ok=True)
 
 
 # =====================================================
 # CUARENTENA
 # =====================================================
 
-def cuarentenar_registros(df_malos: pd.DataFrame, nombre_archivo: str):
+@instrument("validate.cuarentena")
+def cuarentenar_registros(df_malos: pd.DataFrame, escritor: dict):
     """
-    Guarda registros inválidos sin detener el pipeline.
+    Entrega los registros inválidos al escritor en segundo plano
+    (src/pipeline/cuarentena.py) sin detener el pipeline.
     """
 
-    ruta_archivo = OUTPUT_PATH / nombre_archivo
-    df_malos.to_csv(ruta_archivo, index=False)
+    enviar_cuarentena(escritor, df_malos)
 
-    print(f"{len(df_malos)} registros enviados a cuarentena → {ruta_archivo}")
+    print(f"{len(df_malos)} registros enviados a cuarentena → {escritor['ruta']}")
 
 
 # =====================================================
 # REPORTE DE CALIDAD
 # =====================================================
 
-def generar_reporte_calidad(metricas: dict):
+def generar_reporte_calidad(metricas: dict, directorio: Path = None):
     """
     Genera un reporte JSON con métricas de calidad.
     """
 
-    ruta_reporte = OUTPUT_PATH / "data_quality_report.json"
+    directorio = directorio or OUTPUT_PATH
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    ruta_reporte = directorio / "data_quality_report.json"
 
     with open(ruta_reporte, "w", encoding="utf-8") as f:
         json.dump(metricas, f, indent=4)
@@ -44,7 +53,7 @@ def generar_reporte_calidad(metricas: dict):
 
 
 # =====================================================
-# VALIDACIONES
+# VALIDACIONES DURAS
 # =====================================================
 
 def validar_esquema(df: pd.DataFrame, columnas_esperadas: list):
@@ -72,107 +81,305 @@ def validar_tipos(df: pd.DataFrame):
         raise ValueError(f"Errores de tipo detectados: {errores}")
 
 
-def validar_duplicados(df: pd.DataFrame, columna_clave: str, metricas: dict):
+# =====================================================
+# MOTOR DE REGLAS (VALIDACIONES SUAVES)
+# =====================================================
 
-    duplicados = df[df.duplicated(columna_clave, keep=False)]
+def columna_clave(serie: pd.Series) -> pd.Series:
+    """
+    Misma representación en todos los lotes: un id que llega como float
+    (un lote sin esquema con nulos) vuelve a entero.
+    """
 
-    metricas["duplicados"] = len(duplicados)
+    if pd.api.types.is_float_dtype(serie):
+        valores = serie.to_numpy(dtype="float64", na_value=np.nan)
 
-    if not duplicados.empty:
-        cuarentenar_registros(duplicados, "registros_duplicados.csv")
-        df = df.drop_duplicates(subset=columna_clave)
+        if np.all(np.isnan(valores) | (valores == np.round(valores))):
+            return serie.astype("Int64")
 
-        print(f"{len(duplicados)} registros duplicados eliminados ⚠️")
+    return serie
 
-    return df
 
+def claves_numericas(df: pd.DataFrame, columnas: list) -> tuple:
+    """
+    (clave de cada fila como entero de 64 bits, filas con clave nula).
+    La codificación depende sólo del tipo de las columnas, nunca de si el
+    lote trae nulos: el id tal cual si es una sola columna entera, si no
+    un hash de las columnas (int64 / Int64 y str / categórica hashean igual).
+    """
 
-def validar_no_nulos(df: pd.DataFrame, columnas_criticas: list, metricas: dict):
+    canonico = pd.DataFrame({col: columna_clave(df[col]) for col in columnas}, index=df.index)
+    nulos = canonico.isna().any(axis=1).to_numpy()
 
-    registros_malos = df[df[columnas_criticas].isnull().any(axis=1)]
+    if len(columnas) == 1 and pd.api.types.is_integer_dtype(canonico[columnas[0]]):
+        return canonico[columnas[0]].to_numpy(dtype="int64", na_value=0), nulos
 
-    metricas["nulos"] = len(registros_malos)
+    return pd.util.hash_pandas_object(canonico, index=False).to_numpy().view("int64"), nulos
 
-    if not registros_malos.empty:
-        cuarentenar_registros(registros_malos, "registros_con_nulos.csv")
-        df = df.drop(registros_malos.index)
 
-        print(f"{len(registros_malos)} registros eliminados por nulos ⚠️")
+def regla_unique(columnas: list):
+    """
+    Falla toda aparición de la clave salvo la primera.
+    Con `visto` (streaming) también falla si la clave apareció en un lote
+    anterior. Las claves nulas no cruzan lotes (de eso se encarga not_null).
+    """
 
-    return df
+    def evaluar(df: pd.DataFrame, visto: dict = None):
 
+        mascara = df.duplicated(columnas, keep="first").to_numpy()
 
-def validar_precio(df: pd.DataFrame, metricas: dict):
+        if visto is None:
+            return mascara
 
-    invalidos = df[df["price"] <= 0]
+        claves, nulos = claves_numericas(df, columnas)
+        anteriores = visto.get("claves", np.empty(0, dtype="int64"))
 
-    metricas["precios_invalidos"] = len(invalidos)
+        # Búsqueda binaria vectorizada de las claves distintas del lote (ya
+        # ordenadas: recorren el arreglo en orden) contra las de lotes
+        # anteriores (int64 ordenados: 8 bytes por clave, no un set de objetos)
+        unicas, inversa = np.unique(claves[~nulos], return_inverse=True)
+        vistas = np.zeros(len(unicas), dtype=bool)
 
-    if not invalidos.empty:
-        cuarentenar_registros(invalidos, "precios_invalidos.csv")
-        df = df.drop(invalidos.index)
+        if len(anteriores):
+            posiciones = np.minimum(np.searchsorted(anteriores, unicas), len(anteriores) - 1)
+            vistas = anteriores[posiciones] == unicas
 
-        print(f"{len(invalidos)} registros con precio inválido eliminados ⚠️")
+        # Un merge por lote: dos tramos ya ordenados, el sort estable
+        # (timsort) los une en tiempo lineal
+        visto["claves"] = np.sort(np.concatenate([anteriores, unicas[~vistas]]), kind="stable")
 
-    return df
+        repetidos = np.zeros(len(claves), dtype=bool)
+        repetidos[~nulos] = vistas[inversa]
 
+        return mascara | repetidos
 
-def validar_coordenadas(df: pd.DataFrame, metricas: dict):
+    return evaluar
 
-    invalidos = df[
-        (df["latitude"] < -90) | (df["latitude"] > 90) |
-        (df["longitude"] < -180) | (df["longitude"] > 180)
-    ]
 
-    metricas["coordenadas_invalidas"] = len(invalidos)
+def regla_not_null(columnas: list):
 
-    if not invalidos.empty:
-        cuarentenar_registros(invalidos, "coordenadas_invalidas.csv")
-        df = df.drop(invalidos.index)
+    def evaluar(df: pd.DataFrame, visto: dict = None):
+        return df[columnas].isna().any(axis=1).to_numpy()
 
-        print(f"{len(invalidos)} registros con coordenadas inválidas eliminados ⚠️")
+    return evaluar
 
-    return df
+
+def regla_range(limites: dict):
+    """
+    Falla si alguna columna queda fuera de [min, max].
+    Los nulos no fallan aquí: de eso se encarga not_null.
+    """
+
+    def evaluar(df: pd.DataFrame, visto: dict = None):
+
+        mascara = np.zeros(len(df), dtype=bool)
+
+        for col, (minimo, maximo) in limites.items():
+            valores = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            mascara |= (valores < minimo) | (valores > maximo)
+
+        return mascara
+
+    return evaluar
+
+
+TIPOS_REGLA = {
+    "unique": lambda regla: regla_unique(regla["columns"]),
+    "not_null": lambda regla: regla_not_null(regla["columns"]),
+    "range": lambda regla: regla_range(regla["bounds"])
+}
+
+
+def compilar_reglas(config_reglas: dict) -> list:
+    """
+    Convierte las reglas de config.yaml en evaluadores vectorizados.
+    Cada regla recibe un bit propio según su posición.
+    """
+
+    reglas = []
+
+    for posicion, (nombre, regla) in enumerate(config_reglas.items()):
+
+        if regla["type"] not in TIPOS_REGLA:
+            raise ValueError(f"Tipo de regla desconocido en '{nombre}': {regla['type']}")
+
+        reglas.append({
+            "nombre": nombre,
+            "bit": 1 << posicion,
+            "evaluar": TIPOS_REGLA[regla["type"]](regla)
+        })
+
+    return reglas
+
+
+def evaluar_reglas(df: pd.DataFrame, reglas: list, estado: dict = None) -> np.ndarray:
+    """
+    Evalúa todas las reglas en una sola pasada sobre el frame.
+    Devuelve la matriz de máscaras (filas × reglas); True = la fila falla.
+    """
+
+    matriz = np.zeros((len(df), len(reglas)), dtype=bool)
+
+    for i, regla in enumerate(reglas):
+        visto = None if estado is None else estado.setdefault(regla["nombre"], {})
+        matriz[:, i] = regla["evaluar"](df, visto)
+
+    return matriz
+
+
+def calcular_motivos(matriz: np.ndarray, reglas: list) -> np.ndarray:
+    """
+    Bitmask de motivos de rechazo por fila (0 = fila válida).
+    """
+
+    bits = np.array([regla["bit"] for regla in reglas], dtype="int64")
+
+    return matriz.astype("int64") @ bits
 
 
 # =====================================================
 # PIPELINE PRINCIPAL
 # =====================================================
 
-def ejecutar_validaciones_listings(df: pd.DataFrame):
+COLUMNAS_ESPERADAS = [
+    "id",
+    "host_id",
+    "price",
+    "latitude",
+    "longitude",
+    "neighbourhood",
+    "room_type"
+]
+
 
-    metricas = {
-        "registros_leidos": len(df),
-        "duplicados": 0,
-        "nulos": 0,
-        "precios_invalidos": 0,
-        "coordenadas_invalidas": 0
-    }
-
-    columnas_esperadas = [
-        "id",
-        "host_id",
-        "price",
-        "latitude",
-        "longitude",
-        "neighbourhood",
-        "room_type"
-    ]
+def inicializar_metricas(reglas: list):
+
+    metricas = {"registros_leidos": 0}
+    metricas.update({regla["nombre"]: 0 for regla in reglas})
+    metricas["registros_en_cuarentena"] = 0
+    metricas["registros_finales"] = 0
+
+    # Significado de cada bit de la columna `motivos` de la cuarentena
+    metricas["bits_motivos"] = {regla["nombre"]: regla["bit"] for regla in reglas}
+
+    return metricas
+
+
+@instrument("validate")
+def validar_lote(
+    df: pd.DataFrame,
+    reglas: list,
+    metricas: dict,
+    estado: dict = None,
+    escritor: dict = None
+):
+    """
+    Valida un DataFrame (completo o lote) en una sola pasada
+    acumulando las métricas por regla en `metricas`.
+    """
+
+    metricas["registros_leidos"] += len(df)
 
     # VALIDACIONES DURAS
-    validar_esquema(df, columnas_esperadas)
+    validar_esquema(df, COLUMNAS_ESPERADAS)
     validar_tipos(df)
 
     # VALIDACIONES SUAVES
-    df = validar_duplicados(df, "id", metricas)
-    df = validar_no_nulos(df, ["id", "host_id", "price"], metricas)
-    df = validar_precio(df, metricas)
-    df = validar_coordenadas(df, metricas)
+    with measure("validate.reglas", rows_in=len(df)):
+        matriz = evaluar_reglas(df, reglas, estado)
+        motivos = calcular_motivos(matriz, reglas)
 
-    metricas["registros_finales"] = len(df)
+    for regla, fallos in zip(reglas, matriz.sum(axis=0)):
+        metricas[regla["nombre"]] += int(fallos)
 
-    generar_reporte_calidad(metricas)
+    invalidos = motivos != 0
+
+    if invalidos.any():
+        df_malos = df[invalidos].assign(motivos=motivos[invalidos])
+
+        if escritor is not None:
+            cuarentenar_registros(df_malos, escritor)
+
+        df = df[~invalidos]
+
+        print(f"{len(df_malos)} registros eliminados por reglas de calidad ⚠️")
+
+    metricas["registros_en_cuarentena"] += int(invalidos.sum())
+    metricas["registros_finales"] += len(df)
+
+    return df
+
+
+def validar_listings(df: pd.DataFrame, directorio: Path = None):
+    """
+    Valida un archivo completo. Devuelve (df válido, métricas de calidad);
+    cuarentena y reporte quedan en `directorio` (por defecto output/).
+    """
+
+    reglas = compilar_reglas(get_config()["validation"]["rules"])
+    metricas = inicializar_metricas(reglas)
+
+    escritor = abrir_cuarentena(directorio or OUTPUT_PATH, metricas["bits_motivos"])
+
+    try:
+        df = validar_lote(df, reglas, metricas, escritor=escritor)
+    finally:
+        # La cuarentena queda completa en disco antes del reporte
+        metricas["cuarentena"] = cerrar_cuarentena(escritor)
+
+    generar_reporte_calidad(metricas, directorio)
 
     print("\n✅ VALIDACIÓN COMPLETADA — Dataset listo para transformación")
 
-    return df
\ No newline at end of file
+    return df, metricas
+
+
+def ejecutar_validaciones_listings(df: pd.DataFrame):
+
+    df, _ = validar_listings(df)
+
+    return df
+
+
+def combinar_metricas(por_grupo: dict) -> dict:
+    """
+    Totales de varias validaciones (p. ej. una por ciudad) + el detalle
+    de cada una bajo "ciudades".
+    """
+
+    totales = {}
+
+    for metricas in por_grupo.values():
+        for clave, valor in metricas.items():
+            if isinstance(valor, int):
+                totales[clave] = totales.get(clave, 0) + valor
+            else:
+                totales.setdefault(clave, valor)
+
+    totales["ciudades"] = por_grupo
+
+    return totales
+
+
+def ejecutar_validaciones_por_lotes(lotes):
+    """
+    Versión streaming: valida lote a lote y escribe el reporte de calidad
+    al agotarse los lotes. Las métricas son la suma de todos los lotes;
+    `estado` guarda las claves vistas por las reglas unique.
+    """
+
+    reglas = compilar_reglas(get_config()["validation"]["rules"])
+    metricas = inicializar_metricas(reglas)
+    estado = {}
+
+    escritor = abrir_cuarentena(OUTPUT_PATH, metricas["bits_motivos"])
+
+    try:
+        for lote in lotes:
+            yield validar_lote(lote, reglas, metricas, estado, escritor)
+    finally:
+        metricas["cuarentena"] = cerrar_cuarentena(escritor)
+
+    generar_reporte_calidad(metricas)
+
+    print("\n✅ VALIDACIÓN COMPLETADA — Todos los lotes validados")
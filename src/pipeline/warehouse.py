@@ -0,0 +1,223 @@
+import re
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.config_loader import get_config
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SQL_PATH = PROJECT_ROOT / "sql"
+
+
+# =====================================================
+# SQL SERVER (DW PRODUCTIVO)
+# =====================================================
+
+def conectar_sqlserver():
+
+    # Import diferido: el warehouse embebido no necesita pyodbc ni el driver ODBC
+    from src.utils.db_connector import get_connection
+
+    return get_connection()
+
+
+# =====================================================
+# SQLITE (DW EMBEBIDO PARA DESARROLLO, CI Y BENCHMARKS)
+# =====================================================
+#
+# La base se adjunta como esquema `dw`, así dw.dim_host, dw.fact_listing_snapshot
+# y las tablas temp.* de staging funcionan con el mismo SQL de load.py.
+
+TRADUCCIONES_SQLITE = [
+    (r"\bINT\s+IDENTITY\s*\(\s*1\s*,\s*1\s*\)\s+PRIMARY\s+KEY", "INTEGER PRIMARY KEY"),
+    (r"CAST\(GETDATE\(\) AS DATE\)", "CURRENT_DATE"),
+    (r"\b(?:NON)?CLUSTERED\b\s*", ""),
+    (r"\bREFERENCES\s+dw\.", "REFERENCES "),
+    (r"\)\s*ON\s+\w+\s*\(\s*\w+\s*\)\s*$", ")"),
+    (r"\bCREATE TABLE\b", "CREATE TABLE IF NOT EXISTS"),
+    (r"\bCREATE (UNIQUE )?INDEX (\w+)\s+ON dw\.(\w+)", r"CREATE \1INDEX IF NOT EXISTS dw.\2 ON \3"),
+    (r"\bISNULL\(", "IFNULL(")
+]
+
+
+def traducir_sqlite(sql: str) -> str:
+    """
+    T-SQL de sql/*.sql → SQLite (sólo las construcciones que usa el repo).
+    """
+
+    for patron, reemplazo in TRADUCCIONES_SQLITE:
+        sql = re.sub(patron, reemplazo, sql, flags=re.IGNORECASE)
+
+    return sql
+
+
+def leer_sql(nombre: str) -> str:
+    # Los .sql se editaron con encodings distintos (algunos comentarios en cp1252)
+    return (SQL_PATH / nombre).read_text(encoding="utf-8", errors="replace")
+
+
+def partir_sentencias(sql: str) -> list:
+    """
+    Sentencias de un script T-SQL (lotes GO y ";"), sin comentarios.
+    """
+
+    sentencias = []
+
+    # Comentarios fuera antes de partir por ";" (un comentario puede contener ";")
+    sql = re.sub(r"--[^\n]*", "", sql)
+
+    for lote in re.split(r"^\s*GO\s*$", sql, flags=re.MULTILINE):
+        for sentencia in lote.split(";"):
+            codigo = sentencia.strip()
+
+            if codigo:
+                sentencias.append(codigo)
+
+    return sentencias
+
+
+def sentencias_esquema(sql: str) -> list:
+    """
+    Sentencias de schema.sql aplicables a SQLite: tablas e índices.
+    CREATE SCHEMA (→ ATTACH), particiones, columnstore y TABLE TYPES (TVP) no aplican.
+    """
+
+    return [
+        traducir_sqlite(codigo)
+        for codigo in partir_sentencias(sql)
+        if re.match(r"CREATE\s+(TABLE|(UNIQUE\s+)?(NONCLUSTERED\s+)?INDEX)\b", codigo, re.IGNORECASE)
+    ]
+
+
+def crear_esquema_sqlite(conn):
+    """
+    Crea (si no existe) el esquema estrella dw a partir de sql/schema.sql.
+    """
+
+    for sentencia in sentencias_esquema(leer_sql("schema.sql")):
+        conn.execute(sentencia)
+
+    conn.commit()
+
+
+def get_sqlite_path() -> Path:
+
+    ruta = Path(get_config()["warehouse"]["sqlite_path"])
+
+    return ruta if ruta.is_absolute() else PROJECT_ROOT / ruta
+
+
+def conectar_sqlite():
+
+    ruta = get_sqlite_path()
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    # Las conexiones de pyodbc se comparten entre hilos del pool; aquí igual
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.execute("ATTACH DATABASE ? AS dw", (str(ruta),))
+    conn.execute("PRAGMA dw.journal_mode = WAL")
+
+    crear_esquema_sqlite(conn)
+
+    return conn
+
+
+# =====================================================
+# BACKENDS
+# =====================================================
+#
+# Sólo lo que de verdad cambia entre motores; el SQL de carga (load.py)
+# y los mapas de claves (key_cache.py) son comunes.
+#
+#   conectar:         () → conexión DB-API con cursor/commit/rollback/close
+#   stage:            nombre lógico → tabla temporal de sesión
+#   indice_stage:     (tabla de staging, columnas) → CREATE INDEX por business key
+#   consulta_hoy:     fecha del snapshot según el motor
+#   carga_masiva:     backend de bulk_load (None = load.backend de config.yaml)
+#   staging_paralelo: admite tablas ##globales entre conexiones del pool
+#   particiones:      fact_listing_snapshot particionada (SWITCH de la partición del día)
+#   traducir:         SQL de sql/*.sql → dialecto del motor
+
+WAREHOUSES = {
+    "sqlserver": {
+        "conectar": conectar_sqlserver,
+        "stage": lambda nombre: f"#{nombre}",
+        "indice_stage": lambda stage, columnas: (
+            f"CREATE INDEX ix_{stage.lstrip('#')} ON {stage}({', '.join(columnas)});"
+        ),
+        "consulta_hoy": "SELECT CAST(GETDATE() AS DATE)",
+        "carga_masiva": None,
+        "staging_paralelo": True,
+        "particiones": True,
+        "traducir": lambda sql: sql
+    },
+    "sqlite": {
+        "conectar": conectar_sqlite,
+        "stage": lambda nombre: f"temp.{nombre}",
+        "indice_stage": lambda stage, columnas: (
+            f"CREATE INDEX temp.ix_{stage.split('.')[1]} ON {stage.split('.')[1]}({', '.join(columnas)});"
+        ),
+        "consulta_hoy": "SELECT DATE('now', 'localtime')",
+        "carga_masiva": "sqlite",
+        "staging_paralelo": False,
+        "particiones": False,
+        "traducir": traducir_sqlite
+    }
+}
+
+
+def get_warehouse() -> dict:
+    """
+    Backend configurado en warehouse.backend (config.yaml).
+    """
+
+    nombre = get_config()["warehouse"].get("backend", "sqlserver")
+
+    if nombre not in WAREHOUSES:
+        raise ValueError(f"Warehouse desconocido: {nombre}")
+
+    return WAREHOUSES[nombre]
+
+
+def crear_stage(cursor, stage: str, columnas: str, clave: list = None):
+    """
+    (Re)crea una tabla de staging. Con `clave`, indexada por el business
+    key: los merge la cruzan con la dimensión por esas columnas.
+    """
+
+    cursor.execute(f"DROP TABLE IF EXISTS {stage};")
+    cursor.execute(f"CREATE TABLE {stage}({columnas});")
+
+    if clave:
+        cursor.execute(get_warehouse()["indice_stage"](stage, clave))
+
+
+# =====================================================
+# ANALÍTICA (sql/*.sql)
+# =====================================================
+
+def ejecutar_consulta(nombre: str, conn=None) -> pd.DataFrame:
+    """
+    Ejecuta una consulta de sql/ (p. ej. 01_pricing_intelligence.sql)
+    contra el warehouse configurado.
+    """
+
+    warehouse = get_warehouse()
+    sql = warehouse["traducir"](leer_sql(nombre)).strip().rstrip(";")
+
+    propia = conn is None
+    conn = conn or warehouse["conectar"]()
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql)
+
+        columnas = [col[0] for col in cursor.description]
+
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columnas)
+
+    finally:
+        if propia:
+            conn.close()
@@ -0,0 +1,162 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from src.utils.config_loader import get_config
+from src.utils.logger import get_logger
+
+
+logger = get_logger()
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_content_hashes = {}
+
+
+def get_cache_dir() -> Path:
+    """
+    Returns the cache directory configured in config.yaml.
+    """
+
+    cache_dir = PROJECT_ROOT / get_config()["cache"]["path"]
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    return cache_dir
+
+
+def content_hash(path: Path) -> str:
+    """
+    Hash of the file contents, computed once per version of the file
+    (path + size + mtime + ctime): the checkpoint key and the cache lookup
+    of the same run share it instead of reading the file twice.
+    """
+
+    stat = path.stat()
+    version = (str(path.resolve()), stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
+
+    if version not in _content_hashes:
+        digest = hashlib.blake2b(digest_size=16)
+
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        _content_hashes[version] = digest.hexdigest()
+
+    return _content_hashes[version]
+
+
+def fingerprint(path: Path, read_options: dict) -> str:
+    """
+    Fingerprint of a source file: size + mtime + content hash.
+    The read_csv options are part of the key, so changing how
+    the file is parsed never reuses a stale cache entry.
+    """
+
+    stat = path.stat()
+    key = hashlib.blake2b(content_hash(path).encode("utf-8"), digest_size=16)
+    key.update(repr(sorted(read_options.items())).encode("utf-8"))
+
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{key.hexdigest()}"
+
+
+def entry_prefix(path: Path) -> str:
+    """
+    Stem + hash of the absolute path: data/madrid/listings.csv and
+    data/lisboa/listings.csv get separate entries (and eviction).
+    """
+
+    path_hash = hashlib.blake2b(str(Path(path).resolve()).encode("utf-8"), digest_size=4)
+
+    return f"{path.stem}-{path_hash.hexdigest()}"
+
+
+def cache_path(path: Path, key: str) -> Path:
+
+    return get_cache_dir() / f"{entry_prefix(path)}-{key}.arrow"
+
+
+def read_cache(ruta_cache: Path) -> pd.DataFrame:
+    """
+    Reads an Arrow IPC cache entry through a memory map.
+
+    split_blocks keeps one block per column, so fixed-width columns without
+    nulls (and Arrow-backed strings) stay views over the mapped pages instead
+    of being consolidated into freshly allocated 2D blocks. Those columns are
+    read-only: df[col] = ... replaces them, but partial in-place writes
+    (df.loc[mask, col] = ...) need a .copy() first. self_destruct releases
+    each Arrow column as soon as it is converted.
+    """
+
+    with pa.memory_map(str(ruta_cache), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def write_cache(df: pd.DataFrame, ruta_cache: Path, preserve_index: bool = False):
+    """
+    Writes the DataFrame as Arrow IPC. Written to a temporary file
+    and renamed, so an interrupted run never leaves a corrupt entry.
+    preserve_index=None keeps a non-default index (as pyarrow does).
+    """
+
+    table = pa.Table.from_pandas(df, preserve_index=preserve_index)
+    ruta_tmp = ruta_cache.with_suffix(".tmp")
+
+    with pa.OSFile(str(ruta_tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    os.replace(ruta_tmp, ruta_cache)
+
+
+def evict(path: Path, max_entries: int):
+    """
+    Keeps only the `max_entries` most recent entries of a source file.
+    """
+
+    entries = sorted(
+        get_cache_dir().glob(f"{entry_prefix(path)}-*.arrow"),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True
+    )
+
+    for old_entry in entries[max_entries:]:
+        old_entry.unlink(missing_ok=True)
+
+
+def read_csv_cached(path: Path, **read_options) -> pd.DataFrame:
+    """
+    pd.read_csv with a columnar cache keyed by the source fingerprint.
+    A cache hit skips CSV parsing entirely.
+    """
+
+    config = get_config()["cache"]
+
+    if not config["enabled"]:
+        return pd.read_csv(path, **read_options)
+
+    path = Path(path)
+    ruta_cache = cache_path(path, fingerprint(path, read_options))
+
+    if ruta_cache.exists():
+        os.utime(ruta_cache)
+        return read_cache(ruta_cache)
+
+    df = pd.read_csv(path, **read_options)
+
+    try:
+        write_cache(df, ruta_cache)
+    except (pa.ArrowException, OSError) as e:
+        logger.warning(f"No se pudo cachear {path.name}: {e}")
+        return df
+
+    evict(path, config["max_entries"])
+
+    return df
@@ -0,0 +1,18 @@
+import yaml
+from functools import lru_cache
+from pathlib import Path
+
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
+
+
+@lru_cache(maxsize=1)
+def get_config():
+    """
+    Loads and returns the pipeline configuration (config.yaml).
+    """
+
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    return config
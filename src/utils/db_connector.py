@@ -1,24 +1,280 @@
-import pyodbc
 import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 from dotenv import load_dotenv
 
+from src.utils.config_loader import get_config
+
+try:
+    import pyodbc
+except ImportError:
+    # Only needed to reach SQL Server; tests and the embedded warehouse
+    # run without libodbc (ConnectionManager accepts any driver module)
+    pyodbc = None
+
 load_dotenv()
 
 
-def get_connection():
+# ODBC connection attribute for the TDS packet size (set before connecting)
+SQL_ATTR_PACKET_SIZE = 112
+
+# SQLSTATEs worth retrying: link failures, login/connection timeouts,
+# deadlock victim and Azure SQL "database not currently available"
+TRANSIENT_SQLSTATES = {
+    "08001", "08S01", "08004", "08007",
+    "HYT00", "HYT01",
+    "40001", "40613", "40197", "40501"
+}
+
+
+def build_connection_string(driver_name: str) -> str:
+    """
+    Builds the SQL Server connection string from environment variables.
+    """
+
+    return (
+        f"DRIVER={{{driver_name}}};"
+        f"SERVER={os.getenv('DB_SERVER')};"
+        f"DATABASE={os.getenv('DB_NAME')};"
+        "Trusted_Connection=yes;"
+        "TrustServerCertificate=yes;"
+    )
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    True if the driver error carries a retryable SQLSTATE.
+    """
+
+    sqlstate = str(error.args[0]) if error.args else ""
+
+    return sqlstate in TRANSIENT_SQLSTATES
+
+
+class PooledConnection:
+    """
+    Proxy over a driver connection: close() hands it back to the pool
+    instead of tearing down the session. Usable as a context manager
+    (commit on success, rollback on error, then release).
+    """
+
+    def __init__(self, manager, raw):
+        self._manager = manager
+        self._raw = raw
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._manager.release(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._raw.commit()
+            else:
+                self._raw.rollback()
+        finally:
+            self.close()
+
+
+class ConnectionManager:
+    """
+    Connection pool with liveness ping and exponential-backoff retries.
+
+    `driver` is any module exposing connect() and Error (pyodbc by default),
+    so tests can plug in a fake driver.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        driver=None,
+        pool_size: int = 4,
+        login_timeout: int = 15,
+        query_timeout: int = 0,
+        packet_size: int = 32767,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        ping_after_seconds: float = 30.0,
+        acquire_timeout: float = 60.0,
+        sleep=time.sleep
+    ):
+        if driver is None:
+            if pyodbc is None:
+                raise ImportError("pyodbc is required to connect to SQL Server (pip install pyodbc)")
+
+            driver = pyodbc
+
+        self.connection_string = connection_string
+        self.driver = driver
+        self.pool_size = pool_size
+        self.login_timeout = login_timeout
+        self.query_timeout = query_timeout
+        self.packet_size = packet_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.ping_after_seconds = ping_after_seconds
+        self.acquire_timeout = acquire_timeout
+        self.sleep = sleep
+
+        # LIFO: the most recently used (warmest) connection is reused first
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    # -------------------------------------------------
+    # Connection lifecycle
+    # -------------------------------------------------
+
+    def _connect(self):
+        """
+        Opens a new driver connection, retrying transient failures
+        with exponential backoff and jitter.
+        """
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                raw = self.driver.connect(
+                    self.connection_string,
+                    autocommit=False,
+                    timeout=self.login_timeout,
+                    attrs_before={SQL_ATTR_PACKET_SIZE: self.packet_size}
+                )
+                raw.timeout = self.query_timeout
+
+                return raw
+
+            except self.driver.Error as e:
+                if attempt == self.max_retries or not is_transient(e):
+                    raise
+
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                self.sleep(delay * random.uniform(0.5, 1.0))
+
+    def _is_alive(self, raw) -> bool:
+
+        try:
+            cursor = raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except self.driver.Error:
+            return False
+
+    def _discard(self, raw):
+
+        try:
+            raw.close()
+        except self.driver.Error:
+            pass
+
+    def acquire(self) -> PooledConnection:
+        """
+        Returns a pooled connection. Idle connections are pinged before
+        reuse if they sat unused longer than ping_after_seconds.
+        """
+
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"No free connection after {self.acquire_timeout}s (pool_size={self.pool_size})")
+
+        try:
+            while True:
+                try:
+                    raw, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return PooledConnection(self, self._connect())
+
+                if time.monotonic() - last_used < self.ping_after_seconds or self._is_alive(raw):
+                    return PooledConnection(self, raw)
+
+                self._discard(raw)
+
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, raw):
+        """
+        Rolls back any open transaction and returns the connection to the pool.
+        Broken connections are dropped.
+        """
+
+        try:
+            raw.rollback()
+            self._idle.put((raw, time.monotonic()))
+        except self.driver.Error:
+            self._discard(raw)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+
+        while True:
+            try:
+                raw, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+            self._discard(raw)
+
+    # -------------------------------------------------
+    # Context managers
+    # -------------------------------------------------
+
+    @contextmanager
+    def connection(self):
+        """
+        with manager.connection() as conn: ...
+        Commits on success, rolls back on error, always returns to the pool.
+        """
+
+        with self.acquire() as conn:
+            yield conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_all()
+
+
+@lru_cache(maxsize=1)
+def get_connection_manager() -> ConnectionManager:
     """
-    Creates and returns a SQL Server connection.
+    Process-wide connection manager configured from config.yaml (database).
     """
 
-    conn = pyodbc.connect(
-        f"""
-        DRIVER={{ODBC Driver 18 for SQL Server}};
-        SERVER={os.getenv('DB_SERVER')};
-        DATABASE={os.getenv('DB_NAME')};
-        Trusted_Connection=yes;
-        TrustServerCertificate=yes;
-        """,
-        autocommit=False
+    config = get_config()["database"]
+
+    return ConnectionManager(
+        build_connection_string(config["driver"]),
+        pool_size=config["pool_size"],
+        login_timeout=config["login_timeout"],
+        query_timeout=config["query_timeout"],
+        packet_size=config["packet_size"],
+        max_retries=config["max_retries"],
+        backoff_base=config["backoff_base"],
+        backoff_max=config["backoff_max"],
+        ping_after_seconds=config["ping_after_seconds"]
     )
 
-    return conn
+
+def get_connection():
+    """
+    Returns a pooled SQL Server connection (close() returns it to the pool).
+    """
+
+    return get_connection_manager().acquire()
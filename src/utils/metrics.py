@@ -0,0 +1,369 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+
+OUTPUT_PATH = Path("output")
+
+_lock = threading.Lock()
+_steps = {}
+_run = {"started": None, "profiler": None, "mode": None}
+
+# tracemalloc keeps a single process-wide peak: before any step resets it,
+# the peak so far is folded into every step still open (any thread)
+_open_traces = {}
+
+
+# =====================================================
+# MEMORY
+# =====================================================
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the process, in MB.
+    """
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t)
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+        )
+
+        return counters.PeakWorkingSetSize / 1024 ** 2
+
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+# =====================================================
+# MEASUREMENT
+# =====================================================
+
+def _fold_traced_peak():
+
+    peak = tracemalloc.get_traced_memory()[1]
+
+    for trace in _open_traces.values():
+        trace["peak"] = max(trace["peak"], peak)
+
+
+def _start_trace():
+
+    if not tracemalloc.is_tracing():
+        return None
+
+    with _lock:
+        _fold_traced_peak()
+        tracemalloc.reset_peak()
+
+        trace = {"peak": 0}
+        _open_traces[id(trace)] = trace
+
+    return trace
+
+
+def _stop_trace(trace):
+
+    if trace is None or not tracemalloc.is_tracing():
+        return None
+
+    with _lock:
+        _fold_traced_peak()
+        del _open_traces[id(trace)]
+
+    return trace["peak"]
+
+
+def _record(name: str, wall: float, cpu: float, rows_in, rows_out, traced_peak, rss_growth=None):
+
+    with _lock:
+        step = _steps.setdefault(name, {
+            "calls": 0,
+            "wall_s": 0.0,
+            "cpu_s": 0.0,
+            "rows_in": 0,
+            "rows_out": 0
+        })
+
+        step["calls"] += 1
+        step["wall_s"] += wall
+        step["cpu_s"] += cpu
+        step["rows_in"] += rows_in or 0
+        step["rows_out"] += rows_out or 0
+
+        if rss_growth is not None:
+            step["peak_rss_growth_mb"] = max(step.get("peak_rss_growth_mb", 0), round(rss_growth, 1))
+
+        if traced_peak is not None:
+            step["tracemalloc_peak_mb"] = max(step.get("tracemalloc_peak_mb", 0), round(traced_peak / 1024 ** 2, 1))
+
+
+@contextmanager
+def measure(name: str, rows_in: int = None):
+    """
+    with measure("transform.normalizar_textos", rows_in=len(df)) as m:
+        df = ...
+        m["rows_out"] = len(df)
+
+    CPU time is process-wide (time.process_time), so it includes
+    other threads running at the same time; so do the memory figures.
+    peak_rss_growth_mb is how much the step raised the process RSS
+    high-water mark (0 if an earlier step already peaked higher).
+    tracemalloc_peak_mb (--profile tracemalloc) is the peak traced
+    memory while the step ran, nested steps included.
+    """
+
+    record = {"rows_out": None}
+
+    rss_start = peak_rss_mb()
+    trace = _start_trace()
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    try:
+        yield record
+    finally:
+        _record(
+            name,
+            time.perf_counter() - wall_start,
+            time.process_time() - cpu_start,
+            rows_in,
+            record["rows_out"],
+            _stop_trace(trace),
+            peak_rss_mb() - rss_start
+        )
+
+
+def record_memory(name: str, memory_in_mb: float, memory_out_mb: float, memory_compact_mb: float = None):
+    """
+    Frame memory around a step (input, output, output after compaction).
+    """
+
+    with _lock:
+        step = _steps.setdefault(name, {
+            "calls": 0,
+            "wall_s": 0.0,
+            "cpu_s": 0.0,
+            "rows_in": 0,
+            "rows_out": 0
+        })
+
+        step["calls"] += 1
+        step["memory_in_mb"] = round(memory_in_mb, 2)
+        step["memory_out_mb"] = round(memory_out_mb, 2)
+
+        if memory_compact_mb is not None:
+            step["memory_compact_mb"] = round(memory_compact_mb, 2)
+
+
+def _rows(value):
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+
+    return None
+
+
+def instrument(name: str):
+    """
+    Decorator: measures every call. Rows in = first DataFrame argument,
+    rows out = returned DataFrame (if any).
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            rows_in = next((_rows(a) for a in args if _rows(a) is not None), None)
+
+            with measure(name, rows_in) as m:
+                result = func(*args, **kwargs)
+                m["rows_out"] = _rows(result)
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def measure_iterator(name: str, iterable):
+    """
+    Measures the time spent producing each item of a (lazy) iterator,
+    e.g. the chunked CSV reader in streaming mode.
+    """
+
+    iterator = iter(iterable)
+
+    while True:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+
+        _record(
+            name,
+            time.perf_counter() - wall_start,
+            time.process_time() - cpu_start,
+            None,
+            _rows(item),
+            None
+        )
+
+        yield item
+
+
+def export_steps() -> dict:
+    """
+    Raw per-step counters, e.g. to send them back from a worker process.
+    """
+
+    with _lock:
+        return {name: dict(step) for name, step in _steps.items()}
+
+
+def merge_steps(steps: dict, prefix: str = ""):
+    """
+    Adds counters measured elsewhere (another process) under `prefix`.
+    """
+
+    with _lock:
+        for name, step in steps.items():
+            actual = _steps.setdefault(prefix + name, {
+                "calls": 0,
+                "wall_s": 0.0,
+                "cpu_s": 0.0,
+                "rows_in": 0,
+                "rows_out": 0
+            })
+
+            for key in ("calls", "wall_s", "cpu_s", "rows_in", "rows_out"):
+                actual[key] += step[key]
+
+            for key in ("peak_rss_growth_mb", "tracemalloc_peak_mb", "memory_in_mb", "memory_out_mb", "memory_compact_mb"):
+                if key in step:
+                    actual[key] = max(actual.get(key, 0), step[key])
+
+
+# =====================================================
+# PROFILING (cProfile / tracemalloc)
+# =====================================================
+
+def start_run(profile: str = None):
+    """
+    Resets the collected metrics. profile: None, "cprofile" or "tracemalloc".
+    """
+
+    with _lock:
+        _steps.clear()
+        _open_traces.clear()
+
+    _run["started"] = time.perf_counter()
+    _run["started_at"] = datetime.now().isoformat(timespec="seconds")
+    _run["mode"] = profile
+    _run["profiler"] = None
+
+    if profile == "cprofile":
+        _run["profiler"] = cProfile.Profile()
+        _run["profiler"].enable()
+
+    elif profile == "tracemalloc":
+        tracemalloc.start(25)
+
+    elif profile is not None:
+        raise ValueError(f"Unknown profile mode: {profile}")
+
+
+def _finish_profiling():
+
+    if _run["mode"] == "cprofile":
+        profiler = _run["profiler"]
+        profiler.disable()
+        profiler.dump_stats(OUTPUT_PATH / "pipeline_profile.prof")
+
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(50)
+        (OUTPUT_PATH / "pipeline_profile.txt").write_text(text.getvalue(), encoding="utf-8")
+
+    elif _run["mode"] == "tracemalloc":
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        top = snapshot.statistics("lineno")[:50]
+        (OUTPUT_PATH / "pipeline_tracemalloc.txt").write_text(
+            "\n".join(str(stat) for stat in top), encoding="utf-8"
+        )
+
+
+def write_metrics(status: str = "ok") -> Path:
+    """
+    Writes output/pipeline_metrics.json (next to data_quality_report.json).
+    """
+
+    OUTPUT_PATH.mkdir(exist_ok=True)
+
+    _finish_profiling()
+
+    with _lock:
+        steps = {name: dict(step) for name, step in _steps.items()}
+
+    for step in steps.values():
+        rows = step["rows_out"] or step["rows_in"]
+        step["wall_s"] = round(step["wall_s"], 4)
+        step["cpu_s"] = round(step["cpu_s"], 4)
+        step["rows_per_s"] = round(rows / step["wall_s"], 1) if rows and step["wall_s"] else None
+
+    total = time.perf_counter() - _run["started"] if _run["started"] else None
+
+    metrics = {
+        "started_at": _run.get("started_at"),
+        "status": status,
+        "total_wall_s": round(total, 4) if total else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "profile": _run["mode"],
+        "steps": steps
+    }
+
+    ruta = OUTPUT_PATH / "pipeline_metrics.json"
+
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=4)
+
+    return ruta
@@ -0,0 +1,42 @@
+import pytest
+
+from benchmarks.synthetic import generar_listings
+import src.pipeline.analytics as analytics
+import src.pipeline.checkpoints as checkpoints
+import src.pipeline.validate as validate
+import src.utils.columnar_cache as columnar_cache
+import src.utils.metrics as metrics
+
+
+@pytest.fixture
+def listings_df():
+    return generar_listings(200)
+
+
+@pytest.fixture(autouse=True)
+def output_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(validate, "OUTPUT_PATH", tmp_path)
+    monkeypatch.setattr(metrics, "OUTPUT_PATH", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def cache_temporal(tmp_path, monkeypatch):
+    directorio = tmp_path / "cache"
+    directorio.mkdir()
+    monkeypatch.setattr(columnar_cache, "get_cache_dir", lambda: directorio)
+    return directorio
+
+
+@pytest.fixture(autouse=True)
+def analytics_temporal(tmp_path, monkeypatch):
+    directorio = tmp_path / "analytics"
+    monkeypatch.setattr(analytics, "get_analytics_dir", lambda: directorio)
+    return directorio
+
+
+@pytest.fixture(autouse=True)
+def checkpoints_temporal(tmp_path, monkeypatch):
+    directorio = tmp_path / "checkpoints"
+    monkeypatch.setattr(checkpoints, "get_checkpoints_dir", lambda: directorio)
+    return directorio
@@ -0,0 +1,75 @@
+import pandas as pd
+
+from src.pipeline.amenities import flags_amenities, pares_amenities, tokenizar_amenities
+from src.pipeline.load import COLUMNAS_CARGA
+from src.pipeline.transform import transformar_listings
+from src.utils.config_loader import get_config
+
+
+AMENITIES = pd.Series([
+    '{"Wifi","Kitchen"}',
+    None,
+    '["kitchen", "Wifi"]',
+    "{}",
+    '{"Free parking on premises",TV}'
+])
+
+
+def test_tokenizacion_canonica():
+
+    serie = tokenizar_amenities(AMENITIES)
+
+    assert serie.iloc[0] == serie.iloc[2] == "kitchen|wifi"
+    assert pd.isna(serie.iloc[1])
+    assert serie.iloc[3] == ""
+    assert len(serie.cat.categories) == 3
+
+
+def test_flags_sobre_vocabulario():
+
+    flags = flags_amenities(
+        tokenizar_amenities(AMENITIES),
+        {"wifi": ["wifi"], "parking": ["parking"], "nada": ["jacuzzi"]}
+    )
+
+    assert flags["wifi"].tolist() == [True, False, True, False, False]
+    assert flags["parking"].tolist() == [False, False, False, False, True]
+    assert not flags["nada"].any()
+
+
+def test_pares_para_bridge():
+
+    pares = pares_amenities(pd.Series([1, 2, 3, 4, 5]), tokenizar_amenities(AMENITIES))
+
+    assert pares.values.tolist() == [
+        [1, "kitchen"], [1, "wifi"],
+        [3, "kitchen"], [3, "wifi"],
+        [5, "free parking on premises"], [5, "tv"]
+    ]
+
+
+def test_transform_genera_flags_configurados(listings_df):
+
+    df = listings_df.dropna(subset=["price"])
+    df = df.assign(amenities=AMENITIES.sample(len(df), replace=True, random_state=1).to_numpy())
+
+    df = transformar_listings(df)
+
+    assert {"tiene_wifi", "tiene_cocina", "tiene_estacionamiento"} <= set(df.columns)
+    assert (df["tiene_wifi"] == df["amenities"].astype(str).str.contains("wifi")).all()
+
+
+def test_flags_sobreviven_a_la_poda_y_leen_la_config(listings_df, monkeypatch):
+
+    monkeypatch.setitem(get_config()["amenities"], "flags", {"tiene_tv": ["tv"]})
+
+    df = listings_df.dropna(subset=["price"])
+    df = df.assign(amenities=AMENITIES.sample(len(df), replace=True, random_state=1).to_numpy())
+
+    # La salida de la carga no nombra los flags: igual se calculan
+    df = transformar_listings(df, columnas_salida=COLUMNAS_CARGA)
+
+    assert "tiene_tv" in df.columns
+    assert "tiene_wifi" not in df.columns
+    assert (df["tiene_tv"] == df["amenities"].astype(str).str.contains("tv")).all()
+    assert df["tiene_tv"].any()
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generar_listings
+from src.pipeline.analytics import (
+    generar_reportes,
+    host_performance,
+    market_opportunities,
+    pricing_intelligence,
+    ultimo_snapshot
+)
+from src.pipeline.load import COLUMNAS_CARGA, ejecutar_carga
+from src.pipeline.transform import transformar_listings
+from src.pipeline.validate import ejecutar_validaciones_listings
+from src.pipeline.warehouse import ejecutar_consulta
+from src.utils.config_loader import get_config
+
+
+@pytest.fixture
+def listings_transformados():
+
+    df = ejecutar_validaciones_listings(generar_listings(2000))
+
+    return transformar_listings(df, columnas_salida=COLUMNAS_CARGA)
+
+
+def frame_minimo():
+
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "host_id": [10, 10, 20, 30],
+        "host_name": ["Ana", "Ana", "Luis", "Eva"],
+        "neighbourhood": ["A", "A", "A", "B"],
+        "room_type": ["Private room"] * 4,
+        "price": [100.0, 200.0, 300.0, 50.0],
+        "availability_365": [10, 20, 30, 40],
+        "number_of_reviews": [5, 5, 0, 100],
+        "reviews_per_month": [1.0, np.nan, 0.5, 2.0],
+        "calculated_host_listings_count": [2, 2, 1, 1]
+    })
+
+
+def test_pricing_intelligence():
+
+    reporte = pricing_intelligence(frame_minimo()).set_index("listing_id")
+
+    assert reporte.loc[1, "market_average"] == 200.0
+    assert reporte.loc[1, "recommendation"] == "underpriced"
+    assert reporte.loc[2, "recommendation"] == "fair"
+    assert reporte.loc[3, "recommendation"] == "overpriced"
+    assert reporte.loc[4, "price_difference_pct"] == 0.0
+
+    # Orden descendente por diferencia, como el ORDER BY de la consulta
+    assert reporte["price_difference_pct"].is_monotonic_decreasing
+
+
+def test_host_performance_ranking_y_top():
+
+    reporte = host_performance(frame_minimo())
+
+    ana = reporte.set_index("host_id").loc[10]
+
+    assert ana["revenue_potential"] == 100 * 10 + 200 * 20
+    assert ana["total_reviews"] == 10
+    assert ana["avg_reviews_per_month"] == 0.5
+    assert reporte["ranking"].tolist() == [1, 2, 3]
+
+    top = host_performance(frame_minimo(), top=1)
+
+    assert top["host_id"].tolist() == reporte["host_id"].head(1).tolist()
+
+
+def test_market_opportunities():
+
+    reporte = market_opportunities(frame_minimo()).set_index("neighbourhood")
+
+    # B: demanda 2*0.6 + 100*0.4 = 41.2, oferta 1*0.5 + 40*0.5 = 20.5
+    assert reporte.loc["B", "opportunity_score"] == pytest.approx(20.7)
+    assert reporte.loc["B", "recommended_action"] == "Moderate opportunity"
+    assert reporte.loc["A", "recommended_action"] == "Low opportunity"
+
+
+def test_cache_por_snapshot(listings_transformados, analytics_temporal, monkeypatch):
+
+    reportes = generar_reportes(listings_transformados, snapshot="2024-01-01")
+
+    archivos = sorted(p.name for p in analytics_temporal.rglob("*.parquet"))
+
+    assert archivos == ["host_performance.parquet", "market_opportunities.parquet", "pricing_intelligence.parquet"]
+
+    # Mismo contenido: se lee del Parquet sin recalcular
+    import src.pipeline.analytics as analytics
+    monkeypatch.setitem(analytics.REPORTES, "host_performance", None)
+
+    cacheados = generar_reportes(listings_transformados, snapshot="2024-01-01")
+
+    for nombre, reporte in reportes.items():
+        pd.testing.assert_frame_equal(cacheados[nombre], reporte)
+
+    pd.testing.assert_frame_equal(ultimo_snapshot()["pricing_intelligence"], reportes["pricing_intelligence"])
+
+
+def test_coincide_con_sql(tmp_path, monkeypatch, listings_transformados):
+
+    config = get_config()["warehouse"]
+    monkeypatch.setitem(config, "backend", "sqlite")
+    monkeypatch.setitem(config, "sqlite_path", str(tmp_path / "dw.sqlite"))
+
+    ejecutar_carga(listings_transformados)
+
+    comparaciones = [
+        (pricing_intelligence, "01_pricing_intelligence.sql", "listing_id"),
+        (host_performance, "02_host_performance.sql", "host_id"),
+        (market_opportunities, "03_market_opportunities.sql", "neighbourhood")
+    ]
+
+    for funcion, consulta, clave in comparaciones:
+        memoria = funcion(listings_transformados).set_index(clave).sort_index()
+        sql = ejecutar_consulta(consulta).set_index(clave).sort_index()
+
+        assert memoria.index.tolist() == sql.index.tolist()
+
+        for columna in memoria.columns:
+            if memoria[columna].dtype.kind == "f":
+                np.testing.assert_allclose(memoria[columna], sql[columna].astype(float), rtol=1e-9)
+            else:
+                assert memoria[columna].astype(str).tolist() == sql[columna].astype(str).tolist(), columna
@@ -0,0 +1,137 @@
+import struct
+
+import numpy as np
+import pandas as pd
+
+import src.pipeline.bulk_load as bulk_load
+
+
+CONFIG = {
+    "batch_size": 3,
+    "min_batch_size": 2,
+    "max_batch_size": 4,
+    "target_batch_seconds": 1.0,
+    "bcp_path": "output/bcp"
+}
+
+
+class CursorFalso:
+
+    def __init__(self):
+        self.lotes = []
+        self.tipos = None
+
+    def setinputsizes(self, tipos):
+        self.tipos = tipos
+
+    def executemany(self, query, filas):
+        self.lotes.append(filas)
+
+
+def frame_mixto():
+
+    return pd.DataFrame({
+        "host_id": np.array([1, 2, 3, 4, 5, 6, 7], dtype="int64"),
+        "host_name": pd.Categorical(["Ana", None, "Luis", "Ana", "Ana", "Luis", "Bea"]),
+        "price": [10.5, np.nan, 3.0, 4.0, 5.0, 6.0, 7.0]
+    })
+
+
+def test_executemany_por_lotes_sin_copia_completa():
+
+    df = frame_mixto()
+    cursor = CursorFalso()
+
+    bulk_load.insertar_executemany(cursor, df, "#host_stage", CONFIG)
+
+    filas = [fila for lote in cursor.lotes for fila in lote]
+
+    assert len(cursor.lotes) > 1
+    assert max(len(lote) for lote in cursor.lotes) <= CONFIG["max_batch_size"]
+    assert filas[0] == (1, "Ana", 10.5)
+    assert filas[1] == (2, None, None)
+    assert type(filas[0][0]) is int
+    assert len(filas) == len(df)
+
+
+def test_codificacion_nativa_bcp():
+
+    df = frame_mixto()
+
+    ids = bulk_load.codificar_columna_nativa(df["host_id"], 0, 2)
+    nombres = bulk_load.codificar_columna_nativa(df["host_name"], 0, 2)
+    precios = bulk_load.codificar_columna_nativa(df["price"], 0, 2)
+
+    assert ids[0] == b"\x08" + struct.pack("<q", 1)
+    assert nombres[0] == struct.pack("<H", 6) + "Ana".encode("utf-16-le")
+    assert nombres[1] == b"\xff\xff"
+    assert precios[1][:1] == b"\xff"
+
+
+def leer_archivo_bcp(ruta_datos, ruta_formato):
+    """
+    Lector mínimo del formato nativo: usa el .fmt para saber el ancho del
+    prefijo y el tipo de cada campo.
+    """
+
+    TIPOS = {"SQLBIGINT": "<q", "SQLINT": "<i", "SQLSMALLINT": "<h", "SQLTINYINT": "<B",
+             "SQLFLT8": "<d", "SQLFLT4": "<f", "SQLBIT": "<?"}
+
+    campos = [linea.split() for linea in ruta_formato.read_text(encoding="ascii").splitlines()[2:]]
+    datos = ruta_datos.read_bytes()
+
+    filas = []
+    pos = 0
+
+    while pos < len(datos):
+        fila = []
+
+        for _, tipo, ancho_prefijo, *_ in campos:
+            ancho_prefijo = int(ancho_prefijo)
+            largo = int.from_bytes(datos[pos:pos + ancho_prefijo], "little")
+            pos += ancho_prefijo
+
+            if largo == 256 ** ancho_prefijo - 1:
+                fila.append(None)
+                continue
+
+            valor = datos[pos:pos + largo]
+            pos += largo
+
+            if tipo == "SQLNCHAR":
+                fila.append(valor.decode("utf-16-le"))
+            else:
+                fila.append(struct.unpack(TIPOS[tipo], valor)[0])
+
+        filas.append(tuple(fila))
+
+    return filas
+
+
+def test_bcp_ida_y_vuelta_con_nulos(tmp_path):
+
+    df = pd.DataFrame({
+        "reviews": pd.array([3, None, 7], dtype="Int32"),
+        "rating": pd.array([4.5, 3.0, None], dtype="Float64"),
+        "price": [10.5, np.nan, 3.0],
+        "beds": np.array([1, -2, 3], dtype="int8"),
+        "baths": np.array([1, 2, 300], dtype="int16"),
+        "superhost": pd.array([True, None, False], dtype="boolean"),
+        "host_name": pd.Categorical(["Ana", None, "Luis"])
+    })
+
+    ruta_datos = tmp_path / "stage.dat"
+    ruta_formato = tmp_path / "stage.fmt"
+
+    bulk_load.escribir_formato_bcp(df, ruta_formato)
+    bulk_load.escribir_archivo_bcp(df, ruta_datos, CONFIG)
+
+    tipos = [linea.split()[1] for linea in ruta_formato.read_text(encoding="ascii").splitlines()[2:]]
+
+    assert tipos == ["SQLINT", "SQLFLT8", "SQLFLT8", "SQLSMALLINT", "SQLSMALLINT", "SQLBIT", "SQLNCHAR"]
+
+    assert leer_archivo_bcp(ruta_datos, ruta_formato) == [
+        (3, 4.5, 10.5, 1, 1, True, "Ana"),
+        (None, 3.0, None, -2, 2, None, None),
+        (7, None, 3.0, 3, 300, False, "Luis")
+    ]
@@ -0,0 +1,203 @@
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+import src.pipeline.extract as extract
+import src.utils.columnar_cache as columnar_cache
+from benchmarks.synthetic import generar_listings
+from src.pipeline.checkpoints import (
+    ejecutar_etapas,
+    etapa,
+    etapas_listings,
+    huella_archivo,
+    podar_checkpoints
+)
+from src.pipeline.cuarentena import leer_cuarentena
+from src.pipeline.load import COLUMNAS_CARGA
+from src.utils.config_loader import get_config
+
+
+def etapas_contadas(llamadas: dict, falla_en: str = None) -> list:
+    """
+    Tres etapas de juguete que cuentan cuántas veces se ejecutan.
+    """
+
+    def funcion(nombre, paso):
+        def correr(df):
+            llamadas[nombre] = llamadas.get(nombre, 0) + 1
+
+            if nombre == falla_en:
+                raise RuntimeError(f"falla en {nombre}")
+
+            return paso(df)
+        return correr
+
+    return [
+        etapa("extract", funcion("extract", lambda _: pd.DataFrame({"x": range(10)})), [], []),
+        etapa("validate", funcion("validate", lambda df: df[df["x"] % 2 == 0]), [], ["validation"]),
+        etapa("transform", funcion("transform", lambda df: df.assign(y=df["x"] * 10)), [], [])
+    ]
+
+
+def test_segunda_ejecucion_no_recalcula(checkpoints_temporal):
+
+    llamadas = {}
+
+    primero = ejecutar_etapas(etapas_contadas(llamadas), "entrada")
+    segundo = ejecutar_etapas(etapas_contadas(llamadas), "entrada")
+
+    assert llamadas == {"extract": 1, "validate": 1, "transform": 1}
+    pd.testing.assert_frame_equal(primero, segundo)
+
+
+def test_fallo_retoma_desde_el_ultimo_checkpoint(checkpoints_temporal):
+
+    llamadas = {}
+
+    with pytest.raises(RuntimeError):
+        ejecutar_etapas(etapas_contadas(llamadas, falla_en="transform"), "entrada")
+
+    df = ejecutar_etapas(etapas_contadas(llamadas), "entrada")
+
+    assert llamadas == {"extract": 1, "validate": 1, "transform": 2}
+    assert df["y"].tolist() == [0, 20, 40, 60, 80]
+
+
+def test_cambio_de_config_invalida_la_etapa_y_las_siguientes(checkpoints_temporal, monkeypatch):
+
+    llamadas = {}
+
+    ejecutar_etapas(etapas_contadas(llamadas), "entrada")
+
+    monkeypatch.setitem(get_config()["validation"], "max_price", 20000)
+
+    ejecutar_etapas(etapas_contadas(llamadas), "entrada")
+
+    assert llamadas == {"extract": 1, "validate": 2, "transform": 2}
+
+
+def test_entrada_distinta_y_forzar_recalculan(checkpoints_temporal):
+
+    llamadas = {}
+
+    ejecutar_etapas(etapas_contadas(llamadas), "entrada")
+    ejecutar_etapas(etapas_contadas(llamadas), "otra entrada")
+    ejecutar_etapas(etapas_contadas(llamadas), "entrada", forzar=True)
+
+    assert llamadas == {"extract": 3, "validate": 3, "transform": 3}
+
+
+def test_gc_por_antiguedad_y_tamano(checkpoints_temporal):
+
+    ejecutar_etapas(etapas_contadas({}), "vieja")
+    ejecutar_etapas(etapas_contadas({}), "nueva")
+
+    hace_una_semana = time.time() - 8 * 24 * 3600
+
+    for directorio in checkpoints_temporal.iterdir():
+        if directorio.name.startswith("extract"):
+            os.utime(directorio / "datos.arrow", (hace_una_semana, hace_una_semana))
+
+    podar_checkpoints(max_age_hours=24 * 7, max_size_mb=1024)
+
+    assert len(list(checkpoints_temporal.iterdir())) == 4
+    assert not any(p.name.startswith("extract") for p in checkpoints_temporal.iterdir())
+
+    podar_checkpoints(max_age_hours=24 * 7, max_size_mb=0)
+
+    assert list(checkpoints_temporal.iterdir()) == []
+
+
+def test_etapas_listings_retoma_con_el_reporte_de_calidad(tmp_path, output_temporal):
+
+    ruta = tmp_path / "listings.csv"
+    generar_listings(200).to_csv(ruta, index=False)
+
+    primero = ejecutar_etapas(etapas_listings(ruta, COLUMNAS_CARGA), huella_archivo(ruta))
+    reporte = json.loads((output_temporal / "data_quality_report.json").read_text())
+    cuarentena = leer_cuarentena(reporte["cuarentena"]["ruta"])
+
+    (output_temporal / "data_quality_report.json").unlink()
+    shutil.rmtree(reporte["cuarentena"]["ruta"])
+
+    segundo = ejecutar_etapas(etapas_listings(ruta, COLUMNAS_CARGA), huella_archivo(ruta))
+
+    pd.testing.assert_frame_equal(primero, segundo)
+    assert json.loads((output_temporal / "data_quality_report.json").read_text()) == reporte
+
+    # La partición de cuarentena que cita el reporte vuelve con él
+    assert len(cuarentena) > 0
+    pd.testing.assert_frame_equal(leer_cuarentena(reporte["cuarentena"]["ruta"]), cuarentena)
+
+
+def test_archivo_de_entrada_se_hashea_una_vez(tmp_path, monkeypatch):
+
+    ruta = tmp_path / "listings.csv"
+    generar_listings(200).to_csv(ruta, index=False)
+
+    lecturas = []
+
+    def abrir(archivo, *args, **kwargs):
+        lecturas.append(archivo)
+        return open(archivo, *args, **kwargs)
+
+    monkeypatch.setattr(columnar_cache, "open", abrir, raising=False)
+
+    # Clave del checkpoint de extract y caché columnar comparten la huella
+    huella_archivo(ruta)
+    extract.extract_listings(ruta)
+
+    assert lecturas == [ruta]
+
+
+def test_gc_borra_el_menos_usado_no_el_mas_viejo(checkpoints_temporal):
+
+    ejecutar_etapas(etapas_contadas({}), "reutilizada")
+    ejecutar_etapas(etapas_contadas({}), "nueva")
+
+    # La primera se escribió antes pero se reutiliza en cada ejecución
+    for directorio in checkpoints_temporal.iterdir():
+        hace_una_hora = time.time() - 3600
+        os.utime(directorio / "datos.arrow", (hace_una_hora, hace_una_hora))
+
+    llamadas = {}
+    ejecutar_etapas(etapas_contadas(llamadas), "reutilizada")
+
+    assert llamadas == {}
+
+    # Espacio para un solo checkpoint: sobrevive el restaurado recién
+    tamano = max(
+        sum(p.stat().st_size for p in directorio.iterdir())
+        for directorio in checkpoints_temporal.iterdir()
+    )
+    podar_checkpoints(max_age_hours=24, max_size_mb=tamano / 1024 / 1024)
+
+    llamadas = {}
+    ejecutar_etapas(etapas_contadas(llamadas), "reutilizada")
+
+    assert llamadas == {}
+    assert len(list(checkpoints_temporal.iterdir())) == 1
+
+
+def test_checkpoint_mayor_que_el_limite_no_se_borra_a_si_mismo(checkpoints_temporal, monkeypatch):
+
+    monkeypatch.setitem(get_config()["checkpoints"], "max_size_mb", 0)
+
+    llamadas = {}
+
+    ejecutar_etapas(etapas_contadas(llamadas), "entrada")
+
+    assert len(list(checkpoints_temporal.iterdir())) == 3
+
+    ejecutar_etapas(etapas_contadas(llamadas), "entrada")
+
+    assert llamadas == {"extract": 1, "validate": 1, "transform": 1}
+
+    # Otra entrada: los checkpoints anteriores ya no son de esta ejecución
+    ejecutar_etapas(etapas_contadas(llamadas), "otra entrada")
+
+    assert len(list(checkpoints_temporal.iterdir())) == 3
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from benchmarks.synthetic import escribir_csv, generar_listings
+from src.pipeline.ciudades import nombre_ciudad, procesar_ciudades, resolver_archivos
+from src.pipeline.load import ejecutar_carga
+from src.pipeline.warehouse import conectar_sqlite
+from src.utils.config_loader import get_config
+from src.utils.metrics import export_steps
+
+
+@pytest.fixture
+def archivos_ciudades(tmp_path):
+    """
+    Tres ciudades con los mismos barrios sintéticos e ids (listing y host) disjuntos.
+    """
+
+    directorio = tmp_path / "ciudades"
+
+    for k, ciudad in enumerate(["lisboa", "madrid", "porto"]):
+        df = generar_listings(500, seed=k)
+        df["id"] += k * 10_000_000
+        df["host_id"] += k * 10_000_000
+        escribir_csv(df, directorio / f"{ciudad}.csv")
+
+    return directorio
+
+
+def test_resolver_directorio_y_glob(archivos_ciudades, tmp_path):
+
+    assert [p.name for p in resolver_archivos(str(archivos_ciudades))] == ["lisboa.csv", "madrid.csv", "porto.csv"]
+    assert [p.name for p in resolver_archivos(str(archivos_ciudades / "m*.csv"))] == ["madrid.csv"]
+
+    with pytest.raises(FileNotFoundError):
+        resolver_archivos(str(tmp_path / "vacio" / "*.csv"))
+
+
+def test_nombre_ciudad(tmp_path):
+
+    assert nombre_ciudad(tmp_path / "madrid.csv") == "madrid"
+    assert nombre_ciudad(tmp_path / "lisboa" / "listings.csv.gz") == "lisboa"
+
+
+def test_procesar_ciudades_en_paralelo(archivos_ciudades, output_temporal):
+
+    df = procesar_ciudades(str(archivos_ciudades), workers=2)
+
+    assert sorted(df["market"].unique()) == ["LISBOA", "MADRID", "PORTO"]
+    assert df["id"].is_unique
+
+    # Categóricas unificadas entre ciudades, no degradadas a object
+    assert str(df["neighbourhood"].dtype) == "category"
+
+    # Cuarentena y calidad por ciudad + reporte general con los totales
+    reporte = json.loads((output_temporal / "data_quality_report.json").read_text())
+
+    for ciudad in ["lisboa", "madrid", "porto"]:
+        assert list((output_temporal / "ciudades" / ciudad / "cuarentena").glob("run=*/regla=*/*.parquet"))
+        assert (output_temporal / "ciudades" / ciudad / "data_quality_report.json").exists()
+
+    assert reporte["registros_finales"] == len(df)
+    assert reporte["registros_leidos"] == sum(c["registros_leidos"] for c in reporte["ciudades"].values())
+
+    # Métricas de etapa de cada worker en el proceso principal
+    assert export_steps()["ciudades.madrid.extract"]["rows_out"] == 500
+
+
+def test_market_en_dim_location(tmp_path, archivos_ciudades, monkeypatch):
+
+    config = get_config()["warehouse"]
+    monkeypatch.setitem(config, "backend", "sqlite")
+    monkeypatch.setitem(config, "sqlite_path", str(tmp_path / "dw.sqlite"))
+
+    df = procesar_ciudades(str(archivos_ciudades), workers=2)
+
+    ejecutar_carga(df)
+
+    conn = conectar_sqlite()
+
+    # Mismos barrios en cada ciudad: una fila de dim_location por ciudad
+    por_mercado = dict(conn.execute(
+        "SELECT market, COUNT(DISTINCT neighbourhood) FROM dw.dim_location GROUP BY market"
+    ).fetchall())
+
+    assert set(por_mercado) == {"LISBOA", "MADRID", "PORTO"}
+    assert len(set(por_mercado.values())) == 1
+
+    hechos = dict(conn.execute("""
+        SELECT dl.market, COUNT(*)
+        FROM dw.fact_listing_snapshot f
+        JOIN dw.dim_location dl ON f.location_key = dl.location_key
+        GROUP BY dl.market
+    """).fetchall())
+
+    assert hechos == df.groupby("market", observed=True)["id"].nunique().to_dict()
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import src.utils.columnar_cache as columnar_cache
+
+
+def test_segunda_lectura_no_parsea_csv(listings_df, tmp_path, cache_temporal, monkeypatch):
+
+    ruta_csv = tmp_path / "listings.csv"
+    listings_df.to_csv(ruta_csv, index=False)
+
+    df_original = columnar_cache.read_csv_cached(ruta_csv, encoding="utf-8")
+
+    def no_parsear(*args, **kwargs):
+        raise AssertionError("el CSV no debería parsearse de nuevo")
+
+    monkeypatch.setattr(columnar_cache.pd, "read_csv", no_parsear)
+
+    df_cache = columnar_cache.read_csv_cached(ruta_csv, encoding="utf-8")
+
+    pd.testing.assert_frame_equal(df_cache, df_original)
+
+
+def test_fallo_al_cachear_se_registra_y_devuelve_el_csv(listings_df, tmp_path, monkeypatch, caplog):
+
+    ruta_csv = tmp_path / "listings.csv"
+    listings_df.to_csv(ruta_csv, index=False)
+
+    def disco_lleno(*args, **kwargs):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(columnar_cache, "write_cache", disco_lleno)
+
+    df = columnar_cache.read_csv_cached(ruta_csv)
+
+    assert len(df) == len(listings_df)
+    assert "No se pudo cachear listings.csv: disco lleno" in caplog.text
+    assert [r.levelname for r in caplog.records] == ["WARNING"]
+
+
+def test_cambio_de_archivo_invalida_y_desaloja(listings_df, tmp_path, cache_temporal):
+
+    ruta_csv = tmp_path / "listings.csv"
+
+    for i in range(5):
+        listings_df.head(10 + i).to_csv(ruta_csv, index=False)
+        os.utime(ruta_csv, ns=(i * 10**9, i * 10**9))
+
+        df = columnar_cache.read_csv_cached(ruta_csv)
+
+        assert len(df) == 10 + i
+
+    assert len(list(cache_temporal.glob("listings-*.arrow"))) == 3
+
+
+def test_lectura_sin_copiar_las_columnas_numericas(tmp_path):
+
+    n = 200_000
+    df = pd.DataFrame({
+        "id": np.arange(n, dtype="int64"),
+        "price": np.linspace(10, 500, n),
+        "availability_365": np.resize(np.arange(366, dtype="int64"), n)
+    })
+
+    ruta = tmp_path / "entrada.arrow"
+    columnar_cache.write_cache(df, ruta)
+
+    antes = pa.total_allocated_bytes()
+    leido = columnar_cache.read_cache(ruta)
+    asignado = pa.total_allocated_bytes() - antes
+
+    # Las columnas son vistas sobre el archivo mapeado, no copias
+    assert asignado < df.memory_usage(index=False).sum() / 10
+    assert not leido["price"].to_numpy().flags.writeable
+    pd.testing.assert_frame_equal(leido, df)
+
+    # Reemplazar una columna entera funciona igual que con un frame propio
+    leido["price"] = leido["price"] * 2
+
+    assert leido["price"].iloc[-1] == 1000.0
@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.pipeline.cuarentena as cuarentena
+from src.pipeline.cuarentena import (
+    abrir_cuarentena,
+    cerrar_cuarentena,
+    enviar_cuarentena,
+    leer_cuarentena,
+    regla_principal
+)
+from src.pipeline.validate import ejecutar_validaciones_por_lotes
+from src.utils.config_loader import get_config
+
+
+BITS = {"duplicados": 1, "nulos": 2, "precios_invalidos": 4}
+
+
+def rechazados(n: int, motivos: int, inicio: int = 0) -> pd.DataFrame:
+
+    return pd.DataFrame({
+        "id": np.arange(inicio, inicio + n),
+        "neighbourhood": pd.Categorical(["A", "B"] * (n // 2)),
+        "motivos": np.full(n, motivos)
+    })
+
+
+def test_regla_principal_es_el_bit_mas_bajo():
+
+    assert regla_principal(np.array([1 | 4, 2, 4, 2 | 4]), BITS).tolist() == [
+        "duplicados", "nulos", "precios_invalidos", "nulos"
+    ]
+
+
+def test_particiones_por_regla_y_tope(tmp_path, monkeypatch):
+
+    monkeypatch.setitem(get_config()["validation"]["quarantine"], "max_rows_per_rule", 15)
+
+    escritor = abrir_cuarentena(tmp_path, BITS)
+
+    # Dos lotes: categorías distintas en cada uno, la partición se lee junta
+    enviar_cuarentena(escritor, rechazados(10, 2))
+    enviar_cuarentena(escritor, rechazados(10, 2 | 4, inicio=10).assign(
+        neighbourhood=pd.Categorical(["C", "D"] * 5)
+    ))
+    enviar_cuarentena(escritor, rechazados(4, 4, inicio=20))
+
+    resumen = cerrar_cuarentena(escritor)
+
+    assert resumen["filas_escritas"] == {"nulos": 15, "precios_invalidos": 4}
+    assert resumen["filas_omitidas"] == {"nulos": 5, "precios_invalidos": 0}
+
+    filas = leer_cuarentena(resumen["ruta"])
+
+    assert filas.groupby("regla").size().to_dict() == {"nulos": 15, "precios_invalidos": 4}
+    assert set(filas["neighbourhood"]) == {"A", "B", "C", "D"}
+    assert list((tmp_path / "cuarentena").glob("run=*/regla=nulos/part-*.parquet"))
+
+
+def test_error_del_hilo_escritor_se_relanza(tmp_path, monkeypatch):
+
+    def falla(escritor, df_malos):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(cuarentena, "escribir_entrega", falla)
+
+    escritor = abrir_cuarentena(tmp_path, BITS)
+    enviar_cuarentena(escritor, rechazados(2, 1))
+
+    with pytest.raises(OSError, match="disco lleno"):
+        cerrar_cuarentena(escritor)
+
+
+def test_solo_se_conservan_las_ultimas_ejecuciones(tmp_path, monkeypatch):
+
+    monkeypatch.setitem(get_config()["validation"]["quarantine"], "keep_runs", 2)
+
+    for _ in range(4):
+        cerrar_cuarentena(abrir_cuarentena(tmp_path, BITS))
+
+    assert len(list((tmp_path / "cuarentena").glob("run=*"))) <= 2
+
+
+def test_streaming_cierra_la_cuarentena_antes_del_reporte(listings_df, output_temporal):
+
+    lotes = [listings_df.iloc[inicio:inicio + 50] for inicio in range(0, len(listings_df), 50)]
+
+    validados = list(ejecutar_validaciones_por_lotes(iter(lotes)))
+
+    reporte = json.loads((output_temporal / "data_quality_report.json").read_text())
+    filas = leer_cuarentena(reporte["cuarentena"]["ruta"])
+
+    assert len(filas) == reporte["registros_en_cuarentena"]
+    assert sum(len(lote) for lote in validados) + len(filas) == len(listings_df)
@@ -0,0 +1,130 @@
+import pytest
+
+from src.utils.db_connector import ConnectionManager
+
+
+class ErrorFalso(Exception):
+    pass
+
+
+class ConexionFalsa:
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.viva = True
+        self.rollbacks = 0
+        self.timeout = None
+
+    def cursor(self):
+        return self
+
+    def execute(self, query):
+        if not self.viva:
+            raise ErrorFalso("08S01", "Communication link failure")
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        self.driver.cerradas += 1
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class DriverFalso:
+    """
+    Stand-in de pyodbc: falla las primeras `fallos` conexiones con un error transitorio.
+    """
+
+    Error = ErrorFalso
+
+    def __init__(self, fallos=0, sqlstate="08001"):
+        self.fallos = fallos
+        self.sqlstate = sqlstate
+        self.conexiones = []
+        self.cerradas = 0
+        self.kwargs = None
+
+    def connect(self, connection_string, **kwargs):
+        self.kwargs = kwargs
+
+        if self.fallos:
+            self.fallos -= 1
+            raise ErrorFalso(self.sqlstate, "TCP Provider: timeout")
+
+        conexion = ConexionFalsa(self)
+        self.conexiones.append(conexion)
+        return conexion
+
+
+def crear_manager(driver, **kwargs):
+    esperas = []
+    manager = ConnectionManager("DSN=falso", driver=driver, sleep=esperas.append, **kwargs)
+    return manager, esperas
+
+
+def test_reutiliza_conexiones_del_pool():
+
+    driver = DriverFalso()
+    manager, _ = crear_manager(driver, packet_size=4096)
+
+    with manager.connection():
+        pass
+    with manager.connection():
+        pass
+
+    assert len(driver.conexiones) == 1
+    assert driver.kwargs["attrs_before"] == {112: 4096}
+
+
+def test_reintento_con_backoff_exponencial():
+
+    driver = DriverFalso(fallos=2)
+    manager, esperas = crear_manager(driver, backoff_base=1.0)
+
+    manager.acquire().close()
+
+    assert len(esperas) == 2
+    assert 0.5 <= esperas[0] <= 1.0 and 1.0 <= esperas[1] <= 2.0
+
+
+def test_error_no_transitorio_no_se_reintenta():
+
+    driver = DriverFalso(fallos=1, sqlstate="28000")   # login fallido
+    manager, esperas = crear_manager(driver)
+
+    with pytest.raises(ErrorFalso):
+        manager.acquire()
+
+    assert esperas == []
+
+
+def test_ping_descarta_conexion_muerta():
+
+    driver = DriverFalso()
+    manager, _ = crear_manager(driver, ping_after_seconds=0)
+
+    manager.acquire().close()
+    driver.conexiones[0].viva = False
+
+    manager.acquire().close()
+
+    assert len(driver.conexiones) == 2
+    assert driver.cerradas == 1
+
+
+def test_rollback_al_salir_con_error():
+
+    driver = DriverFalso()
+    manager, _ = crear_manager(driver)
+
+    with pytest.raises(ValueError):
+        with manager.connection():
+            raise ValueError("fallo en la carga")
+
+    # rollback del context manager + rollback al devolverla al pool
+    assert driver.conexiones[0].rollbacks == 2
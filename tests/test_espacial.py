@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generar_listings
+from src.pipeline.espacial import celdas_geohash, centro_geohash
+from src.pipeline.load import COLUMNAS_CARGA, ejecutar_carga
+from src.pipeline.transform import transformar_listings
+from src.pipeline.validate import ejecutar_validaciones_listings
+from src.pipeline.warehouse import conectar_sqlite
+from src.utils.config_loader import get_config
+
+
+def test_geohash_conocido_y_nulos():
+
+    celdas = celdas_geohash(
+        pd.Series([57.64911, 57.64912, np.nan]),
+        pd.Series([10.40744, 10.40745, 10.0]),
+        precision=11
+    )
+
+    assert celdas[0] == "u4pruydqqvj"
+    assert celdas[2] == "UNKNOWN"
+
+    # Dos puntos a ~1 m caen en la misma celda de 153 m
+    assert len(set(celdas_geohash(pd.Series([57.64911, 57.64912]), pd.Series([10.40744, 10.40745]), 7))) == 1
+
+
+def test_centro_dentro_de_la_celda():
+
+    rng = np.random.default_rng(0)
+    lat = pd.Series(rng.uniform(-60, 60, 1000))
+    lon = pd.Series(rng.uniform(-180, 180, 1000))
+
+    celdas = celdas_geohash(lat, lon, precision=6)
+    centro_lat, centro_lon = centro_geohash(np.asarray(celdas))
+
+    # Celda de precisión 6: 0.0055° de latitud x 0.011° de longitud
+    assert np.abs(centro_lat - lat).max() <= 0.0055 / 2
+    assert np.abs(centro_lon - lon).max() <= 0.011 / 2
+
+    assert list(celdas_geohash(pd.Series(centro_lat), pd.Series(centro_lon), 6)) == list(celdas)
+
+
+def test_precision_invalida():
+
+    with pytest.raises(ValueError):
+        celdas_geohash(pd.Series([0.0]), pd.Series([0.0]), precision=13)
+
+
+def test_dim_location_una_fila_por_celda(tmp_path, monkeypatch):
+
+    config = get_config()["warehouse"]
+    monkeypatch.setitem(config, "backend", "sqlite")
+    monkeypatch.setitem(config, "sqlite_path", str(tmp_path / "dw.sqlite"))
+    monkeypatch.setitem(get_config()["location"], "geohash_precision", 4)
+
+    df = ejecutar_validaciones_listings(generar_listings(3000))
+
+    # Antes: una fila por combinación de barrio y coordenadas exactas
+    coordenadas = len(df[["neighbourhood_group", "neighbourhood", "latitude", "longitude"]].drop_duplicates())
+
+    df = transformar_listings(df, columnas_salida=COLUMNAS_CARGA)
+
+    ejecutar_carga(df)
+
+    conn = conectar_sqlite()
+
+    ubicaciones = conn.execute("SELECT COUNT(*) FROM dw.dim_location").fetchone()[0]
+    hechos = conn.execute("SELECT COUNT(*) FROM dw.fact_listing_snapshot").fetchone()[0]
+
+    claves = df[["market", "neighbourhood_group", "neighbourhood", "geohash"]].drop_duplicates()
+
+    assert ubicaciones == len(claves)
+    assert ubicaciones < coordenadas / 10
+    assert hechos == df["id"].nunique()
+
+    # Segunda carga: ninguna ubicación nueva
+    ejecutar_carga(df)
+
+    assert conn.execute("SELECT COUNT(*) FROM dw.dim_location").fetchone()[0] == ubicaciones
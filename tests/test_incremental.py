@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import src.pipeline.incremental as incremental
+from src.pipeline.load import COLUMNAS_CARGA, ejecutar_carga
+from src.pipeline.transform import transformar_listings
+from src.pipeline.validate import ejecutar_validaciones_listings
+from src.pipeline.warehouse import conectar_sqlite
+from src.utils.config_loader import get_config
+
+
+@pytest.fixture(autouse=True)
+def estado_temporal(tmp_path, monkeypatch):
+    ruta = tmp_path / "state" / "listing_hashes.npz"
+    monkeypatch.setattr(incremental, "get_state_path", lambda: ruta)
+    return ruta
+
+
+def test_primera_ejecucion_marca_todo(listings_df):
+
+    df = incremental.marcar_cambios(listings_df, incremental.cargar_estado(), {})
+
+    assert df[incremental.COLUMNA_CAMBIO].all()
+
+
+def test_solo_cambios_de_dimension_pasan_al_staging(listings_df):
+
+    listings_df = listings_df.drop_duplicates("id").reset_index(drop=True)
+
+    acumulado = {}
+    incremental.marcar_cambios(listings_df, None, acumulado)
+    incremental.confirmar_estado(acumulado)
+
+    nuevo = listings_df.copy()
+    nuevo.loc[0, "price"] = 999            # sólo afecta a la tabla de hechos
+    nuevo.loc[1, "host_name"] = "Otro"     # cambia dim_host
+    nuevo.loc[2, "id"] = 10**9             # listing nuevo
+
+    df = incremental.marcar_cambios(nuevo, incremental.cargar_estado(), {})
+
+    cambiados = np.flatnonzero(df[incremental.COLUMNA_CAMBIO].to_numpy())
+
+    assert cambiados.tolist() == [1, 2]
+    assert len(incremental.filas_para_dimension(df)) == 2
+
+
+def test_estado_no_se_salta_dimensiones_de_un_dw_nuevo(listings_df, tmp_path, monkeypatch):
+
+    df = transformar_listings(ejecutar_validaciones_listings(listings_df), columnas_salida=COLUMNAS_CARGA)
+
+    config = get_config()["warehouse"]
+    monkeypatch.setitem(config, "backend", "sqlite")
+    monkeypatch.setitem(config, "sqlite_path", str(tmp_path / "dw.sqlite"))
+
+    acumulado = {}
+    filas = ejecutar_carga(incremental.marcar_cambios(df, incremental.cargar_estado(), acumulado))
+    incremental.confirmar_estado(acumulado)
+
+    # DW reconstruido desde cero con el mismo estado incremental
+    monkeypatch.setitem(config, "sqlite_path", str(tmp_path / "dw_nuevo.sqlite"))
+
+    marcado = incremental.marcar_cambios(df, incremental.cargar_estado(), {})
+
+    assert not marcado[incremental.COLUMNA_CAMBIO].any()
+    assert ejecutar_carga(marcado) == filas > 0
+
+    conn = conectar_sqlite()
+
+    assert conn.execute("SELECT COUNT(*) FROM dw.fact_listing_snapshot").fetchone()[0] == filas
+    assert conn.execute("SELECT COUNT(*) FROM dw.dim_property").fetchone()[0] == df["id"].nunique()
@@ -0,0 +1,78 @@
+import datetime
+
+import pandas as pd
+
+from src.pipeline.key_cache import cargar_cache_claves, refrescar_cache, resolver_claves
+
+
+class CursorFalso:
+    """
+    Devuelve los resultados en el mismo orden en que cargar_cache_claves consulta.
+    """
+
+    def __init__(self, resultados):
+        self.resultados = list(resultados)
+        self.actual = None
+
+    def execute(self, query, *params):
+        self.actual = self.resultados.pop(0)
+
+    def fetchall(self):
+        return self.actual
+
+    def fetchone(self):
+        return self.actual[0]
+
+
+def cache_inicial():
+
+    cursor = CursorFalso([
+        [(30, 3), (10, 1), (20, 2)],                 # dim_property
+        [(7, 70)],                                   # dim_host vigentes
+        [("NYC", "UNKNOWN", "WARD A", "dr5regw", 5), ("NYC", "UNKNOWN", "WARD A", "dr5regw", 4)],  # dim_location
+        [(datetime.date(2026, 1, 1),)],              # snapshot_date
+        [(3,)]                                       # hechos de hoy
+    ])
+
+    return cargar_cache_claves(cursor)
+
+
+def test_resolucion_vectorizada_de_claves():
+
+    cache = cache_inicial()
+
+    df = pd.DataFrame({
+        "id": [20, 99],
+        "host_id": [7, 7],
+        "market": ["NYC", "NYC"],
+        "neighbourhood_group": ["UNKNOWN", "UNKNOWN"],
+        "neighbourhood": ["WARD A", "WARD B"],
+        "geohash": ["dr5regw", "dr5regw"]
+    })
+
+    df = resolver_claves(cache, df)
+
+    assert df["property_key"].tolist() == [2, -1]
+    assert df["host_key"].tolist() == [70, 70]
+    assert df["location_key"].tolist() == [4, -1]
+    assert cache["fact_hoy"] == {3}
+
+
+def test_refresco_tras_carga_de_dimension():
+
+    cache = cache_inicial()
+
+    refrescar_cache(cache, "property", [(99, 9)])
+    refrescar_cache(cache, "host", [(7, 71)])      # nueva versión SCD2
+    refrescar_cache(cache, "location", [("NYC", "UNKNOWN", "WARD B", "dr5regw", 6)])
+
+    df = resolver_claves(cache, pd.DataFrame({
+        "id": [99],
+        "host_id": [7],
+        "market": ["NYC"],
+        "neighbourhood_group": ["UNKNOWN"],
+        "neighbourhood": ["WARD B"],
+        "geohash": ["dr5regw"]
+    }))
+
+    assert df[["property_key", "host_key", "location_key"]].values.tolist() == [[9, 71, 6]]
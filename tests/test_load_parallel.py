@@ -0,0 +1,115 @@
+import pytest
+
+import src.pipeline.load as load
+
+
+class ConexionFalsa:
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def dimensiones_falsas(monkeypatch):
+    """
+    Reemplaza stage/merge de cada dimensión por funciones que registran
+    en qué conexión y con qué tabla de staging se ejecutaron.
+    """
+
+    registro = {"stage": {}, "merge": []}
+
+    def stage_falso(dim):
+        def funcion(cursor, df, stage):
+            if dim == "location" and df is None:
+                raise RuntimeError("fallo de red simulado")
+            registro["stage"][dim] = (cursor.nombre, stage)
+        return funcion
+
+    def merge_falso(dim):
+        def funcion(cursor, cache, stage):
+            registro["merge"].append((dim, cursor.nombre, stage))
+        return funcion
+
+    monkeypatch.setattr(load, "STAGES_DIMENSION", [
+        (dim, stage_falso(dim), merge_falso(dim)) for dim, _, _ in load.STAGES_DIMENSION
+    ])
+
+    return registro
+
+
+def test_staging_en_paralelo_y_merge_en_conexion_principal(dimensiones_falsas):
+
+    principal = ConexionFalsa("principal")
+    pool = [ConexionFalsa(f"pool{i}") for i in range(3)]
+
+    load.cargar_dimensiones_en_paralelo(pool, principal, object(), {}, "abc")
+
+    conexiones_stage = {nombre for nombre, _ in dimensiones_falsas["stage"].values()}
+
+    assert conexiones_stage == {"pool0", "pool1", "pool2"}
+    assert dimensiones_falsas["stage"]["host"][1] == "##host_stage__abc"
+    assert [nombre for _, nombre, _ in dimensiones_falsas["merge"]] == ["principal"] * 3
+    assert all(conn.commits == 1 for conn in pool)
+
+
+def test_fallo_de_staging_cancela_los_merges(dimensiones_falsas):
+
+    principal = ConexionFalsa("principal")
+    pool = [ConexionFalsa(f"pool{i}") for i in range(3)]
+
+    with pytest.raises(RuntimeError):
+        load.cargar_dimensiones_en_paralelo(pool, principal, None, {}, "abc")
+
+    assert dimensiones_falsas["merge"] == []
+    assert sum(conn.rollbacks for conn in pool) == 1
+
+
+class ConexionRota(ConexionFalsa):
+
+    def __init__(self, nombre):
+        super().__init__(nombre)
+        self.cerrada = False
+
+    def execute(self, sql):
+        raise RuntimeError("conexión caída")
+
+    def close(self):
+        self.cerrada = True
+
+
+def test_limpieza_no_tapa_el_error_ni_retiene_conexiones(monkeypatch):
+
+    principal = ConexionRota("principal")
+    pool = [ConexionRota(f"pool{i}") for i in range(3)]
+    conexiones = iter([principal] + pool)
+
+    monkeypatch.setattr(load, "get_warehouse", lambda: {
+        "conectar": lambda: next(conexiones),
+        "staging_paralelo": True
+    })
+    monkeypatch.setitem(load.get_config()["load"], "parallel_dimensions", True)
+
+    def cache_fallida(cursor):
+        raise ValueError("error original del load")
+
+    monkeypatch.setattr(load, "cargar_cache_claves", cache_fallida)
+
+    with pytest.raises(ValueError, match="error original"):
+        load.ejecutar_carga_por_lotes([])
+
+    assert principal.rollbacks == 1
+    assert all(conn.cerrada for conn in [principal] + pool)
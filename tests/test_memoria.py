@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generar_listings
+from src.pipeline.checkpoints import ejecutar_etapas, etapas_listings, huella_archivo
+from src.pipeline.incremental import calcular_hashes
+from src.pipeline.load import COLUMNAS_CARGA
+from src.pipeline.memoria import compactar, memoria_mb
+from src.pipeline.transform import normalizar_por_valor, transformar_listings
+from src.utils.metrics import export_steps, start_run
+
+
+def como_objetos(df: pd.DataFrame) -> pd.DataFrame:
+
+    return df.astype(object).where(df.notna(), None)
+
+
+def test_compactar_reduce_tipos_sin_cambiar_valores():
+
+    n = 1000
+    df = pd.DataFrame({
+        "host_name": np.resize(["Ana", "Luis", None], n).astype(object),
+        "name": [f"Listing {i}" for i in range(n)],
+        "minimum_nights": np.resize([1, 30, 365], n).astype("int64"),
+        "number_of_reviews": pd.array(np.resize([0, 5, None], n), dtype="Int64"),
+        "instant_bookable": pd.array(np.resize([True, False], n), dtype="boolean"),
+        "has_availability": pd.array(np.resize([True, None], n), dtype="boolean"),
+        "price": np.resize([99.99, 150.0], n)
+    })
+
+    compacto = compactar(df)
+
+    assert isinstance(compacto["host_name"].dtype, pd.CategoricalDtype)
+    assert not isinstance(compacto["name"].dtype, pd.CategoricalDtype)
+    assert compacto["minimum_nights"].dtype == "int16"
+    assert compacto["number_of_reviews"].dtype == "Int8"
+    assert compacto["instant_bookable"].dtype == bool
+    assert compacto["has_availability"].dtype == "boolean"
+    assert compacto["price"].dtype == "float64"
+
+    # `name` (un valor por fila) queda igual; el resto ocupa menos de la mitad
+    assert memoria_mb(compacto.drop(columns="name")) < memoria_mb(df.drop(columns="name")) / 2
+    pd.testing.assert_frame_equal(como_objetos(compacto), como_objetos(df))
+
+
+def test_compactar_no_cambia_los_hashes_incrementales(listings_df):
+
+    df = transformar_listings(listings_df, columnas_salida=COLUMNAS_CARGA)
+
+    assert (calcular_hashes(compactar(df)) == calcular_hashes(df)).all()
+
+
+def test_normalizacion_una_vez_por_valor_distinto():
+
+    llamadas = []
+
+    def aplicar(valor):
+        llamadas.append(valor)
+        return "UNKNOWN" if valor is None else valor.strip()
+
+    serie = pd.Series([" a", "b", " a", None, "b", None] * 100)
+
+    resultado = normalizar_por_valor(serie, aplicar)
+
+    assert resultado.tolist() == ["a", "b", "a", "UNKNOWN", "b", "UNKNOWN"] * 100
+    assert len(llamadas) == 3
+
+
+def test_etapas_compactas_reportan_memoria(tmp_path):
+
+    ruta = tmp_path / "listings.csv"
+    generar_listings(2000).to_csv(ruta, index=False)
+
+    normal = ejecutar_etapas(etapas_listings(ruta, COLUMNAS_CARGA), huella_archivo(ruta))
+
+    start_run()
+    compacto = ejecutar_etapas(etapas_listings(ruta, COLUMNAS_CARGA, compacta=True), huella_archivo(ruta))
+
+    pasos = export_steps()
+
+    for etapa in ("extract", "validate", "transform"):
+        assert pasos[f"memory.{etapa}"]["memory_compact_mb"] <= pasos[f"memory.{etapa}"]["memory_out_mb"]
+
+    assert memoria_mb(compacto) < memoria_mb(normal)
+    pd.testing.assert_frame_equal(como_objetos(compacto), como_objetos(normal))
@@ -0,0 +1,87 @@
+import json
+
+from src.pipeline.transform import transformar_listings
+from src.pipeline.validate import ejecutar_validaciones_listings
+from src.utils.metrics import measure, measure_iterator, start_run, write_metrics
+
+
+def test_metricas_por_etapa_y_paso(listings_df, output_temporal):
+
+    start_run()
+
+    df = ejecutar_validaciones_listings(listings_df)
+    df = transformar_listings(df)
+
+    ruta = write_metrics()
+    metricas = json.loads(ruta.read_text(encoding="utf-8"))
+
+    assert ruta == output_temporal / "pipeline_metrics.json"
+    assert metricas["status"] == "ok"
+    assert metricas["peak_rss_mb"] > 0
+
+    pasos = metricas["steps"]
+
+    assert pasos["validate"]["rows_in"] == len(listings_df)
+    assert pasos["validate"]["rows_out"] == len(df)
+    assert pasos["transform"]["rows_out"] == len(df)
+    assert pasos["transform.normalizar_textos"]["calls"] == 1
+
+    for paso in pasos.values():
+        assert paso["wall_s"] >= 0
+        assert paso["cpu_s"] >= 0
+        assert paso["peak_rss_growth_mb"] >= 0
+
+
+def test_metricas_se_acumulan_por_lote(listings_df):
+
+    start_run()
+
+    lotes = [listings_df.iloc[:100], listings_df.iloc[100:]]
+    assert len(list(measure_iterator("extract", lotes))) == 2
+
+    metricas = json.loads(write_metrics().read_text(encoding="utf-8"))
+
+    assert metricas["steps"]["extract"]["calls"] == 2
+    assert metricas["steps"]["extract"]["rows_out"] == len(listings_df)
+
+
+def test_modo_cprofile(listings_df, output_temporal):
+
+    start_run("cprofile")
+
+    transformar_listings(listings_df.dropna(subset=["price"]))
+
+    write_metrics()
+
+    assert (output_temporal / "pipeline_profile.prof").exists()
+    assert "transformar_listings" in (output_temporal / "pipeline_profile.txt").read_text(encoding="utf-8")
+
+
+def test_modo_tracemalloc(listings_df, output_temporal):
+
+    start_run("tracemalloc")
+
+    transformar_listings(listings_df.dropna(subset=["price"]))
+
+    metricas = json.loads(write_metrics().read_text(encoding="utf-8"))
+
+    assert "tracemalloc_peak_mb" in metricas["steps"]["transform"]
+    assert (output_temporal / "pipeline_tracemalloc.txt").exists()
+
+
+def test_pico_tracemalloc_con_pasos_anidados(output_temporal):
+
+    start_run("tracemalloc")
+
+    with measure("externo"):
+        bloque = bytearray(50 * 1024 ** 2)
+        del bloque
+
+        # El paso interno reinicia el pico de tracemalloc al entrar
+        with measure("interno"):
+            bytearray(1024 ** 2)
+
+    pasos = json.loads(write_metrics().read_text(encoding="utf-8"))["steps"]
+
+    assert pasos["externo"]["tracemalloc_peak_mb"] >= 50
+    assert pasos["interno"]["tracemalloc_peak_mb"] < 50
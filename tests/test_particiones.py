@@ -0,0 +1,114 @@
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic import generar_listings
+from src.pipeline.load import COLUMNAS_CARGA, ejecutar_carga
+from src.pipeline.particiones import (
+    FACT_SWITCH,
+    ddl_indices_switch,
+    ddl_limites,
+    ddl_tabla_switch,
+    sentencias_fact,
+    sql_switch
+)
+from src.pipeline.transform import transformar_listings
+from src.pipeline.validate import ejecutar_validaciones_listings
+from src.pipeline.warehouse import conectar_sqlite, traducir_sqlite
+from src.utils.config_loader import get_config
+
+
+@pytest.fixture
+def warehouse_sqlite(tmp_path, monkeypatch):
+
+    config = get_config()["warehouse"]
+    monkeypatch.setitem(config, "backend", "sqlite")
+    monkeypatch.setitem(config, "sqlite_path", str(tmp_path / "dw.sqlite"))
+    monkeypatch.setitem(get_config()["load"], "fact_strategy", "switch")
+
+
+@pytest.fixture
+def listings_transformados():
+
+    df = ejecutar_validaciones_listings(generar_listings(1000))
+
+    return transformar_listings(df, columnas_salida=COLUMNAS_CARGA)
+
+
+def test_staging_alineada_con_la_tabla_de_hechos():
+
+    tabla = sentencias_fact()["tabla"]
+    staging = ddl_tabla_switch("2024-05-01")
+
+    # Mismas columnas y mismo esquema de partición; nombres propios
+    columnas = tabla.rsplit("\n)", 1)[0]
+
+    assert staging.replace("_switch", "").startswith(columnas)
+    assert staging.rstrip().endswith("ON ps_snapshot_date(snapshot_date)")
+    assert "CHECK (snapshot_date = '2024-05-01')" in staging
+    assert "PK_fact_listing_switch" in staging
+
+    indices = ddl_indices_switch()
+
+    assert indices[0].startswith(f"CREATE CLUSTERED INDEX cci_fact_listing_switch ON {FACT_SWITCH}(location_key")
+    assert "DROP_EXISTING = ON, MAXDOP = 1" in indices[1]
+    assert len(indices) == 2 + len(sentencias_fact()["indices"])
+
+
+def test_sql_de_limites_y_switch():
+
+    limites = ddl_limites("2024-05-01")
+
+    assert "SPLIT RANGE ('2024-05-01')" in limites[0]
+    assert "SPLIT RANGE ('2024-05-02')" in limites[1]
+
+    assert sql_switch(7) == [
+        "TRUNCATE TABLE dw.fact_listing_snapshot WITH (PARTITIONS (7));",
+        f"ALTER TABLE {FACT_SWITCH} SWITCH PARTITION 7 TO dw.fact_listing_snapshot PARTITION 7;",
+        f"DROP TABLE {FACT_SWITCH};"
+    ]
+
+
+def test_check_de_la_staging_rechaza_otros_dias(warehouse_sqlite):
+
+    conn = conectar_sqlite()
+    conn.execute(traducir_sqlite(ddl_tabla_switch("2024-05-01")))
+
+    conn.execute(f"INSERT INTO {FACT_SWITCH}(snapshot_date, property_key, host_key, location_key) VALUES ('2024-05-01', 1, 1, 1)")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute(f"INSERT INTO {FACT_SWITCH}(snapshot_date, property_key, host_key, location_key) VALUES ('2024-05-02', 2, 1, 1)")
+
+
+def test_recarga_del_dia_reemplaza_la_particion(warehouse_sqlite, listings_transformados):
+
+    ejecutar_carga(listings_transformados)
+
+    # Segunda carga del mismo día: precios nuevos y 100 listings menos
+    recarga = listings_transformados.iloc[100:].assign(price=1.0)
+
+    ejecutar_carga(recarga)
+
+    conn = conectar_sqlite()
+
+    filas, precio = conn.execute("SELECT COUNT(*), MAX(price) FROM dw.fact_listing_snapshot").fetchone()
+
+    assert filas == recarga["id"].nunique()
+    assert precio == 1.0
+
+    # La staging no sobrevive a la carga
+    assert conn.execute(
+        "SELECT COUNT(*) FROM dw.sqlite_master WHERE name = 'fact_listing_snapshot_switch'"
+    ).fetchone()[0] == 0
+
+
+def test_modo_insert_conserva_los_hechos_del_dia(warehouse_sqlite, listings_transformados, monkeypatch):
+
+    monkeypatch.setitem(get_config()["load"], "fact_strategy", "insert")
+
+    ejecutar_carga(listings_transformados)
+    ejecutar_carga(listings_transformados.assign(price=1.0))
+
+    conn = conectar_sqlite()
+
+    assert conn.execute("SELECT MIN(price) FROM dw.fact_listing_snapshot").fetchone()[0] > 1.0
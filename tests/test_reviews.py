@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from src.pipeline.reviews import agregar_reviews, cargar_watermark, guardar_watermark
+from src.utils.config_loader import get_config
+
+
+def reviews(n: int = 1000, seed: int = 3) -> pd.DataFrame:
+
+    rng = pd.Series(range(n)).sample(frac=1, random_state=seed).to_numpy()
+
+    return pd.DataFrame({
+        "listing_id": (rng % 7) + 1,
+        "date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng % 30, unit="D")
+    }).assign(date=lambda df: df["date"].dt.strftime("%Y-%m-%d"))
+
+
+@pytest.fixture
+def watermark_temporal(tmp_path, monkeypatch):
+    monkeypatch.setitem(get_config()["reviews"], "watermark_path", str(tmp_path / "wm.json"))
+
+
+def test_parciales_equivalen_al_agregado_completo(monkeypatch):
+
+    df = reviews()
+
+    # Compacta en cada lote: ejercita la combinación de parciales
+    monkeypatch.setitem(get_config()["reviews"], "max_partial_rows", 1)
+
+    por_lotes = agregar_reviews([df.iloc[i:i + 97] for i in range(0, len(df), 97)])
+    completo = agregar_reviews([df])
+
+    clave = ["listing_id", "review_date"]
+
+    pd.testing.assert_frame_equal(
+        por_lotes.sort_values(clave).reset_index(drop=True),
+        completo.sort_values(clave).reset_index(drop=True)
+    )
+    assert por_lotes["review_count"].sum() == len(df)
+
+
+def test_watermark_filtra_reviews_antiguas(watermark_temporal):
+
+    assert cargar_watermark() is None
+
+    guardar_watermark(pd.Timestamp("2025-01-20"))
+    watermark = cargar_watermark()
+
+    agregado = agregar_reviews([reviews()], watermark)
+
+    # El día del watermark se reprocesa entero
+    assert agregado["review_date"].min() == pd.Timestamp("2025-01-20")
+
+
+def test_reviews_invalidas_se_ignoran():
+
+    df = pd.DataFrame({"listing_id": [1, None, 2], "date": ["2025-01-01", "2025-01-01", "no es fecha"]})
+
+    agregado = agregar_reviews([df])
+
+    assert agregado["review_count"].tolist() == [1]
@@ -0,0 +1,167 @@
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generar_listings
+from src.pipeline.load import COLUMNAS_CARGA, ejecutar_carga
+from src.pipeline.scd import DIMENSIONES, get_politica, hash_filas, preparar_stage, sql_tipo_1
+from src.pipeline.transform import transformar_listings
+from src.pipeline.validate import ejecutar_validaciones_listings
+from src.pipeline.warehouse import conectar_sqlite
+from src.utils.config_loader import get_config
+
+
+@pytest.fixture
+def warehouse_sqlite(tmp_path, monkeypatch):
+
+    config = get_config()["warehouse"]
+    monkeypatch.setitem(config, "backend", "sqlite")
+    monkeypatch.setitem(config, "sqlite_path", str(tmp_path / "dw.sqlite"))
+
+
+@pytest.fixture
+def listings_transformados():
+
+    df = ejecutar_validaciones_listings(generar_listings(1000))
+
+    return transformar_listings(df, columnas_salida=COLUMNAS_CARGA)
+
+
+def versiones_host(host_id: int) -> list:
+
+    return conectar_sqlite().execute(
+        "SELECT host_name, is_current, row_hash FROM dw.dim_host WHERE host_id = ? ORDER BY host_key",
+        (host_id,)
+    ).fetchall()
+
+
+def test_hash_no_depende_del_dtype():
+
+    # Frame transformado (compacto) vs filas leídas del DW por pyodbc
+    frame = pd.DataFrame({
+        "listing_name": pd.Categorical(["Casa", "Depto", "Casa"]),
+        "room_type": pd.Series(["Entire home/apt", "Private room", None], dtype="str"),
+        "minimum_nights": pd.Series([1, 30, 365], dtype="int16"),
+        "license": ["123", "STR-1", None]
+    })
+    dw = pd.DataFrame({
+        "listing_name": ["Casa", "Depto", "Casa"],
+        "room_type": ["Entire home/apt", "Private room", None],
+        "minimum_nights": [Decimal(1), Decimal(30), Decimal(365)],
+        "license": ["123", "STR-1", None]
+    })
+
+    columnas = DIMENSIONES["property"]["atributos"]
+    numericas = DIMENSIONES["property"]["numericas"]
+
+    assert hash_filas(frame, columnas, numericas).tolist() == hash_filas(dw, columnas, numericas).tolist()
+
+    # Un atributo distinto cambia el hash
+    otro = frame.assign(minimum_nights=frame["minimum_nights"].replace({30: 31}))
+
+    assert (hash_filas(otro, columnas, numericas) != hash_filas(frame, columnas, numericas)).tolist() == [False, True, False]
+
+
+def test_stage_una_fila_por_business_key():
+
+    stage = preparar_stage("host", pd.DataFrame({
+        "host_id": [1, 1, 2],
+        "host_name": ["Ana", "ANA", "Luis"],
+        "calculated_host_listings_count": [1, 1, 3]
+    }))
+
+    assert stage["host_id"].tolist() == [1, 2]
+    assert stage["host_name"].tolist() == ["ANA", "Luis"]
+    assert stage["row_hash"].dtype == "int64"
+
+
+def test_politica_invalida(monkeypatch):
+
+    monkeypatch.setitem(get_config()["scd"], "property", {"type": 2, "tracked": ["room_type"]})
+
+    with pytest.raises(ValueError, match="vigencia"):
+        get_politica("property")
+
+    monkeypatch.setitem(get_config()["scd"], "property", {"type": 1, "tracked": ["price"]})
+
+    with pytest.raises(ValueError, match="subconjunto"):
+        get_politica("property")
+
+
+def test_una_sola_comparacion_de_hash_por_cambio():
+
+    sql = sql_tipo_1(DIMENSIONES["property"], "temp.property_stage")
+
+    assert sql.count("<>") == 1
+    assert "row_hash <> dim_property.row_hash" in sql
+
+    # Join contra el staging, no una subconsulta correlacionada por columna
+    assert "FROM temp.property_stage s" in sql
+    assert "SELECT" not in sql
+
+
+def test_scd2_host_varias_versiones(warehouse_sqlite, listings_transformados):
+
+    ejecutar_carga(listings_transformados)
+
+    host = int(listings_transformados["host_id"].iloc[0])
+
+    for nombre in ("PRIMER CAMBIO", "SEGUNDO CAMBIO"):
+        cambiado = listings_transformados.copy()
+        cambiado.loc[cambiado["host_id"] == host, "host_name"] = nombre
+        ejecutar_carga(cambiado)
+
+    versiones = versiones_host(host)
+
+    assert [v[1] for v in versiones] == [0, 0, 1]
+    assert versiones[-1][0] == "SEGUNDO CAMBIO"
+    assert len({v[2] for v in versiones}) == 3
+
+
+def test_property_tipo_1_actualiza_en_el_lugar(warehouse_sqlite, listings_transformados):
+
+    ejecutar_carga(listings_transformados)
+
+    conn = conectar_sqlite()
+    listing = int(listings_transformados["id"].iloc[0])
+    antes = conn.execute(
+        "SELECT property_key, minimum_nights FROM dw.dim_property WHERE listing_id = ?", (listing,)
+    ).fetchone()
+
+    cambiado = listings_transformados.copy()
+    cambiado.loc[cambiado["id"] == listing, "minimum_nights"] = antes[1] + 7
+
+    ejecutar_carga(cambiado)
+
+    despues = conn.execute(
+        "SELECT property_key, minimum_nights FROM dw.dim_property WHERE listing_id = ?", (listing,)
+    ).fetchall()
+
+    assert despues == [(antes[0], antes[1] + 7)]
+
+
+def test_cambiar_columnas_rastreadas_no_versiona_todo(warehouse_sqlite, listings_transformados, monkeypatch):
+
+    ejecutar_carga(listings_transformados)
+
+    conn = conectar_sqlite()
+    hosts = conn.execute("SELECT COUNT(*) FROM dw.dim_host").fetchone()[0]
+
+    monkeypatch.setitem(get_config()["scd"], "host", {"type": 2, "tracked": ["host_name"]})
+
+    ejecutar_carga(listings_transformados)
+
+    assert conn.execute("SELECT COUNT(*) FROM dw.dim_host").fetchone()[0] == hosts
+    assert conn.execute(
+        "SELECT tracked FROM dw.scd_hash_signature WHERE dimension = 'host'"
+    ).fetchone()[0] == "host_name"
+
+    # Con la nueva lista un cambio de calculated_host_listings_count ya no versiona
+    host = int(listings_transformados["host_id"].iloc[0])
+    cambiado = listings_transformados.copy()
+    cambiado.loc[cambiado["host_id"] == host, "calculated_host_listings_count"] += 1
+
+    ejecutar_carga(cambiado)
+
+    assert [v[1] for v in versiones_host(host)] == [1]
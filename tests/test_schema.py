@@ -0,0 +1,37 @@
+import pandas as pd
+
+import src.pipeline.extract as extract
+from src.pipeline.validate import ejecutar_validaciones_listings
+from src.pipeline.transform import transformar_listings
+
+
+def escribir_csv(df, tmp_path, monkeypatch):
+    ruta_csv = tmp_path / "listings.csv"
+    df.to_csv(ruta_csv, index=False)
+    monkeypatch.setattr(extract, "get_data_path", lambda filename: ruta_csv)
+
+
+def test_extract_aplica_esquema(listings_df, tmp_path, monkeypatch):
+
+    listings_df["instant_bookable"] = "t"
+    escribir_csv(listings_df, tmp_path, monkeypatch)
+
+    df = extract.extract_listings()
+
+    assert "last_review" not in df.columns
+    assert isinstance(df["room_type"].dtype, pd.CategoricalDtype)
+    assert df["instant_bookable"].dtype == "boolean"
+    assert df["id"].dtype == "Int64"
+
+
+def test_transform_con_esquema_tipado(listings_df, tmp_path, monkeypatch):
+
+    listings_df.loc[0, "neighbourhood"] = "  ward a "
+    escribir_csv(listings_df, tmp_path, monkeypatch)
+
+    df = ejecutar_validaciones_listings(extract.extract_listings())
+    df = transformar_listings(df)
+
+    assert "UNKNOWN" in set(df["neighbourhood_group"])
+    assert set(df["neighbourhood"]) <= set(listings_df["neighbourhood"].str.strip().str.upper())
+    assert df["number_of_reviews"].isna().sum() == 0
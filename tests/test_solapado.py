@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from src.pipeline.load import COLUMNAS_CARGA, ejecutar_carga_por_lotes
+from src.pipeline.solapado import ejecucion_solapada, en_hilo
+from src.pipeline.transform import transformar_listings_por_lotes
+from src.pipeline.validate import ejecutar_validaciones_por_lotes
+from src.pipeline.warehouse import conectar_sqlite
+from src.utils.config_loader import get_config
+
+
+@pytest.fixture
+def warehouse_sqlite(tmp_path, monkeypatch):
+
+    config = get_config()["warehouse"]
+    monkeypatch.setitem(config, "backend", "sqlite")
+    monkeypatch.setitem(config, "sqlite_path", str(tmp_path / "dw.sqlite"))
+
+
+def partir(df, chunk_size):
+    for inicio in range(0, len(df), chunk_size):
+        yield df.iloc[inicio:inicio + chunk_size].copy()
+
+
+def numeros(n, producidos=None, demora=0.0, cerrado=None):
+    try:
+        for i in range(n):
+            time.sleep(demora)
+            if producidos is not None:
+                producidos.append(i)
+            yield i
+    finally:
+        if cerrado is not None:
+            cerrado.set()
+
+
+def test_orden_y_etapas_solapadas():
+
+    hilos = []
+
+    def etapa(lotes):
+        for lote in lotes:
+            hilos.append(threading.current_thread().name)
+            yield lote * 10
+
+    inicio = time.perf_counter()
+
+    with ejecucion_solapada(2) as ejecucion:
+        lotes = en_hilo(ejecucion, "extract", numeros(10, demora=0.03))
+        lotes = en_hilo(ejecucion, "transform", etapa(lotes))
+
+        resultado = []
+        for lote in lotes:
+            time.sleep(0.03)
+            resultado.append(lote)
+
+    assert resultado == [i * 10 for i in range(10)]
+    assert set(hilos) == {"pipelined-transform"}
+
+    # En serie serían 10 * (0.03 + 0.03) segundos
+    assert time.perf_counter() - inicio < 0.5
+
+
+def test_contrapresion_acota_los_lotes_adelantados():
+
+    producidos = []
+    adelantos = []
+
+    with ejecucion_solapada(1) as ejecucion:
+        for lote in en_hilo(ejecucion, "extract", numeros(20, producidos)):
+            time.sleep(0.01)
+            adelantos.append(len(producidos) - (lote + 1))
+
+    # Uno en la cola más uno esperando para entrar
+    assert max(adelantos) <= 2
+
+
+def test_error_del_productor_llega_al_consumidor():
+
+    cerrado = threading.Event()
+
+    def falla(lotes):
+        for lote in lotes:
+            if lote == 3:
+                raise ValueError("lote inválido")
+            yield lote
+
+    recibidos = []
+
+    with pytest.raises(ValueError, match="lote inválido"):
+        with ejecucion_solapada(2) as ejecucion:
+            lotes = en_hilo(ejecucion, "extract", numeros(100, cerrado=cerrado))
+            lotes = en_hilo(ejecucion, "transform", falla(lotes))
+
+            for lote in lotes:
+                recibidos.append(lote)
+
+    # Lo que quedaba en la cola al fallar se descarta
+    assert recibidos == [0, 1, 2][:len(recibidos)]
+    assert cerrado.is_set()
+    assert not any(hilo.is_alive() for hilo in ejecucion["hilos"])
+
+
+def test_error_del_consumidor_cancela_los_productores():
+
+    cerrado = threading.Event()
+
+    with pytest.raises(RuntimeError, match="carga"):
+        with ejecucion_solapada(2) as ejecucion:
+            for lote in en_hilo(ejecucion, "extract", numeros(10_000, cerrado=cerrado)):
+                if lote == 5:
+                    raise RuntimeError("falló la carga")
+
+    assert cerrado.is_set()
+    assert not any(hilo.is_alive() for hilo in ejecucion["hilos"])
+
+
+def test_carga_solapada_igual_a_serie(warehouse_sqlite, listings_df):
+
+    def cadena(df):
+        lotes = ejecutar_validaciones_por_lotes(partir(df, 37))
+        return transformar_listings_por_lotes(lotes, COLUMNAS_CARGA)
+
+    filas_serie = ejecutar_carga_por_lotes(cadena(listings_df))
+
+    conn = conectar_sqlite()
+    conn.execute("DELETE FROM dw.fact_listing_snapshot")
+    conn.commit()
+
+    with ejecucion_solapada(2) as ejecucion:
+        lotes = en_hilo(ejecucion, "extract", partir(listings_df, 37))
+        lotes = transformar_listings_por_lotes(ejecutar_validaciones_por_lotes(lotes), COLUMNAS_CARGA)
+        filas_solapado = ejecutar_carga_por_lotes(en_hilo(ejecucion, "transform", lotes))
+
+    assert filas_solapado == filas_serie > 0
+    assert conectar_sqlite().execute(
+        "SELECT COUNT(*) FROM dw.fact_listing_snapshot"
+    ).fetchone()[0] == filas_serie
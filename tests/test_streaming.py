@@ -0,0 +1,43 @@
+import json
+
+from src.pipeline.validate import (
+    ejecutar_validaciones_listings,
+    ejecutar_validaciones_por_lotes
+)
+from src.pipeline.transform import transformar_listings, transformar_listings_por_lotes
+
+
+def partir(df, chunk_size):
+    for inicio in range(0, len(df), chunk_size):
+        yield df.iloc[inicio:inicio + chunk_size].copy()
+
+
+def test_metricas_streaming_igual_a_batch(listings_df, output_temporal):
+
+    df_batch = ejecutar_validaciones_listings(listings_df.copy())
+    metricas_batch = json.loads((output_temporal / "data_quality_report.json").read_text())
+
+    lotes = list(ejecutar_validaciones_por_lotes(partir(listings_df, 37)))
+    metricas_streaming = json.loads((output_temporal / "data_quality_report.json").read_text())
+
+    # Cada ejecución escribe su propia partición de cuarentena
+    cuarentena_batch = metricas_batch.pop("cuarentena")
+    cuarentena_streaming = metricas_streaming.pop("cuarentena")
+
+    assert cuarentena_streaming["filas_escritas"] == cuarentena_batch["filas_escritas"]
+    assert cuarentena_streaming["ruta"] != cuarentena_batch["ruta"]
+
+    assert metricas_streaming == metricas_batch
+    assert sum(len(lote) for lote in lotes) == len(df_batch)
+
+
+def test_surrogate_keys_consecutivas_entre_lotes(listings_df):
+
+    df = ejecutar_validaciones_listings(listings_df)
+
+    batch = transformar_listings(df.copy())
+    streaming = list(transformar_listings_por_lotes(partir(df, 50)))
+
+    claves = [k for lote in streaming for k in lote["listing_sk_temp"]]
+
+    assert claves == list(batch["listing_sk_temp"])
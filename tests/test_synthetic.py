@@ -0,0 +1,32 @@
+import pandas as pd
+
+from benchmarks.synthetic import escribir_csv, generar_listings
+from src.pipeline.extract import extract_listings
+from src.pipeline.transform import transformar_listings
+
+
+def test_generador_determinista():
+
+    pd.testing.assert_frame_equal(generar_listings(1000, seed=7), generar_listings(1000, seed=7))
+
+
+def test_csv_sintetico_respeta_esquema(tmp_path):
+
+    ruta = escribir_csv(generar_listings(1000), tmp_path / "listings.csv")
+    df = extract_listings(ruta)
+
+    assert df["price"].dtype == "float64"
+    assert df["host_is_superhost"].dtype == "boolean"
+    assert isinstance(df["room_type"].dtype, pd.CategoricalDtype)
+    assert df["price"].isna().any()
+
+
+def test_precios_formateados_se_normalizan():
+
+    df = generar_listings(1000, precio_texto=True)
+
+    assert df["price"].dropna().str.startswith("$").all()
+
+    df = transformar_listings(df.dropna(subset=["price"]), columnas_salida=["id", "price"])
+
+    assert pd.api.types.is_float_dtype(df["price"])
@@ -0,0 +1,67 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.transform import nombres_flags_amenities, planificar_transformacion, transformar_listings
+from src.utils.metrics import export_steps, start_run
+
+
+def test_plan_omite_pasos_no_necesarios(listings_df):
+
+    plan = planificar_transformacion(listings_df, ["id", "host_id", "price", "neighbourhood"])
+
+    assert "clasificar_precio" in plan["reporte"]["pasos_omitidos"]
+    assert "calcular_ingreso_estimado" in plan["reporte"]["pasos_omitidos"]
+    assert "last_review" in plan["reporte"]["columnas_descartadas"]
+    assert "sanitizar_precio" not in plan["reporte"]["pasos_omitidos"]
+
+
+def test_transform_con_columnas_salida(listings_df):
+
+    entrada = listings_df.dropna(subset=["price"])
+    df = transformar_listings(entrada, columnas_salida=["id", "neighbourhood_group", "minimum_nights"])
+
+    # Los flags de amenities se conservan en cualquier salida
+    assert list(df.columns) == ["id", "neighbourhood_group", "minimum_nights"] + nombres_flags_amenities()
+    assert set(df["neighbourhood_group"]) <= set(entrada["neighbourhood_group"].dropna().str.upper()) | {"UNKNOWN"}
+
+    reporte = df.attrs["plan_transformacion"]
+    descartadas = entrada[reporte["columnas_descartadas"]]
+
+    assert "last_review" in reporte["columnas_descartadas"]
+    assert reporte["memoria_descartada_mb"] == round(
+        descartadas.memory_usage(deep=True, index=False).sum() / 1024 ** 2, 2
+    )
+    assert reporte["memoria_descartada_mb"] > 0
+
+
+def test_memoria_de_los_pasos_medida_con_tracemalloc(listings_df):
+
+    start_run("tracemalloc")
+
+    try:
+        transformar_listings(listings_df.dropna(subset=["price"]))
+        pasos = export_steps()
+    finally:
+        tracemalloc.stop()
+        start_run()
+
+    assert pasos["transform.normalizar_textos"]["tracemalloc_peak_mb"] >= 0
+    assert "tracemalloc_peak_mb" in pasos["transform"]
+
+
+def test_transform_completo_mantiene_features(listings_df):
+
+    df = listings_df.dropna(subset=["price"]).copy()
+    df.loc[df.index[0], "name"] = np.nan
+    df.loc[df.index[1], "name"] = "  Loft  "
+
+    df = transformar_listings(df)
+
+    for col in ["ingreso_estimado", "tasa_ocupacion", "categoria_precio", "listing_sk_temp"]:
+        assert col in df.columns
+
+    assert df.loc[0, "name"] == "UNKNOWN"
+    assert df.loc[1, "name"] == "Loft"
+    assert df["minimum_nights"].dtype == "int32"
@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.cuarentena import leer_cuarentena
+from src.pipeline.validate import (
+    calcular_motivos,
+    compilar_reglas,
+    ejecutar_validaciones_listings,
+    evaluar_reglas
+)
+
+
+REGLAS = {
+    "duplicados": {"type": "unique", "columns": ["id"]},
+    "nulos": {"type": "not_null", "columns": ["id", "price"]},
+    "precios_invalidos": {"type": "range", "bounds": {"price": [10, 10000]}}
+}
+
+
+def test_bitmask_combina_motivos():
+
+    df = pd.DataFrame({
+        "id": [1, 1, 2, 3],
+        "price": [50.0, 5.0, np.nan, 20000.0]
+    })
+
+    reglas = compilar_reglas(REGLAS)
+    matriz = evaluar_reglas(df, reglas)
+
+    assert calcular_motivos(matriz, reglas).tolist() == [0, 1 | 4, 2, 4]
+    assert matriz.sum(axis=0).tolist() == [1, 1, 2]
+
+
+def test_unique_entre_lotes_igual_a_batch():
+
+    df = pd.DataFrame({
+        "id": [1, 2, 3, 3, 4, 1, 5, 5, 2, 6],
+        "host": ["a", "b", "a", "a", "b", "a", "c", "c", "b", "a"]
+    })
+
+    reglas = compilar_reglas({
+        "duplicados": {"type": "unique", "columns": ["id"]},
+        "par_repetido": {"type": "unique", "columns": ["id", "host"]},
+        "host_repetido": {"type": "unique", "columns": ["host"]}
+    })
+
+    batch = evaluar_reglas(df, reglas)
+
+    estado = {}
+    streaming = np.vstack([
+        evaluar_reglas(df.iloc[inicio:inicio + 3], reglas, estado)
+        for inicio in range(0, len(df), 3)
+    ])
+
+    assert batch[:, 0].tolist() == [False, False, False, True, False, True, False, True, True, False]
+    assert (streaming == batch).all()
+
+    # Por lote sólo queda un arreglo ordenado de claves distintas
+    assert estado["duplicados"]["claves"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert len(estado["host_repetido"]["claves"]) == 3
+
+
+def test_unique_entre_lotes_con_y_sin_nulos():
+
+    reglas = compilar_reglas({
+        "duplicados": {"type": "unique", "columns": ["id"]},
+        "par_repetido": {"type": "unique", "columns": ["id", "host"]}
+    })
+
+    lotes = [
+        pd.DataFrame({"id": pd.array([1, 2, 3], dtype="Int64"), "host": ["a", "b", "c"]}),
+        pd.DataFrame({"id": pd.array([1, None, 5], dtype="Int64"), "host": ["a", "b", "c"]}),
+        # Sin esquema: el id con nulos llega como float
+        pd.DataFrame({"id": [np.nan, 5.0, 2.0], "host": ["x", "c", "z"]})
+    ]
+
+    estado = {}
+    matriz = np.vstack([evaluar_reglas(lote, reglas, estado) for lote in lotes])
+
+    assert matriz[:, 0].tolist() == [False, False, False, True, False, False, False, True, True]
+    assert matriz[:, 1].tolist() == [False, False, False, True, False, False, False, True, False]
+
+
+def test_cuarentena_unica_con_motivos(listings_df, output_temporal):
+
+    df = ejecutar_validaciones_listings(listings_df)
+
+    reporte = json.loads((output_temporal / "data_quality_report.json").read_text())
+    cuarentena = leer_cuarentena(reporte["cuarentena"]["ruta"])
+
+    assert reporte["registros_en_cuarentena"] == len(cuarentena)
+    assert reporte["registros_finales"] == len(df)
+    assert reporte["registros_leidos"] == len(df) + len(cuarentena)
+    assert (cuarentena["motivos"] > 0).all()
+
+    for nombre, bit in reporte["bits_motivos"].items():
+        assert reporte[nombre] == int(((cuarentena["motivos"] & bit) > 0).sum())
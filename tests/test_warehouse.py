@@ -0,0 +1,257 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generar_listings
+from src.pipeline.amenities import pares_amenities
+from src.pipeline.load import COLUMNAS_CARGA, ejecutar_carga, ejecutar_carga_reviews
+from src.pipeline.memoria import compactar
+from src.pipeline.reviews import agregar_reviews
+from src.pipeline.transform import transformar_listings
+from src.pipeline.validate import ejecutar_validaciones_listings
+from src.pipeline.warehouse import WAREHOUSES, conectar_sqlite, ejecutar_consulta, sentencias_esquema, leer_sql
+from src.utils.config_loader import get_config
+
+
+@pytest.fixture
+def warehouse_sqlite(tmp_path, monkeypatch):
+
+    config = get_config()["warehouse"]
+    monkeypatch.setitem(config, "backend", "sqlite")
+    monkeypatch.setitem(config, "sqlite_path", str(tmp_path / "dw.sqlite"))
+
+
+@pytest.fixture
+def listings_transformados():
+
+    df = ejecutar_validaciones_listings(generar_listings(2000))
+
+    return transformar_listings(df, columnas_salida=COLUMNAS_CARGA)
+
+
+def contar(conn, consulta):
+    return conn.execute(consulta).fetchone()[0]
+
+
+def test_esquema_desde_schema_sql():
+
+    sentencias = sentencias_esquema(leer_sql("schema.sql"))
+
+    tablas = {s.split()[5] for s in sentencias if s.startswith("CREATE TABLE")}
+
+    assert {"dw.dim_host", "dw.dim_property", "dw.fact_listing_snapshot", "dw.agg_host_snapshot"} <= tablas
+    assert not any("TYPE" in s or "COLUMNSTORE" in s for s in sentencias)
+
+
+def test_carga_completa_en_sqlite(warehouse_sqlite, listings_transformados):
+
+    ejecutar_carga(listings_transformados)
+
+    conn = conectar_sqlite()
+
+    assert contar(conn, "SELECT COUNT(*) FROM dw.fact_listing_snapshot") == listings_transformados["id"].nunique()
+    assert contar(conn, "SELECT COUNT(*) FROM dw.dim_host") == listings_transformados["host_id"].nunique()
+    assert contar(conn, "SELECT COUNT(*) FROM dw.dim_property") == listings_transformados["id"].nunique()
+
+    pares = pares_amenities(listings_transformados["id"], listings_transformados["amenities"])
+
+    assert contar(conn, "SELECT COUNT(*) FROM dw.dim_amenity") == pares["amenity_name"].nunique()
+    assert contar(conn, "SELECT COUNT(*) FROM dw.bridge_property_amenity") == len(pares.drop_duplicates())
+
+    # Mismo día: la segunda carga no duplica hechos
+    ejecutar_carga(listings_transformados)
+
+    assert contar(conn, "SELECT COUNT(*) FROM dw.fact_listing_snapshot") == listings_transformados["id"].nunique()
+
+
+def test_carga_compacta_en_sqlite(warehouse_sqlite, listings_transformados):
+
+    # Categóricas, int8/int16 y bool llegan al DW con los mismos valores
+    ejecutar_carga(compactar(listings_transformados))
+
+    conn = conectar_sqlite()
+
+    assert contar(conn, "SELECT COUNT(*) FROM dw.fact_listing_snapshot") == listings_transformados["id"].nunique()
+    assert contar(conn, "SELECT COUNT(*) FROM dw.dim_host") == listings_transformados["host_id"].nunique()
+    assert contar(conn, "SELECT SUM(minimum_nights) FROM dw.dim_property") == (
+        listings_transformados.drop_duplicates("id")["minimum_nights"].sum()
+    )
+
+
+def test_scd2_host_en_sqlite(warehouse_sqlite, listings_transformados):
+
+    ejecutar_carga(listings_transformados)
+
+    host = listings_transformados["host_id"].iloc[0]
+    cambiado = listings_transformados.copy()
+    cambiado.loc[cambiado["host_id"] == host, "host_name"] = "NUEVO NOMBRE"
+
+    ejecutar_carga(cambiado)
+
+    conn = conectar_sqlite()
+    versiones = conn.execute(
+        "SELECT host_name, is_current, end_date FROM dw.dim_host WHERE host_id = ? ORDER BY host_key",
+        (int(host),)
+    ).fetchall()
+
+    assert [v[1] for v in versiones] == [0, 1]
+    assert versiones[1][0] == "NUEVO NOMBRE"
+    assert versiones[0][2] is not None
+
+
+def test_analitica_sobre_sqlite(warehouse_sqlite, listings_transformados):
+
+    ejecutar_carga(listings_transformados)
+
+    precios = ejecutar_consulta("01_pricing_intelligence.sql")
+    hosts = ejecutar_consulta("02_host_performance.sql")
+    mercado = ejecutar_consulta("03_market_opportunities.sql")
+
+    assert len(precios) == listings_transformados["id"].nunique()
+    assert set(precios["recommendation"]) <= {"underpriced", "overpriced", "fair"}
+    assert hosts["ranking"].min() == 1
+    assert set(mercado["neighbourhood"]) == set(listings_transformados["neighbourhood"].astype(str))
+
+
+def test_fact_review_daily_en_sqlite(warehouse_sqlite, listings_transformados):
+
+    ejecutar_carga(listings_transformados)
+
+    ids = listings_transformados["id"].to_numpy()
+    crudas = pd.DataFrame({
+        "listing_id": np.resize(ids[:50], 600),
+        "date": np.resize(["2025-03-01", "2025-03-02", "2025-03-03"], 600)
+    })
+
+    agregado = agregar_reviews([crudas])
+
+    assert ejecutar_carga_reviews(agregado) == (len(agregado), pd.Timestamp("2025-03-03"))
+
+    # Recarga desde el watermark: reemplaza, no duplica
+    ejecutar_carga_reviews(agregado[agregado["review_date"] >= "2025-03-02"])
+
+    conn = conectar_sqlite()
+
+    assert contar(conn, "SELECT SUM(review_count) FROM dw.fact_review_daily") == 600
+    assert contar(conn, "SELECT COUNT(*) FROM dw.dim_date") == 3
+    assert contar(conn, "SELECT weekday FROM dw.dim_date WHERE date_key = '2025-03-03'") == 1
+
+
+def test_review_antes_que_su_listing(warehouse_sqlite, listings_transformados):
+
+    # El listing tardío todavía no está en dim_property
+    tardio = int(listings_transformados["id"].iloc[0])
+    ejecutar_carga(listings_transformados[listings_transformados["id"] != tardio])
+
+    otro = int(listings_transformados["id"].iloc[1])
+    crudas = pd.DataFrame({
+        "listing_id": [tardio, otro, otro],
+        "date": ["2025-03-02", "2025-03-01", "2025-03-05"]
+    })
+
+    filas, watermark = ejecutar_carga_reviews(agregar_reviews([crudas]))
+
+    # La review retenida frena el watermark en su fecha
+    assert filas == 2
+    assert watermark == pd.Timestamp("2025-03-02")
+
+    # Llega el listing: la siguiente ejecución (desde el watermark) la carga
+    ejecutar_carga(listings_transformados)
+
+    filas, watermark = ejecutar_carga_reviews(agregar_reviews([crudas], watermark))
+
+    conn = conectar_sqlite()
+
+    assert (filas, watermark) == (2, pd.Timestamp("2025-03-05"))
+    assert contar(conn, "SELECT SUM(review_count) FROM dw.fact_review_daily") == 3
+    assert contar(conn, """
+        SELECT f.review_count
+        FROM dw.fact_review_daily f
+        JOIN dw.dim_property p ON p.property_key = f.property_key
+        WHERE p.listing_id = %d AND f.date_key = '2025-03-02'
+    """ % tardio) == 1
+
+
+def test_review_sin_listing_no_congela_el_watermark(warehouse_sqlite, listings_transformados, tmp_path, monkeypatch):
+
+    config = get_config()["reviews"]
+    monkeypatch.setitem(config, "max_pending_days", 30)
+    monkeypatch.setitem(config, "orphans_dir", str(tmp_path / "huerfanas"))
+
+    ejecutar_carga(listings_transformados)
+
+    # Listing que nunca entra en dim_property (p. ej. en cuarentena)
+    huerfano = int(listings_transformados["id"].max()) + 1
+    otro = int(listings_transformados["id"].iloc[0])
+
+    crudas = pd.DataFrame({
+        "listing_id": [huerfano, huerfano, otro],
+        "date": ["2025-01-10", "2025-03-20", "2025-04-01"]
+    })
+
+    filas, watermark = ejecutar_carga_reviews(agregar_reviews([crudas]))
+
+    # El watermark se retiene como mucho 30 días; lo anterior queda registrado
+    assert (filas, watermark) == (1, pd.Timestamp("2025-03-02"))
+
+    huerfanas = pd.read_parquet(tmp_path / "huerfanas")
+
+    assert huerfanas["listing_id"].tolist() == [huerfano]
+    assert huerfanas["review_date"].tolist() == [pd.Timestamp("2025-01-10")]
+
+    # Pasado el plazo el watermark avanza aunque el listing no llegue nunca
+    crudas.loc[len(crudas)] = [otro, "2025-05-15"]
+
+    filas, watermark = ejecutar_carga_reviews(agregar_reviews([crudas], watermark))
+
+    assert (filas, watermark) == (2, pd.Timestamp("2025-04-15"))
+    assert len(pd.read_parquet(tmp_path / "huerfanas")) == 2
+
+
+def test_resumenes_por_snapshot(warehouse_sqlite, listings_transformados, monkeypatch):
+
+    sqlite = WAREHOUSES["sqlite"]
+
+    monkeypatch.setitem(sqlite, "consulta_hoy", "SELECT '2026-01-01'")
+    ejecutar_carga(listings_transformados)
+
+    monkeypatch.setitem(sqlite, "consulta_hoy", "SELECT '2026-01-02'")
+    ejecutar_carga(listings_transformados.assign(price=listings_transformados["price"] * 2))
+
+    conn = conectar_sqlite()
+
+    # Cada snapshot tiene sus propias filas; recargar el mismo día las reemplaza
+    assert contar(conn, "SELECT COUNT(DISTINCT snapshot_date) FROM dw.agg_host_snapshot") == 2
+    assert contar(conn, "SELECT SUM(listing_count) FROM dw.agg_market_neighbourhood") == contar(
+        conn, "SELECT COUNT(*) FROM dw.fact_listing_snapshot"
+    )
+
+    # Los reportes leen los resúmenes y coinciden con el cálculo sobre los hechos
+    mercado = ejecutar_consulta("03_market_opportunities.sql").set_index("neighbourhood")
+    directo = pd.read_sql_query("""
+        SELECT dl.neighbourhood, SUM(f.number_of_reviews) * 0.4 + AVG(COALESCE(f.reviews_per_month, 0)) * 0.6 AS demand
+        FROM dw.fact_listing_snapshot f JOIN dw.dim_location dl ON f.location_key = dl.location_key
+        GROUP BY dl.neighbourhood
+    """, conn).set_index("neighbourhood")
+
+    assert np.allclose(mercado["demand_score"].sort_index(), directo["demand"].sort_index())
+
+    precios = ejecutar_consulta("01_pricing_intelligence.sql")
+
+    assert len(precios) == listings_transformados["id"].nunique()
+
+
+def test_staging_indexado_por_business_key(warehouse_sqlite, listings_transformados):
+
+    ejecutar_carga(listings_transformados)
+
+    conn = conectar_sqlite()
+    cursor = conn.cursor()
+
+    from src.pipeline.load import stage_dim_location
+    stage_dim_location(cursor, listings_transformados)
+
+    indices = cursor.execute("PRAGMA temp.index_list(location_stage)").fetchall()
+    columnas = [fila[2] for fila in cursor.execute(f"PRAGMA temp.index_info({indices[0][1]})")]
+
+    assert columnas == ["market", "neighbourhood_group", "neighbourhood", "geohash"]